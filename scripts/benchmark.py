@@ -1,5 +1,8 @@
 import argparse
+import atexit
 import datetime
+import functools
+import math
 import signal
 import subprocess
 import threading
@@ -8,12 +11,119 @@ import json
 import sys
 import os
 
+from hammer_output import parser_for
+from metrics import analyze_benchmark, get_cost_model, load_costs
+from planner import RUN_OVERHEAD_SECONDS, SATURATED_LEVELS_TO_SKIP, format_plan, plan_sweep, run_minutes_cost
+from http_session import HTTPRequestError, HTTPSession
+from native_driver import chain_payload, run_native
+from pod_usage import DEFAULT_INTERVAL as DEFAULT_USAGE_INTERVAL
+from pod_usage import PodUsageSampler, efficiency, open_sources, provisioned, totals
+from read_driver import READ_PREFIXES, run_reads
+from server_metrics import DEFAULT_SELECT, MetricsScraper, align, open_targets, summarize
+from storage import DirectoryReader, GCSReader, HTTPReader, StorageError
+from report import SATURATION_RATIO, is_saturated
+from results_db import ResultsDB, current_git_sha
+from throughput import (WARMUP_MIN_GAIN, ConvergenceMonitor, IntegrationTracker, TreeSizeSampler,
+                        WarmupMonitor, steady_state, wait_for_growth)
+from trials import MIN_TRIALS, run_trials
+from validate_costs import MACHINE_SPECS
+from workload import DEFAULT_SEGMENT_SECONDS, WorkloadError, compile_profile, describe_phase, load_profile
+
 TIER_DEFAULT_QPS_LEVELS = {
     "small":  [5, 10, 25, 50],
     "medium": [25, 50, 100, 250],
     "large":  [50, 100, 250, 500],
 }
 
+# Read QPS levels for --mode read; monitors read far more than CAs write.
+DEFAULT_READ_QPS_LEVELS = [50, 100, 250, 500, 1000]
+
+# Where TesseraCT checkpoints are read from; set in main() from --storage_dir
+# or --local_log. None means the GCS bucket for --project_id, created on
+# first use.
+CHECKPOINT_READER = None
+
+# Shared keep-alive session for all HTTP traffic to the logs (get-sth,
+# checkpoint reads, smoke-test submissions). Retries transient failures so a
+# load balancer hiccup doesn't abort the run.
+LOG_HTTP = HTTPSession(timeout=15, retries=3)
+
+# Server-side /metrics endpoints per system ({system: {component: url}}),
+# set in main() unless --metrics_interval is 0. Scraped during every run.
+METRICS_TARGETS = {}
+METRICS_INTERVAL = 10
+METRICS_SELECT = DEFAULT_SELECT
+
+# Per-system pod CPU/memory sources, set in main() unless --usage_interval
+# is 0. Sampled during every run.
+USAGE_SOURCES = {}
+USAGE_INTERVAL = DEFAULT_USAGE_INTERVAL
+
+# Longest the smoke test waits for its entry to appear in a tree head.
+SMOKE_TEST_TIMEOUT = 30
+
+# Seconds between tree-head polls for submit-to-inclusion latency on native
+# runs (--inclusion_interval); 0 disables tracking.
+INCLUSION_INTERVAL = 0.25
+
+
+def start_scraper(target_type, t0):
+    """Start scraping a system's server metrics for one run, or return None if there are none."""
+    if not METRICS_TARGETS.get(target_type):
+        return None
+    return MetricsScraper(METRICS_TARGETS[target_type], METRICS_INTERVAL, METRICS_SELECT).start(t0)
+
+
+def finish_scraper(scraper, details):
+    """Stop a run's scraper and store its series and run averages under details["server_metrics"]."""
+    if scraper is None:
+        return
+    metrics = scraper.stop()
+    metrics["summary"] = summarize(metrics)
+    details["server_metrics"] = metrics
+    failed = [c for c, d in metrics["components"].items() if d["errors"] and not d["scrapes"]]
+    if failed:
+        print(f"⚠️  No server metrics from {', '.join(failed)}")
+
+
+def start_usage(target_type, t0):
+    """Start sampling a system's pod CPU and memory for one run, or return None."""
+    if target_type not in USAGE_SOURCES:
+        return None
+    return PodUsageSampler(USAGE_SOURCES[target_type], USAGE_INTERVAL).start(t0)
+
+
+def finish_usage(sampler, details):
+    """Stop a run's pod usage sampler and store its series and totals under details["pod_usage"]."""
+    if sampler is None:
+        return
+    usage = sampler.stop()
+    usage["totals"] = totals(usage)
+    details["pod_usage"] = usage
+    if usage["totals"] is None:
+        print(f"⚠️  No pod usage samples ({usage['errors']} failed)")
+
+
+def add_efficiency(result, target_type, tier, data, requests, unit, cost_per_hour, rate):
+    """Relate a run's pod usage to its work and the tier's capacity (result["efficiency"]).
+
+    data is the run's analyze_benchmark report, cost_per_hour its full
+    fixed plus variable rate and `rate` the requests per second it achieved.
+    """
+    usage_totals = (result.get("pod_usage") or {}).get("totals")
+    if not usage_totals:
+        return
+    capacity = provisioned(load_costs(tier), MACHINE_SPECS)
+    node_cost = data["line_items"]["shared_infra"]["components"]["gke_nodes"]
+    result["efficiency"] = eff = efficiency(usage_totals, capacity, requests, unit, cost_per_hour, node_cost, rate)
+    line = f"🧮 {target_type}: {usage_totals['mean_vcpus']:.2f} vCPUs"
+    if capacity:
+        line += f" of {capacity['vcpus']:g} provisioned ({eff['cpu_utilization']:.0%} CPU, " \
+                f"{eff['memory_utilization']:.0%} memory)"
+    if eff[f"{unit}_per_vcpu_second"] is not None:
+        line += f", {eff[f'{unit}_per_vcpu_second']:g} {unit}/vCPU-s"
+    print(line)
+
 def run_cmd(cmd):
     result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
     if result.returncode != 0:
@@ -22,12 +132,15 @@ def run_cmd(cmd):
         sys.exit(1)
     return result.stdout.strip()
 
-def run_streaming(cmd, timeout_seconds=None):
+def run_streaming(cmd, timeout_seconds=None, parser=None, stop=None):
     """Run a command with streaming output and an optional hard timeout.
 
     Returns (returncode, timed_out). When timed_out is True the process was
     killed after exceeding timeout_seconds — callers should treat partial
-    results as usable rather than fatal.
+    results as usable rather than fatal. If a parser (see hammer_output.py)
+    is given, every line is fed to it before being echoed. Setting the
+    `stop` event (a threading.Event) ends the process group early without
+    counting as a timeout.
     """
     process = subprocess.Popen(
         cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
@@ -35,27 +148,44 @@ def run_streaming(cmd, timeout_seconds=None):
 
     timed_out = False
 
-    def _kill():
-        nonlocal timed_out
-        timed_out = True
-        print(f"\n⏰ Timeout ({timeout_seconds}s) reached, stopping process...")
+    def _terminate():
         try:
             os.killpg(os.getpgid(process.pid), signal.SIGTERM)
         except OSError:
             pass
 
+    def _kill():
+        nonlocal timed_out
+        timed_out = True
+        print(f"\n⏰ Timeout ({timeout_seconds}s) reached, stopping process...")
+        _terminate()
+
     timer = None
     if timeout_seconds:
         timer = threading.Timer(timeout_seconds, _kill)
         timer.start()
 
+    done = threading.Event()
+    if stop is not None:
+        def _watch():
+            while not done.is_set():
+                if stop.wait(0.5):
+                    if not done.is_set():
+                        print("\n🛑 Stop requested, stopping process...")
+                        _terminate()
+                    return
+        threading.Thread(target=_watch, daemon=True).start()
+
     try:
         for line in process.stdout:
+            if parser:
+                parser.feed(line)
             print(line, end='', flush=True)
         process.wait()
     except Exception:
         pass
     finally:
+        done.set()
         if timer:
             timer.cancel()
 
@@ -82,6 +212,7 @@ def get_trillian_tree_id():
     print("❌ Could not find log_id in ctfe-config")
     sys.exit(1)
 
+@functools.lru_cache(maxsize=None)
 def get_trillian_pub_key_der_hex():
     print("🔍 Fetching Trillian Public Key (DER)...")
     pem = run_cmd(r"kubectl get configmap ctfe-config -n trillian -o jsonpath='{.data.pubkey\.pem}'")
@@ -92,6 +223,7 @@ def get_trillian_pub_key_der_hex():
     os.remove("tmp_pub.pem")
     return der_hex
 
+@functools.lru_cache(maxsize=None)
 def get_tesseract_pub_key_b64():
     print("🔍 Fetching TesseraCT Public Key (B64)...")
     pem = run_cmd("gcloud secrets versions access latest --secret='tesseract-signer-pub'")
@@ -101,73 +233,128 @@ def get_tesseract_pub_key_b64():
     return b64
 
 def get_log_size(target_type, ip, project_id):
+    """Current tree size, or None if the tree head couldn't be read.
+
+    None rather than 0, so a failed read is never mistaken for an empty log.
+    """
     if target_type == "trillian":
         try:
-            output = run_cmd(f"curl -s http://{ip}/benchmark/ct/v1/get-sth")
-            data = json.loads(output)
-            return int(data.get("tree_size", 0))
-        except:
-            return 0
+            data = LOG_HTTP.get_json(f"http://{ip}/benchmark/ct/v1/get-sth")
+            return int(data["tree_size"])
+        except (HTTPRequestError, ValueError, KeyError, TypeError):
+            return None
     else: # tesseract
         try:
-            output = run_cmd(f"gcloud storage cat gs://tesseract-storage-{project_id}/checkpoint")
-            # Checkpoint format:
-            # origin
-            # size
-            # ...
-            lines = output.split("\n")
-            if len(lines) >= 2:
-                return int(lines[1])
-            return 0
-        except:
-            return 0
+            return get_checkpoint_reader(project_id).checkpoint_size()
+        except StorageError:
+            return None
+
+def require_log_size(target_type, ip, project_id):
+    """get_log_size for sizes a result is computed from; exits if the tree head can't be read."""
+    size = get_log_size(target_type, ip, project_id)
+    if size is None:
+        print(f"❌ Couldn't read the {target_type} tree size. Results would not be valid.")
+        sys.exit(1)
+    return size
+
+def get_checkpoint_reader(project_id):
+    """Return the shared TesseraCT storage reader, defaulting to GCS."""
+    global CHECKPOINT_READER
+    if CHECKPOINT_READER is None:
+        CHECKPOINT_READER = GCSReader(f"tesseract-storage-{project_id}")
+    return CHECKPOINT_READER
 
 def smoke_test(target_type, ip, project_id):
     """Verify the system can accept writes before running the full benchmark."""
     print(f"🔍 Smoke test: checking {target_type} can accept writes...")
-    initial_size = get_log_size(target_type, ip, project_id)
-    # Submit a single add-chain request via curl
+    initial_size = require_log_size(target_type, ip, project_id)
+    # Submit a single add-chain request over the shared session
     try:
         chain_file = "testdata/trillian/leaf01.chain" if target_type == "trillian" else "testdata/tesseract/leaf01.chain"
-        with open(chain_file, "r") as f:
-            pem_data = f.read()
-        chain = []
-        for block in pem_data.split("-----BEGIN CERTIFICATE-----"):
-            if "-----END CERTIFICATE-----" in block:
-                content = block.split("-----END CERTIFICATE-----")[0].replace("\n", "").strip()
-                chain.append(content)
-        payload = json.dumps({"chain": chain})
+        payload = chain_payload(chain_file)
         url = f"http://{ip}/benchmark/ct/v1/add-chain" if target_type == "trillian" else f"http://{ip}/tesseract-benchmark/ct/v1/add-chain"
-        result = subprocess.run(
-            ["curl", "-s", "-w", "%{http_code}", "-X", "POST",
-             "-H", "Content-Type: application/json",
-             "--data-binary", payload, url],
-            capture_output=True, text=True, timeout=30
-        )
-        status_code = result.stdout[-3:]
-        if status_code != "200":
+        sent = time.monotonic()
+        status_code, body = LOG_HTTP.post_json(url, payload)
+        if status_code != 200:
             print(f"❌ Smoke test failed for {target_type}: HTTP {status_code}")
-            print(f"   Response: {result.stdout[:-3]}")
+            print(f"   Response: {body.decode('utf-8', 'replace')}")
             sys.exit(1)
     except Exception as e:
         print(f"❌ Smoke test failed for {target_type}: {e}")
         sys.exit(1)
 
-    # Allow time for checkpoint integration (TesseraCT batches on 1s interval)
-    time.sleep(3)
-    final_size = get_log_size(target_type, ip, project_id)
-    if final_size <= initial_size:
-        print(f"⚠️  Smoke test warning: tree size didn't increase ({initial_size} -> {final_size}), may be lagging")
+    # Poll until the entry is covered by a published tree head instead of
+    # guessing how long integration takes.
+    waited, final_size = wait_for_growth(lambda: get_log_size(target_type, ip, project_id), initial_size,
+                                         SMOKE_TEST_TIMEOUT)
+    if waited is None:
+        print(f"⚠️  Smoke test warning: tree size didn't increase within {SMOKE_TEST_TIMEOUT}s "
+              f"({initial_size} -> {final_size}), may be lagging")
     else:
-        print(f"✅ Smoke test passed for {target_type} (tree: {initial_size} -> {final_size})")
+        print(f"✅ Smoke test passed for {target_type} (tree: {initial_size} -> {final_size}, "
+              f"included {time.monotonic() - sent:.2f}s after submission)")
 
 
-def run_warmup(target_type, ip, tree_id=None, qps=100, warmup_seconds=60, project_id=None):
-    """Run a warmup pass to eliminate cold-start noise (especially Spanner)."""
-    print(f"🔥 Warming up {target_type} ({warmup_seconds}s at {qps} QPS)...")
+def run_warmup(target_type, ip, tree_id=None, qps=100, warmup_seconds=60, project_id=None,
+               driver="hammer", driver_opts=None, adaptive=False, sample_interval=3,
+               min_gain=WARMUP_MIN_GAIN):
+    """Run a warmup pass to eliminate cold-start noise (especially Spanner).
 
-    warmup_ops = int(qps * warmup_seconds)
+    With `adaptive`, warmup_seconds is a hard cap: the tree size is sampled
+    every sample_interval seconds and warmup ends once the per-interval
+    write rate stops rising by more than min_gain. Returns a dict with the
+    warmup's duration and, when adaptive, its rate curve.
+    """
+    mode = f"up to {warmup_seconds}s, until the write rate levels off" if adaptive else f"{warmup_seconds}s"
+    print(f"🔥 Warming up {target_type} ({mode} at {qps} QPS)...")
+
+    monitor = sampler = None
+    if adaptive:
+        monitor = WarmupMonitor(min_gain=min_gain)
+        sampler = TreeSizeSampler(lambda: get_log_size(target_type, ip, project_id), sample_interval,
+                                  on_sample=monitor.observe)
+
+    start = time.time()
+    if sampler:
+        sampler.start(start, get_log_size(target_type, ip, project_id))
+    try:
+        if driver == "native":
+            opts = dict(driver_opts or {}, stop=monitor.stop) if monitor else (driver_opts or {})
+            run_native(target_type, ip, qps, warmup_seconds, **opts)
+        else:
+            _run_hammer_warmup(target_type, ip, tree_id, qps, warmup_seconds, project_id,
+                               stop=monitor.stop if monitor else None)
+    finally:
+        if sampler:
+            sampler.stop()
+    elapsed = time.time() - start
+
+    warmup = {"seconds": round(elapsed, 1), "adaptive": adaptive}
+    if monitor:
+        warmup.update({"cap_seconds": warmup_seconds, "warm_at_s": monitor.warm_at_s, "curve": monitor.curve})
+        if monitor.warm_at_s is not None:
+            print(f"🔥 Write rate levelled off at {monitor.warm_at_s:.0f}s "
+                  f"({monitor.curve[-1]['qps']:.2f} QPS); warmup took {elapsed:.0f}s")
+        else:
+            print(f"🔥 Write rate still rising at the {warmup_seconds}s cap")
+
+    print(f"🔥 Warmup complete, settling for 5s...")
+    time.sleep(5)
+    return warmup
 
+
+def hammer_command(target_type, ip, tree_id, project_id, qps, duration_seconds, headroom=20, operations=None,
+                   dup_chance=None):
+    """Build the ct_hammer (Trillian) or hammer (TesseraCT) command for one run.
+
+    The hammers are rate-limited to qps * headroom: well above target by
+    default, so the backend rather than the hammer is the bottleneck, or
+    headroom=1 to hold the hammer at qps (workload profiles). ct_hammer
+    stops after `operations` (default: its rate limit for the duration);
+    hammer after duration_seconds. dup_chance is the probability of
+    resubmitting an earlier chain (TesseraCT defaults to 0; ct_hammer's own
+    default applies unless it is set).
+    """
     if target_type == "trillian":
         der_hex = get_trillian_pub_key_der_hex()
         run_cmd("cp testdata/trillian/fake-ca.cert roots.pem")
@@ -180,108 +367,162 @@ def run_warmup(target_type, ip, tree_id=None, qps=100, warmup_seconds=60, projec
             f.write(f'    der: "{der_hex}"\n')
             f.write(f'  }}\n')
             f.write(f'}}\n')
+        rate_limit = qps * headroom
+        if operations is None:
+            operations = int(rate_limit * duration_seconds)
         url = f"http://{ip}"
-        # Set rate_limit well above target so ct_hammer isn't the bottleneck.
-        rate_limit = qps * 20
-        cmd = f"./bin/ct_hammer --log_config=trillian_cfg.textproto --ct_http_servers={url} --mmd=30s --rate_limit={rate_limit} --operations={warmup_ops} --testdata_dir=testdata/trillian --ignore_errors"
-    else:
-        os.environ["CT_LOG_PUBLIC_KEY"] = get_tesseract_pub_key_b64()
-        log_url = f"gs://tesseract-storage-{project_id}/"
-        write_url = f"http://{ip}/tesseract-benchmark"
-        # TesseraCT's PublicationAwaiter blocks each write until the entry is
-        # included in a published checkpoint (~1.5-3s latency).  We need enough
-        # concurrent writers to keep the pipeline full beyond the target QPS.
-        # With ~1.5s checkpoint interval each writer does ~0.67 writes/sec,
-        # so qps*5 writers gives ~3.3x headroom over the target.
-        num_writers = max(8, qps * 5)
-        # Set max_write_ops well above target so the hammer isn't the
-        # bottleneck.  leaf_write_goal=0 lets max_runtime control duration.
-        max_write = qps * 20
-        cmd = f"./bin/hammer --log_url={log_url} --write_log_url={write_url} --origin=tesseract-benchmark --max_write_ops={max_write} --max_read_ops=0 --max_runtime=1m --show_ui=false -v=1 " \
-              f"--num_writers={num_writers} --num_readers_random=0 --num_readers_full=0 --num_mmd_verifiers=0 --leaf_write_goal=0 --dup_chance=0 " \
-              f"--intermediate_ca_cert_path=testdata/tesseract/test_intermediate_ca_cert.pem --intermediate_ca_key_path=testdata/tesseract/test_intermediate_ca_private_key.pem --cert_sign_private_key_path=testdata/tesseract/test_leaf_cert_signing_private_key.pem"
+        cmd = f"./bin/ct_hammer --log_config=trillian_cfg.textproto --ct_http_servers={url} --mmd=30s --rate_limit={rate_limit} --operations={operations} --testdata_dir=testdata/trillian --ignore_errors"
+        if dup_chance is not None:
+            cmd += f" --duplicate_chance={dup_chance:g}"
+        return cmd
+
+    os.environ["CT_LOG_PUBLIC_KEY"] = get_tesseract_pub_key_b64()
+    log_url = f"gs://tesseract-storage-{project_id}/"
+    write_url = f"http://{ip}/tesseract-benchmark"
+    # TesseraCT's PublicationAwaiter blocks each write until the entry is
+    # included in a published checkpoint (~1.5-3s latency).  We need enough
+    # concurrent writers to keep the pipeline full beyond the target QPS.
+    # With ~1.5s checkpoint interval each writer does ~0.67 writes/sec,
+    # so qps*5 writers gives ~3.3x headroom over the target.
+    num_writers = max(8, qps * 5)
+    # leaf_write_goal=0 lets max_runtime control duration.
+    max_write = qps * headroom
+    return f"./bin/hammer --log_url={log_url} --write_log_url={write_url} --origin=tesseract-benchmark --max_write_ops={max_write} --max_read_ops=0 --max_runtime={duration_seconds:g}s --show_ui=false -v=1 " \
+           f"--num_writers={num_writers} --num_readers_random=0 --num_readers_full=0 --num_mmd_verifiers=0 --leaf_write_goal=0 --dup_chance={dup_chance or 0:g} " \
+           f"--intermediate_ca_cert_path=testdata/tesseract/test_intermediate_ca_cert.pem --intermediate_ca_key_path=testdata/tesseract/test_intermediate_ca_private_key.pem --cert_sign_private_key_path=testdata/tesseract/test_leaf_cert_signing_private_key.pem"
+
+
+def _run_hammer_warmup(target_type, ip, tree_id, qps, warmup_seconds, project_id, stop=None):
+    """Run ct_hammer / hammer for a warmup pass, stopping early if `stop` is set."""
+    warmup_ops = int(qps * warmup_seconds)
+    cmd = hammer_command(target_type, ip, tree_id, project_id, qps, warmup_seconds, operations=warmup_ops)
 
     # Hard timeout: warmup duration + 30s grace. Trillian's ct_hammer is
     # operation-count-based with no built-in time limit, so this prevents
     # it from running indefinitely if the backend can't sustain target QPS.
     timeout = warmup_seconds + 30
-    rc, timed_out = run_streaming(cmd, timeout_seconds=timeout)
+    rc, timed_out = run_streaming(cmd, timeout_seconds=timeout, stop=stop)
     if timed_out:
         print(f"⚠️  Warmup timed out after {timeout}s (continuing anyway)")
-    elif rc != 0:
+    elif rc != 0 and not (stop and stop.is_set()):
         print(f"⚠️  Warmup exited with code {rc} (continuing anyway)")
 
-    print(f"🔥 Warmup complete, settling for 5s...")
-    time.sleep(5)
 
+def run_hammer(target_type, ip, tree_id=None, duration_min=5, qps=100, project_id=None, warmup_seconds=60,
+               driver="hammer", driver_opts=None, sample_interval=10, converge=None, warmup_opts=None):
+    """Drive load at one QPS level and measure tree growth.
+
+    Returns (start_time, end_time, achieved_qps, entries_written, elapsed,
+    details) where details holds driver-specific extras for the result dict.
+
+    With `converge` (ConvergenceMonitor keyword arguments) and sampling on,
+    the run ends as soon as throughput has converged; duration_min is then
+    the upper bound. warmup_opts are passed on to run_warmup.
+    """
+    details = {}
 
-def run_hammer(target_type, ip, tree_id=None, duration_min=5, qps=100, project_id=None, warmup_seconds=60):
     # Run warmup phase if enabled
     if warmup_seconds > 0:
-        run_warmup(target_type, ip, tree_id, qps, warmup_seconds, project_id)
+        details["warmup"] = run_warmup(target_type, ip, tree_id, qps, warmup_seconds, project_id, driver,
+                                       driver_opts, **(warmup_opts or {}))
 
-    print(f"🚀 Starting {target_type} load test ({qps} QPS for {duration_min} min)...")
+    print(f"🚀 Starting {target_type} load test ({qps} QPS for {duration_min} min, {driver} driver)...")
 
-    initial_size = get_log_size(target_type, ip, project_id)
+    initial_size = require_log_size(target_type, ip, project_id)
     print(f"📈 Initial tree size: {initial_size}")
 
     duration_seconds = duration_min * 60
 
-    if target_type == "trillian":
-        der_hex = get_trillian_pub_key_der_hex()
-        run_cmd("cp testdata/trillian/fake-ca.cert roots.pem")
-        with open("trillian_cfg.textproto", "w") as f:
-            f.write(f'config {{\n')
-            f.write(f'  log_id: {tree_id}\n')
-            f.write(f'  prefix: "benchmark"\n')
-            f.write(f'  roots_pem_file: "roots.pem"\n')
-            f.write(f'  public_key {{\n')
-            f.write(f'    der: "{der_hex}"\n')
-            f.write(f'  }}\n')
-            f.write(f'}}\n')
-        # Set rate_limit and operations well above target so ct_hammer
-        # isn't the bottleneck — let MySQL be the limiting factor.
-        rate_limit = qps * 20
-        total_ops = int(rate_limit * duration_seconds)
-        url = f"http://{ip}"
-        cmd = f"./bin/ct_hammer --log_config=trillian_cfg.textproto --ct_http_servers={url} --mmd=30s --rate_limit={rate_limit} --operations={total_ops} --testdata_dir=testdata/trillian --ignore_errors"
-    else:
-        os.environ["CT_LOG_PUBLIC_KEY"] = get_tesseract_pub_key_b64()
-        log_url = f"gs://tesseract-storage-{project_id}/"
-        write_url = f"http://{ip}/tesseract-benchmark"
-        # TesseraCT's PublicationAwaiter blocks each write until the entry is
-        # included in a published checkpoint (~1.5-3s latency).  We need enough
-        # concurrent writers to keep the pipeline full beyond the target QPS.
-        # With ~1.5s checkpoint interval each writer does ~0.67 writes/sec,
-        # so qps*5 writers gives ~3.3x headroom over the target.
-        num_writers = max(8, qps * 5)
-        # Set max_write_ops well above target so the hammer isn't the
-        # bottleneck.  leaf_write_goal=0 lets max_runtime control duration.
-        max_write = qps * 20
-        cmd = f"./bin/hammer --log_url={log_url} --write_log_url={write_url} --origin=tesseract-benchmark --max_write_ops={max_write} --max_read_ops=0 --max_runtime={duration_min}m --show_ui=false -v=1 " \
-              f"--num_writers={num_writers} --num_readers_random=0 --num_readers_full=0 --num_mmd_verifiers=0 --leaf_write_goal=0 --dup_chance=0 " \
-              f"--intermediate_ca_cert_path=testdata/tesseract/test_intermediate_ca_cert.pem --intermediate_ca_key_path=testdata/tesseract/test_intermediate_ca_private_key.pem --cert_sign_private_key_path=testdata/tesseract/test_leaf_cert_signing_private_key.pem"
+    cmd = None if driver == "native" else hammer_command(target_type, ip, tree_id, project_id, qps, duration_seconds)
 
     # Hard timeout: intended duration + 30s grace. This is the backstop
     # that prevents ct_hammer from running indefinitely.
     timeout = duration_seconds + 30
 
+    def size_fn():
+        return get_log_size(target_type, ip, project_id)
+
+    sampler = None
+    tracker = None
+    inclusion = None
+    monitor = None
+    if driver == "native" and INCLUSION_INTERVAL > 0:
+        # Only the native driver knows when each accepted submission was
+        # sent. The tree head is polled on its own sub-second sampler: the
+        # throughput interval is far coarser than the 1-3s integration
+        # delays being measured.
+        tracker = IntegrationTracker()
+        driver_opts = dict(driver_opts or {}, on_submit=tracker.submitted)
+        inclusion = TreeSizeSampler(size_fn, INCLUSION_INTERVAL, on_sample=tracker.observe)
+    if sample_interval > 0:
+        if converge:
+            monitor = ConvergenceMonitor(**converge)
+            if driver == "native":
+                driver_opts = dict(driver_opts or {}, stop=monitor.stop)
+        sampler = TreeSizeSampler(size_fn, sample_interval, on_sample=monitor.observe if monitor else None)
+
     start_time = time.time()
-    rc, timed_out = run_streaming(cmd, timeout_seconds=timeout)
+    if sampler:
+        sampler.start(start_time, initial_size)
+    if inclusion:
+        inclusion.start(start_time, initial_size)
+    scraper = start_scraper(target_type, start_time)
+    pod_sampler = start_usage(target_type, start_time)
+    if driver == "native":
+        stats = run_native(target_type, ip, qps, duration_seconds, **(driver_opts or {}))
+        details["submit_latency_ms"] = stats.pop("submit_latency_ms")
+        details["latency_histograms"] = {"submit": stats.pop("submit_latency_histogram")}
+        details["driver_stats"] = stats
+        rc, timed_out = 0, False
+    else:
+        parser = parser_for(target_type)
+        rc, timed_out = run_streaming(cmd, timeout_seconds=timeout, parser=parser,
+                                      stop=monitor.stop if monitor else None)
+        details["hammer_output"] = parser.aggregate()
+        if details["hammer_output"]["error_classes"]:
+            print(f"⚠️  {target_type} hammer errors by class: {details['hammer_output']['error_classes']}")
     end_time = time.time()
     elapsed = end_time - start_time
+    finish_scraper(scraper, details)
+    finish_usage(pod_sampler, details)
+
+    if monitor:
+        details["convergence"] = dict(monitor.converged or {"converged_at_s": None},
+                                      planned_seconds=duration_seconds)
+        if monitor.converged:
+            c = monitor.converged
+            print(f"🎯 Throughput converged at {c['converged_at_s']:.0f}s ({c['rate_qps']:.2f} QPS, CV {c['cv']:.3f}); "
+                  f"ended {duration_seconds - elapsed:.0f}s early")
+        else:
+            print("🎯 Throughput did not converge; ran the full duration")
 
     if timed_out:
         print(f"⚠️ {target_type} hammer timed out after {timeout}s (using partial results)")
-    elif rc != 0:
+    elif rc != 0 and not (monitor and monitor.converged):
         # Non-zero exit is expected when --max_runtime is reached (TesseraCT)
         # or when the target ops couldn't be completed. The min_elapsed and
         # min_entries guards below catch truly broken runs.
         print(f"⚠️ {target_type} hammer exited with code {rc} (using partial results)")
 
-    final_size = get_log_size(target_type, ip, project_id)
+    final_size = require_log_size(target_type, ip, project_id)
     entries_written = final_size - initial_size
     print(f"📈 Final tree size: {final_size} ({entries_written} new entries)")
+    if sampler:
+        details.update(steady_state(sampler.stop(end_time, final_size)))
+        if "server_metrics" in details:
+            # Client throughput and server metrics share the run's clock.
+            details["timeline"] = align(details["throughput_series"], details["server_metrics"])
+    if tracker:
+        inclusion.stop()
+        integration = tracker.finish()
+        details["integration_latency_ms"] = integration.summary_ms()
+        details["latency_histograms"]["integration"] = integration.to_dict()
+        details["integration_tracking"] = {"poll_interval_s": INCLUSION_INTERVAL, "unmatched": tracker.unmatched,
+                                           "untracked_growth": tracker.untracked}
+        integ = details["integration_latency_ms"]
+        if integ["count"]:
+            print(f"⏱️  Submit-to-inclusion: p50={integ['p50']}ms p99={integ['p99']}ms max={integ['max']}ms "
+                  f"({integ['count']} entries, {INCLUSION_INTERVAL:g}s polling)")
 
     # Guard against bogus results from crashed or stalled hammers
     min_elapsed = 30  # seconds
@@ -295,59 +536,569 @@ def run_hammer(target_type, ip, tree_id=None, duration_min=5, qps=100, project_i
 
     achieved_qps = entries_written / elapsed
     print(f"📊 Achieved QPS: {achieved_qps:.2f} ({entries_written} entries / {elapsed:.1f}s)")
+    if details.get("steady_state_qps") is not None:
+        window = details["steady_window"]
+        print(f"📊 Steady-state QPS: {details['steady_state_qps']:.2f} "
+              f"(stable from {window['start_s']:.0f}s to {window['end_s']:.0f}s)")
+    elif sampler:
+        print("📊 Steady-state QPS: no stable window detected")
 
-    return start_time, end_time, achieved_qps, entries_written, elapsed
+    return start_time, end_time, achieved_qps, entries_written, elapsed, details
 
-def run_single_benchmark(target_type, ip, tree_id, duration_min, qps, project_id, warmup_seconds, tier):
+def run_single_benchmark(target_type, ip, tree_id, duration_min, qps, project_id, warmup_seconds, tier,
+                         driver="hammer", driver_opts=None, sample_interval=10, converge=None, warmup_opts=None):
     """Run a benchmark for one system at one QPS level and return a result dict."""
-    t_start, t_end, achieved_qps, entries_written, elapsed = run_hammer(
-        target_type, ip, tree_id, duration_min, qps, project_id, warmup_seconds
+    t_start, t_end, achieved_qps, entries_written, elapsed, details = run_hammer(
+        target_type, ip, tree_id, duration_min, qps, project_id, warmup_seconds, driver, driver_opts,
+        sample_interval, converge, warmup_opts
     )
 
-    res = subprocess.check_output(
-        f"python3 scripts/metrics.py --project_id {project_id} --start {t_start} --end {t_end} --type {target_type} --tier {tier}",
-        shell=True, text=True
-    )
-    data = json.loads(res)
+    data = analyze_benchmark(project_id, t_start, t_end, target_type, tier,
+                             usage={"entries_written": entries_written})
 
+    # Variable costs (storage, GCS operations) are spread over the run as an
+    # hourly rate so $/1M reflects both fixed and usage-based spend.
     cost_per_hour = data.get("cost_per_hour", 0)
+    duration_hours = data["duration_hours"]
+    variable_per_hour = data.get("variable_cost", 0) / duration_hours if duration_hours > 0 else 0
     if achieved_qps > 0:
-        cost_per_1m = cost_per_hour / (achieved_qps * 3600) * 1_000_000
+        cost_per_1m = (cost_per_hour + variable_per_hour) / (achieved_qps * 3600) * 1_000_000
     else:
         cost_per_1m = 0
 
-    return {
+    result = {
         "log_type": target_type,
         "target_qps": qps,
         "achieved_qps": round(achieved_qps, 2),
         "entries_written": entries_written,
         "elapsed_seconds": round(elapsed, 1),
         "cost_per_hour": round(cost_per_hour, 4),
+        "variable_cost_per_hour": round(variable_per_hour, 4),
+        "variable_costs": {name: round(data["costs"][name], 6) for name in data["costs"]
+                           if name not in ("shared_infra", "dedicated_backend")},
         "cost_per_1m_entries": round(cost_per_1m, 2),
     }
+    result.update(details)
+    add_efficiency(result, target_type, tier, data, entries_written, "writes", cost_per_hour + variable_per_hour,
+                   achieved_qps)
+    return result
+
+
+def run_read_benchmark(target_type, base_url, tree_size, duration_min, qps, project_id, tier,
+                       read_opts=None, headers=None):
+    """Drive reads against one system at one QPS level and return a result dict.
+
+    Reads are priced like writes: the fixed hourly infrastructure plus the
+    usage they cause, here egress for every byte returned and, on
+    TesseraCT, a GCS Class B operation per object fetched. Cost is per
+    million successful reads.
+    """
+    read_opts = read_opts or {}
+    t_start = time.time()
+    scraper = start_scraper(target_type, t_start)
+    pod_sampler = start_usage(target_type, t_start)
+    stats = run_reads(target_type, base_url, tree_size, qps, duration_min * 60, headers=headers, **read_opts)
+    t_end = time.time()
+    details = {}
+    finish_scraper(scraper, details)
+    finish_usage(pod_sampler, details)
+
+    reads = stats["requests_ok"]
+    usage = {"entries_written": 0, "egress_bytes": stats["bytes_received"]}
+    if target_type == "tesseract":
+        usage["gcs_class_b_ops"] = reads
+    data = analyze_benchmark(project_id, t_start, t_end, target_type, tier, usage=usage)
+
+    cost_per_hour = data.get("cost_per_hour", 0)
+    duration_hours = data["duration_hours"]
+    variable_per_hour = data.get("variable_cost", 0) / duration_hours if duration_hours > 0 else 0
+    achieved_qps = stats["ok_qps"]
+    if achieved_qps > 0:
+        cost_per_1m = (cost_per_hour + variable_per_hour) / (achieved_qps * 3600) * 1_000_000
+    else:
+        cost_per_1m = 0
+
+    result = {
+        "log_type": target_type,
+        "workload": "read",
+        "target_qps": qps,
+        "achieved_qps": round(achieved_qps, 2),
+        "reads_ok": reads,
+        "entries_read": stats["entries_read"],
+        "bytes_per_second": stats["bytes_per_second"],
+        "tree_size": tree_size,
+        "elapsed_seconds": stats["elapsed_seconds"],
+        "cost_per_hour": round(cost_per_hour, 4),
+        "variable_cost_per_hour": round(variable_per_hour, 4),
+        "variable_costs": {name: round(data["costs"][name], 6) for name in data["costs"]
+                           if name not in ("shared_infra", "dedicated_backend")},
+        "cost_per_1m_reads": round(cost_per_1m, 4),
+        "read_latency_ms": stats["read_latency_ms"],
+        "latency_histograms": {"read": stats.pop("read_latency_histogram")},
+        "read_driver": stats,
+    }
+    result.update(details)
+    add_efficiency(result, target_type, tier, data, reads, "reads", cost_per_hour + variable_per_hour, achieved_qps)
+    return result
+
+
+def read_endpoints(args, endpoints):
+    """Base URL and extra headers for each system's reads: ({system: url}, {system: headers})."""
+    read_urls = {"trillian": f"http://{endpoints['trillian'][0]}{READ_PREFIXES['trillian']}"}
+    headers = {"trillian": None, "tesseract": None}
+    if args.tesseract_read_url:
+        read_urls["tesseract"] = args.tesseract_read_url
+    elif args.local_log:
+        read_urls["tesseract"] = f"http://{args.local_log}{READ_PREFIXES['tesseract']}"
+    else:
+        # Monitors read TesseraCT's tiles straight from the bucket.
+        read_urls["tesseract"] = f"https://storage.googleapis.com/tesseract-storage-{args.project_id}"
+        headers["tesseract"] = {"Authorization": f"Bearer {run_cmd('gcloud auth print-access-token')}"}
+    return read_urls, headers
+
+
+def run_profile_phase(target_type, ip, tree_id, phase, project_id, tier, driver="hammer", driver_opts=None,
+                      read_url=None, read_headers=None, read_opts=None):
+    """Run one compiled workload phase (see workload.py) and return its result dict.
+
+    Reads run on the read driver in a background thread while writes run
+    on the native driver's shaped schedule, or as one fixed-rate hammer
+    invocation per segment.
+    """
+    duration = phase["duration"]
+    print(f"🎬 {target_type}: {describe_phase(phase)}")
+    initial_size = require_log_size(target_type, ip, project_id)
+
+    reads = {}
+    reader = None
+    if phase["peak_read_qps"] > 0:
+        if initial_size > 0:
+            def read():
+                reads.update(run_reads(target_type, read_url, initial_size, phase["read_rate"], duration,
+                                       phase["read_mix"], headers=read_headers, peak_qps=phase["peak_read_qps"],
+                                       **(read_opts or {})))
+            reader = threading.Thread(target=read, daemon=True)
+        else:
+            print(f"⚠️  {target_type} tree is empty; skipping this phase's reads")
+
+    details = {}
+    start_time = time.time()
+    scraper = start_scraper(target_type, start_time)
+    pod_sampler = start_usage(target_type, start_time)
+    if reader:
+        reader.start()
+    if phase["peak_write_qps"] <= 0:
+        time.sleep(duration)
+    elif driver == "native":
+        stats = run_native(target_type, ip, phase["write_rate"], duration, dup_chance=phase["dup_chance"],
+                           peak_qps=phase["peak_write_qps"], **(driver_opts or {}))
+        details["submit_latency_ms"] = stats.pop("submit_latency_ms")
+        stats.pop("submit_latency_histogram")
+        details["driver_stats"] = stats
+    else:
+        outputs = []
+        for seconds, qps in phase["segments"]:
+            if qps <= 0:
+                time.sleep(seconds)
+                continue
+            cmd = hammer_command(target_type, ip, tree_id, project_id, qps, seconds, headroom=1,
+                                 dup_chance=phase["dup_chance"])
+            parser = parser_for(target_type)
+            run_streaming(cmd, timeout_seconds=seconds + 30, parser=parser)
+            outputs.append(parser.aggregate())
+        details["hammer_segments"] = [{"seconds": round(sec, 1), "qps": q} for sec, q in phase["segments"]]
+        details["hammer_output"] = outputs
+    if reader:
+        reader.join()
+    end_time = time.time()
+    elapsed = end_time - start_time
+    finish_scraper(scraper, details)
+    finish_usage(pod_sampler, details)
+
+    entries_written = require_log_size(target_type, ip, project_id) - initial_size
+    usage = {"entries_written": entries_written, "egress_bytes": reads.get("bytes_received", 0)}
+    if target_type == "tesseract":
+        usage["gcs_class_b_ops"] = reads.get("requests_ok", 0)
+    data = analyze_benchmark(project_id, start_time, end_time, target_type, tier, usage=usage)
+
+    result = {
+        "name": phase["name"],
+        "duration_seconds": duration,
+        "elapsed_seconds": round(elapsed, 1),
+        "read_fraction": phase["read_fraction"],
+        "dup_chance": phase["dup_chance"],
+        "peak_write_qps": round(phase["peak_write_qps"], 2),
+        "peak_read_qps": round(phase["peak_read_qps"], 2),
+        "entries_written": entries_written,
+        "achieved_qps": round(entries_written / elapsed, 2) if elapsed > 0 else 0,
+        "reads_ok": reads.get("requests_ok", 0),
+        "read_qps": reads.get("ok_qps", 0),
+        "bytes_per_second": reads.get("bytes_per_second", 0),
+        "total_cost": round(data["total_cost"], 6),
+        "variable_costs": {name: round(data["costs"][name], 6) for name in data["costs"]
+                           if name not in ("shared_infra", "dedicated_backend")},
+    }
+    if reads:
+        result["read_latency_ms"] = reads["read_latency_ms"]
+    result.update(details)
+    requests = entries_written + result["reads_ok"]
+    if elapsed > 0:
+        add_efficiency(result, target_type, tier, data, requests, "requests", data["total_cost"] / (elapsed / 3600),
+                       requests / elapsed)
+    print(f"🎬 {phase['name']}: {result['achieved_qps']:.2f} writes/s, {result['read_qps']:.2f} reads/s, "
+          f"${result['total_cost']:.4f}")
+    return result
+
+
+def run_profile(target_type, ip, tree_id, profile, phases, project_id, tier, driver="hammer", driver_opts=None,
+                read_url=None, read_headers=None, read_opts=None):
+    """Run every phase of a workload profile against one system and return a result dict."""
+    results = [run_profile_phase(target_type, ip, tree_id, phase, project_id, tier, driver, driver_opts,
+                                 read_url, read_headers, read_opts) for phase in phases]
+    elapsed = sum(r["elapsed_seconds"] for r in results)
+    entries = sum(r["entries_written"] for r in results)
+    reads = sum(r["reads_ok"] for r in results)
+    total_cost = sum(r["total_cost"] for r in results)
+    return {
+        "log_type": target_type,
+        "workload": "profile",
+        "profile": profile["name"],
+        "target_qps": round(max(p["peak_write_qps"] + p["peak_read_qps"] for p in phases), 2),
+        "achieved_qps": round(entries / elapsed, 2) if elapsed > 0 else 0,
+        "entries_written": entries,
+        "reads_ok": reads,
+        "elapsed_seconds": round(elapsed, 1),
+        "total_cost": round(total_cost, 6),
+        "cost_per_hour": round(total_cost / (elapsed / 3600), 4) if elapsed > 0 else 0,
+        "cost_per_1m_requests": round(total_cost / (entries + reads) * 1_000_000, 4) if entries + reads else 0,
+        "phases": results,
+    }
+
+
+def run_profile_suite(args, profile, endpoints, systems, driver_opts):
+    """--profile: run the profile against each system and write profile_benchmark_summary.json."""
+    phases = compile_profile(profile, args.segment_seconds)
+    print(f"🎬 Workload profile '{profile['name']}' ({sum(p['duration'] for p in phases):g}s):")
+    for phase in phases:
+        print(f"   {describe_phase(phase)}")
+    read_urls, headers = ({}, {})
+    if any(p["peak_read_qps"] > 0 for p in phases):
+        read_urls, headers = read_endpoints(args, endpoints)
+    read_opts = {"batch": args.read_batch, "max_in_flight": args.max_in_flight}
+
+    results = []
+    for target_type in systems:
+        print("\n" + "="*40)
+        print(f"--- Profile {profile['name']} — {target_type} ---")
+        print("="*40)
+        ip, tid = endpoints[target_type]
+        results.append(run_profile(target_type, ip, tid, profile, phases, args.project_id, args.tier, args.driver,
+                                   driver_opts, read_urls.get(target_type), headers.get(target_type), read_opts))
+
+    print("\n" + "="*40)
+    print("      PROFILE SUMMARY")
+    print("="*40)
+    for r in results:
+        print(f"{r['log_type'].capitalize()} '{r['profile']}': {r['entries_written']} entries, {r['reads_ok']} reads "
+              f"in {r['elapsed_seconds']:.0f}s, ${r['total_cost']:.4f} (${r['cost_per_1m_requests']:.2f}/1M requests)")
+    print("="*40)
+
+    summary = {
+        "tier": args.tier,
+        "workload": "profile",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "profile": profile,
+        "results": results,
+    }
+    with open("profile_benchmark_summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+    print("📝 Wrote profile_benchmark_summary.json")
+
+
+def run_read_sweep(args, endpoints, systems):
+    """--mode read: sweep read QPS per system and write read_benchmark_summary.json."""
+    if args.read_qps_levels:
+        qps_levels = [int(q.strip()) for q in args.read_qps_levels.split(",")]
+    else:
+        qps_levels = DEFAULT_READ_QPS_LEVELS
+    read_opts = {"read_mix": args.read_mix, "batch": args.read_batch, "connections": args.connections,
+                 "max_in_flight": args.max_in_flight}
+
+    read_urls, headers = read_endpoints(args, endpoints)
+
+    results = []
+    for target_type in systems:
+        tree_size = require_log_size(target_type, endpoints[target_type][0], args.project_id)
+        if tree_size <= 0:
+            print(f"❌ {target_type} tree is empty; run a write benchmark first so there is something to read")
+            sys.exit(1)
+        for qps_level in qps_levels:
+            print("\n" + "="*40)
+            print(f"--- Reads: {qps_level} QPS — {target_type} (tree size {tree_size}) ---")
+            print("="*40)
+            results.append(run_read_benchmark(target_type, read_urls[target_type], tree_size, args.read_duration,
+                                              qps_level, args.project_id, args.tier, read_opts,
+                                              headers.get(target_type)))
+
+    print("\n" + "="*40)
+    print("      READ BENCHMARK SUMMARY")
+    print("="*40)
+    for r in results:
+        print(f"{r['log_type'].capitalize()} @ {r['target_qps']} read QPS: achieved {r['achieved_qps']:.2f} QPS, "
+              f"{r['bytes_per_second'] / 1e6:.2f} MB/s, ${r['cost_per_1m_reads']:.4f}/1M reads")
+    print("="*40)
+
+    summary = {
+        "tier": args.tier,
+        "workload": "read",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "read_mix": args.read_mix,
+        "results": results,
+    }
+    with open("read_benchmark_summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+    print("📝 Wrote read_benchmark_summary.json")
+
+
+def run_repeated_benchmark(target_type, ip, tree_id, trial_min, qps, project_id, warmup_seconds, tier,
+                           driver="hammer", driver_opts=None, sample_interval=10, repeats=5, target_ci=None,
+                           converge=None, warmup_opts=None):
+    """Run up to `repeats` short trials of one level and return the aggregate result.
+
+    Only the first trial warms up. Stops early once the bootstrap intervals
+    on achieved QPS and $/1M are within target_ci (see trials.run_trials).
+    """
+    def run_trial(i):
+        print(f"🔁 {target_type} @ {qps} QPS: trial {i + 1}/{repeats} ({trial_min} min)")
+        return run_single_benchmark(target_type, ip, tree_id, trial_min, qps, project_id,
+                                    warmup_seconds if i == 0 else 0, tier, driver, driver_opts,
+                                    sample_interval, converge, warmup_opts)
+
+    return run_trials(run_trial, repeats, target_ci)
+
+
+def search_saturation(run_level, start_qps, max_qps=5000, max_runs=6, growth=2.0, tolerance=0.1):
+    """Find the highest target QPS a system sustains at >=90% of target.
+
+    run_level(qps) runs one level and returns its result dict. The search
+    ramps geometrically from start_qps until a level saturates, then
+    bisects (geometrically) between the highest passing and lowest failing
+    targets. A saturated run also bounds the knee from above: achieved QPS is
+    the measured capacity, so targets beyond achieved / 0.9 cannot pass.
+
+    Stops when the bracket is within `tolerance` of the passing level, when
+    max_qps passes, or after max_runs levels. Returns (results, lo, hi) where
+    lo/hi are the best passing and lowest failing targets (None if unseen).
+    """
+    results = []
+    lo, hi = None, None
+    qps = start_qps
+    while len(results) < max_runs:
+        r = run_level(qps)
+        results.append(r)
+        if is_saturated(r):
+            implied = int(r["achieved_qps"] / SATURATION_RATIO) + 1
+            hi = min(qps, implied) if hi is None else min(hi, qps, implied)
+            if lo is not None and hi <= lo:
+                hi = lo + 1
+            print(f"🔎 {qps} QPS saturated (achieved {r['achieved_qps']:.2f}); knee below {hi} QPS")
+        else:
+            lo = qps if lo is None else max(lo, qps)
+            print(f"🔎 {qps} QPS sustained (achieved {r['achieved_qps']:.2f})")
+
+        if hi is None:
+            if qps >= max_qps:
+                break
+            qps = min(max_qps, max(qps + 1, int(qps * growth)))
+        elif lo is None:
+            if hi <= 1:
+                break
+            qps = max(1, min(hi - 1, int(hi * SATURATION_RATIO)))
+        else:
+            if hi - lo <= max(1, tolerance * lo):
+                break
+            qps = int(round(math.sqrt(lo * hi)))
+            if not lo < qps < hi:
+                qps = (lo + hi) // 2
+            if not lo < qps < hi:
+                break
+    return results, lo, hi
 
 
 def main():
+    global CHECKPOINT_READER, METRICS_TARGETS, METRICS_INTERVAL, METRICS_SELECT, USAGE_SOURCES, USAGE_INTERVAL, \
+        INCLUSION_INTERVAL
+
     parser = argparse.ArgumentParser()
-    parser.add_argument("--project_id", required=True)
+    parser.add_argument("--project_id", help="GCP project (required unless --local_log is set)")
     parser.add_argument("--duration", type=int, default=15, help="Benchmark duration in minutes (single-QPS mode)")
     parser.add_argument("--qps", type=int, default=50, help="Target QPS (single-QPS mode)")
-    parser.add_argument("--warmup", type=int, default=60, help="Warmup duration in seconds (0 to disable)")
+    parser.add_argument("--warmup", type=int, default=60, help="Warmup duration in seconds (0 to disable); the cap with --adaptive_warmup")
+    parser.add_argument("--adaptive_warmup", action="store_true", help="End warmup once the sampled write rate stops rising (--warmup becomes the cap)")
+    parser.add_argument("--warmup_min_gain", type=float, default=WARMUP_MIN_GAIN, help="With --adaptive_warmup, keep warming while the rate still rises by more than this fraction per window")
     parser.add_argument("--tier", default="large", help="Infrastructure tier (small/medium/large)")
-    parser.add_argument("--qps_levels", default=None, help="Comma-separated QPS levels for sweep mode (e.g. 50,100,250,500), or 'auto' for tier-aware defaults")
+    parser.add_argument("--qps_levels", default=None, help="Comma-separated QPS levels for sweep mode (e.g. 50,100,250,500), 'auto' for tier-aware defaults, or 'search' to find each system's saturation point")
     parser.add_argument("--sweep_duration", type=int, default=3, help="Duration in minutes per QPS level during sweep")
+    parser.add_argument("--systems", default="trillian,tesseract", help="Comma-separated systems to run in sweep and search modes")
+    parser.add_argument("--budget_usd", type=float, default=None, help="Plan the --qps_levels sweep to fit this infrastructure spend (costs.json rates)")
+    parser.add_argument("--budget_minutes", type=float, default=None, help="Plan the --qps_levels sweep to fit this much wall time")
+    parser.add_argument("--min_run_duration", type=float, default=1.0, help="Shortest run in minutes the budget planner may choose (--sweep_duration is the longest)")
+    parser.add_argument("--plan_only", action="store_true", help="Print the budget plan and exit")
+    parser.add_argument("--driver", choices=["hammer", "native"], default="hammer", help="Load generator: external hammer binaries or the built-in asyncio driver")
+    parser.add_argument("--connections", type=int, default=None, help="Keep-alive connections per system for the native driver (default: scaled with QPS)")
+    parser.add_argument("--max_in_flight", type=int, default=8192, help="Maximum outstanding requests for the native driver")
+    parser.add_argument("--corpus_dir", default=None, help="Send unique pre-signed chains from scripts/corpus.py output instead of the testdata chains (native driver)")
+    parser.add_argument("--search_max_runs", type=int, default=6, help="Maximum levels per system in --qps_levels search")
+    parser.add_argument("--search_max_qps", type=int, default=5000, help="Upper bound on target QPS in --qps_levels search")
+    parser.add_argument("--search_tolerance", type=float, default=0.1, help="Stop searching once the saturation bracket is within this fraction")
+    parser.add_argument("--repeats", type=int, default=1, help="Run up to this many short trials per level and report bootstrap confidence intervals")
+    parser.add_argument("--target_ci", type=float, default=None, help="With --repeats, stop once the 95%% CI on achieved QPS and $/1M is narrower than this fraction of the mean (e.g. 0.1)")
+    parser.add_argument("--trial_duration", type=float, default=1.0, help="Duration in minutes of each trial with --repeats (replaces --duration/--sweep_duration)")
+    parser.add_argument("--converge", action="store_true", help="End each run early once sampled throughput has converged (duration becomes the upper bound)")
+    parser.add_argument("--min_duration", type=float, default=120, help="With --converge, never stop a run before this many seconds")
+    parser.add_argument("--converge_cv", type=float, default=0.05, help="With --converge, maximum coefficient of variation of the trailing sample window")
+    parser.add_argument("--converge_window", type=int, default=6, help="With --converge, number of trailing sample intervals that must be stable")
+    parser.add_argument("--sample_interval", type=float, default=10, help="Seconds between tree-size samples during each run (0 to disable)")
+    parser.add_argument("--inclusion_interval", type=float, default=INCLUSION_INTERVAL, help="Seconds between tree-head polls measuring submit-to-inclusion latency on --driver native runs (0 to disable)")
+    parser.add_argument("--local_log", default=None, help="HOST:PORT of a running scripts/fake_log.py; skips cluster discovery and forces --driver native")
+    parser.add_argument("--results_db", default="results.db", help="Append the summary to this SQLite results history ('' to disable)")
+    parser.add_argument("--storage_dir", default=None, help="Read TesseraCT checkpoints from this directory instead of GCS (e.g. fake_log.py --storage_dir)")
+    parser.add_argument("--mode", choices=["write", "read"], default="write", help="Benchmark add-chain writes or the monitor read path (get-entries/consistency, tiles/bundles)")
+    parser.add_argument("--read_qps_levels", default=None, help=f"Comma-separated read QPS levels for --mode read (default {','.join(map(str, DEFAULT_READ_QPS_LEVELS))})")
+    parser.add_argument("--read_duration", type=float, default=1.0, help="Duration in minutes per read QPS level")
+    parser.add_argument("--read_mix", type=float, default=0.5, help="Fraction of reads at random positions; the rest walk the log sequentially")
+    parser.add_argument("--read_batch", type=int, default=256, help="Entries per sequential Trillian get-entries request")
+    parser.add_argument("--tesseract_read_url", default=None, help="Base URL for TesseraCT tile reads (default: the GCS bucket, or the local fake log)")
+    parser.add_argument("--metrics_interval", type=float, default=10, help="Seconds between scrapes of the pods' Prometheus /metrics during each run (0 to disable)")
+    parser.add_argument("--metrics_select", default=None, help=f"Comma-separated metric name prefixes to keep (default {','.join(DEFAULT_SELECT)})")
+    parser.add_argument("--usage_interval", type=float, default=DEFAULT_USAGE_INTERVAL, help="Seconds between samples of pod CPU and memory from the metrics API during each run (0 to disable)")
+    parser.add_argument("--profile", default=None, help="Run a YAML/JSON workload profile (phases of shaped, mixed reads and writes; see scripts/workload.py)")
+    parser.add_argument("--segment_seconds", type=float, default=DEFAULT_SEGMENT_SECONDS, help="With --profile and the hammer driver, length of each fixed-rate hammer run approximating a ramp")
     args = parser.parse_args()
 
-    trillian_ip = get_lb_ip("ctfe", "trillian")
-    tesseract_ip = get_lb_ip("tesseract-server", "tesseract")
-    tree_id = get_trillian_tree_id()
+    systems = [s.strip() for s in args.systems.split(",") if s.strip()]
+    if not systems or any(s not in ("trillian", "tesseract") for s in systems):
+        parser.error("--systems must list trillian and/or tesseract")
+    if args.corpus_dir and args.driver != "native":
+        parser.error("--corpus_dir requires --driver native")
+    if args.mode == "write" and args.driver == "native" and not args.corpus_dir and not args.local_log:
+        # The real logs deduplicate the handful of testdata chains, so the
+        # run would measure dedup-cache hits rather than writes.
+        parser.error("--driver native needs --corpus_dir (build one with scripts/corpus.py) outside --local_log")
 
-    print(f"✅ Discovered Endpoints:\n  Trillian:  {trillian_ip} (Tree: {tree_id})\n  TesseraCT: {tesseract_ip}")
+    # Load and validate the cost model before anything runs, so a bad
+    # costs.json or tier fails here rather than after the first run.
+    try:
+        get_cost_model().tier(args.tier)
+    except (OSError, ValueError) as e:
+        parser.error(f"cost model: {e}")
+
+    profile = None
+    if args.profile:
+        if args.mode == "read" or args.qps_levels or args.repeats > 1:
+            parser.error("--profile can't be combined with --mode read, --qps_levels or --repeats")
+        try:
+            profile = load_profile(args.profile)
+        except WorkloadError as e:
+            parser.error(f"profile: {e}")
+
+    plan = None
+    if args.budget_usd is not None or args.budget_minutes is not None:
+        if not args.qps_levels or args.qps_levels == "search":
+            parser.error("a budget needs --qps_levels as a list or 'auto'")
+        if args.repeats > 1:
+            parser.error("a budget plan can't be combined with --repeats")
+        if args.qps_levels == "auto":
+            candidates = TIER_DEFAULT_QPS_LEVELS.get(args.tier)
+            if not candidates:
+                parser.error(f"no auto QPS levels for tier '{args.tier}'")
+        else:
+            candidates = [int(q.strip()) for q in args.qps_levels.split(",")]
+        try:
+            plan = plan_sweep(load_costs(args.tier), candidates, systems, args.budget_usd, args.budget_minutes,
+                              args.min_run_duration, args.sweep_duration, args.warmup)
+        except ValueError as e:
+            print(f"❌ Can't plan within budget: {e}")
+            sys.exit(1)
+        print("\n" + "="*40)
+        print(f"--- Sweep Plan (tier {args.tier}) ---")
+        print("="*40)
+        for line in format_plan(plan):
+            print(f"💰 {line}")
+        if args.plan_only:
+            return
+    elif args.plan_only:
+        parser.error("--plan_only needs --budget_usd or --budget_minutes")
+
+    if args.local_log:
+        CHECKPOINT_READER = HTTPReader(f"http://{args.local_log}/tesseract-benchmark", session=LOG_HTTP)
+        args.driver = "native"
+        args.project_id = args.project_id or "local"
+        trillian_ip = tesseract_ip = args.local_log
+        tree_id = None
+        print(f"🧪 Using local fake log at {args.local_log}")
+    else:
+        if not args.project_id:
+            parser.error("--project_id is required unless --local_log is set")
+        trillian_ip = get_lb_ip("ctfe", "trillian")
+        tesseract_ip = get_lb_ip("tesseract-server", "tesseract")
+        tree_id = get_trillian_tree_id()
+        print(f"✅ Discovered Endpoints:\n  Trillian:  {trillian_ip} (Tree: {tree_id})\n  TesseraCT: {tesseract_ip}")
+
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+    if args.target_ci is not None and args.repeats < MIN_TRIALS:
+        parser.error(f"--target_ci needs --repeats of at least {MIN_TRIALS}")
+    if args.repeats > 1 and args.trial_duration < 0.5:
+        parser.error("--trial_duration must be at least 0.5 minutes (runs under 30s are rejected)")
+
+    warmup_opts = {"adaptive": args.adaptive_warmup, "min_gain": args.warmup_min_gain}
+
+    converge = None
+    if args.converge:
+        if args.sample_interval <= 0:
+            parser.error("--converge needs tree-size sampling (--sample_interval > 0)")
+        if args.converge_window < 2:
+            parser.error("--converge_window must be at least 2")
+        converge = {"min_seconds": max(30, args.min_duration), "window": args.converge_window,
+                    "max_cv": args.converge_cv}
+
+    if not 0 <= args.read_mix <= 1:
+        parser.error("--read_mix must be between 0 and 1")
+
+    if args.storage_dir:
+        CHECKPOINT_READER = DirectoryReader(args.storage_dir)
+    if CHECKPOINT_READER:
+        print(f"📂 Reading TesseraCT checkpoints via {CHECKPOINT_READER}")
+
+    if args.metrics_interval > 0:
+        METRICS_INTERVAL = args.metrics_interval
+        if args.metrics_select:
+            METRICS_SELECT = tuple(p.strip() for p in args.metrics_select.split(",") if p.strip())
+        METRICS_TARGETS, forwards = open_targets(systems, args.local_log)
+        atexit.register(lambda: [f.close() for f in forwards])
+        for system, targets in METRICS_TARGETS.items():
+            if targets:
+                print(f"📡 Scraping {system} metrics every {METRICS_INTERVAL:g}s from {', '.join(targets)}")
+
+    if args.usage_interval > 0:
+        USAGE_INTERVAL = args.usage_interval
+        USAGE_SOURCES = open_sources(systems, args.local_log)
+        print(f"🧮 Sampling pod CPU and memory every {USAGE_INTERVAL:g}s")
+
+    if args.mode == "read":
+        # Reads need no hammer and no smoke test, just a tree to read.
+        run_read_sweep(args, {"trillian": (trillian_ip, tree_id), "tesseract": (tesseract_ip, None)}, systems)
+        return
+
+    driver_opts = {"connections": args.connections, "max_in_flight": args.max_in_flight,
+                   "corpus_dir": args.corpus_dir}
 
     # Build hammer tools upfront
-    print("\n🔨 Building hammer tools...")
-    run_cmd("go build -o bin/ct_hammer github.com/google/certificate-transparency-go/trillian/integration/ct_hammer")
-    run_cmd("go build -o bin/hammer github.com/transparency-dev/tesseract/internal/hammer")
+    if args.driver == "hammer":
+        print("\n🔨 Building hammer tools...")
+        run_cmd("go build -o bin/ct_hammer github.com/google/certificate-transparency-go/trillian/integration/ct_hammer")
+        run_cmd("go build -o bin/hammer github.com/transparency-dev/tesseract/internal/hammer")
 
     # Smoke tests: verify both systems accept writes before committing to a full run
     print("\n" + "="*40)
@@ -356,51 +1107,120 @@ def main():
     smoke_test("trillian", trillian_ip, args.project_id)
     smoke_test("tesseract", tesseract_ip, args.project_id)
 
+    if profile:
+        run_profile_suite(args, profile, {"trillian": (trillian_ip, tree_id), "tesseract": (tesseract_ip, None)},
+                          systems, driver_opts)
+        return
+
+    def benchmark(target_type, ip, tid, duration_min, qps, warmup_seconds):
+        if args.repeats > 1:
+            return run_repeated_benchmark(target_type, ip, tid, args.trial_duration, qps, args.project_id,
+                                          warmup_seconds, args.tier, args.driver, driver_opts,
+                                          args.sample_interval, args.repeats, args.target_ci, converge, warmup_opts)
+        return run_single_benchmark(target_type, ip, tid, duration_min, qps, args.project_id, warmup_seconds,
+                                    args.tier, args.driver, driver_opts, args.sample_interval, converge, warmup_opts)
+
     results = []
+    search = {}
+    warmups = {}
+
+    labels = {"trillian": "Trillian (MySQL)", "tesseract": "TesseraCT (Spanner)"}
+    endpoints = {"trillian": (trillian_ip, tree_id), "tesseract": (tesseract_ip, None)}
 
     if args.qps_levels:
         # Sweep mode: iterate over QPS levels
-        if args.qps_levels == "auto":
+        sweep_duration = args.sweep_duration
+        if plan:
+            qps_levels = plan["levels"]
+            sweep_duration = plan["run_minutes"]
+        elif args.qps_levels in ("auto", "search"):
             if args.tier not in TIER_DEFAULT_QPS_LEVELS:
-                print(f"❌ Unknown tier '{args.tier}' for auto QPS levels. Known tiers: {', '.join(TIER_DEFAULT_QPS_LEVELS.keys())}")
+                print(f"❌ Unknown tier '{args.tier}' for {args.qps_levels} QPS levels. Known tiers: {', '.join(TIER_DEFAULT_QPS_LEVELS.keys())}")
                 sys.exit(1)
             qps_levels = TIER_DEFAULT_QPS_LEVELS[args.tier]
-            print(f"📋 Auto QPS levels for tier '{args.tier}': {qps_levels}")
+            if args.qps_levels == "search":
+                qps_levels = qps_levels[:1]
+                print(f"📋 Saturation search for tier '{args.tier}' starting at {qps_levels[0]} QPS")
+            else:
+                print(f"📋 Auto QPS levels for tier '{args.tier}': {qps_levels}")
         else:
             qps_levels = [int(q.strip()) for q in args.qps_levels.split(",")]
 
+        sweep_start = time.time()
+
         # Run warmup once per system before the sweep loop
         if args.warmup > 0:
             print("\n" + "="*40)
             print("--- Pre-sweep Warmup ---")
             print("="*40)
-            run_warmup("trillian", trillian_ip, tree_id, qps_levels[0], args.warmup, args.project_id)
-            run_warmup("tesseract", tesseract_ip, project_id=args.project_id, qps=qps_levels[0], warmup_seconds=args.warmup)
+            for target_type in systems:
+                ip, tid = endpoints[target_type]
+                warmups[target_type] = run_warmup(target_type, ip, tid, qps_levels[0], args.warmup, args.project_id,
+                                                  args.driver, driver_opts, **warmup_opts)
+
+        if args.qps_levels == "search":
+            for target_type in systems:
+                label = labels[target_type]
+                ip, tid = endpoints[target_type]
+
+                def run_level(qps_level):
+                    print("\n" + "="*40)
+                    print(f"--- Search: {qps_level} QPS — {label} ---")
+                    print("="*40)
+                    return benchmark(target_type, ip, tid, sweep_duration, qps_level, 0)
 
+                level_results, lo, hi = search_saturation(
+                    run_level, qps_levels[0], args.search_max_qps, args.search_max_runs, tolerance=args.search_tolerance)
+                results.extend(level_results)
+                search[target_type] = {"sustained_qps": lo, "saturated_qps": hi, "runs": len(level_results)}
+                print(f"🔎 {label}: sustains {lo if lo is not None else '—'} QPS, saturates by {hi if hi is not None else '—'} QPS "
+                      f"({len(level_results)} runs)")
+            qps_levels = []
+
+        saturated_streak = {target_type: 0 for target_type in systems}
+        skipped = []
         for qps_level in qps_levels:
-            print("\n" + "="*40)
-            print(f"--- Sweep: {qps_level} QPS — Trillian (MySQL) ---")
-            print("="*40)
-            r = run_single_benchmark("trillian", trillian_ip, tree_id, args.sweep_duration, qps_level, args.project_id, 0, args.tier)
-            results.append(r)
+            for target_type in systems:
+                if plan:
+                    if saturated_streak[target_type] >= SATURATED_LEVELS_TO_SKIP:
+                        skipped.append((qps_level, target_type))
+                        print(f"⏭️  Skipping {labels[target_type]} at {qps_level} QPS: saturated at the last "
+                              f"{SATURATED_LEVELS_TO_SKIP} levels")
+                        continue
+                    spent = (time.time() - sweep_start) / 60.0
+                    needed = sweep_duration + RUN_OVERHEAD_SECONDS / 60.0
+                    if spent + needed > plan["budget_minutes"]:
+                        skipped.append((qps_level, target_type))
+                        print(f"⏭️  Skipping {labels[target_type]} at {qps_level} QPS: {spent:.1f} of "
+                              f"{plan['budget_minutes']} budgeted minutes used")
+                        continue
+                print("\n" + "="*40)
+                print(f"--- Sweep: {qps_level} QPS — {labels[target_type]} ---")
+                print("="*40)
+                ip, tid = endpoints[target_type]
+                r = benchmark(target_type, ip, tid, sweep_duration, qps_level, 0)
+                results.append(r)
+                saturated_streak[target_type] = saturated_streak[target_type] + 1 if is_saturated(r) else 0
 
-            print("\n" + "="*40)
-            print(f"--- Sweep: {qps_level} QPS — TesseraCT (Spanner) ---")
-            print("="*40)
-            r = run_single_benchmark("tesseract", tesseract_ip, None, args.sweep_duration, qps_level, args.project_id, 0, args.tier)
-            results.append(r)
+        if plan:
+            minutes = (time.time() - sweep_start) / 60.0
+            plan["actual_minutes"] = round(minutes, 1)
+            plan["actual_cost"] = round(run_minutes_cost(plan, minutes), 2)
+            plan["skipped_runs"] = [{"target_qps": q, "log_type": t} for q, t in skipped]
+            print(f"💰 Sweep took {minutes:.1f} min, ${plan['actual_cost']:.2f} "
+                  f"(projected {plan['projected_minutes']} min, ${plan['projected_cost']:.2f})")
     else:
         # Single-QPS mode (backward compatible)
         print("\n" + "="*40)
         print("--- Phase 1: Trillian (MySQL) ---")
         print("="*40)
-        r = run_single_benchmark("trillian", trillian_ip, tree_id, args.duration, args.qps, args.project_id, args.warmup, args.tier)
+        r = benchmark("trillian", trillian_ip, tree_id, args.duration, args.qps, args.warmup)
         results.append(r)
 
         print("\n" + "="*40)
         print("--- Phase 2: TesseraCT (Spanner) ---")
         print("="*40)
-        r = run_single_benchmark("tesseract", tesseract_ip, None, args.duration, args.qps, args.project_id, args.warmup, args.tier)
+        r = benchmark("tesseract", tesseract_ip, None, args.duration, args.qps, args.warmup)
         results.append(r)
 
     # Summary
@@ -408,7 +1228,12 @@ def main():
     print("      BENCHMARK SUMMARY")
     print("="*40)
     for r in results:
-        print(f"{r['log_type'].capitalize()} @ {r['target_qps']} QPS: achieved {r['achieved_qps']:.2f} QPS, ${r['cost_per_hour']:.4f}/hr, ${r['cost_per_1m_entries']:.2f}/1M entries")
+        steady = f" (steady {r['steady_state_qps']:.2f})" if r.get("steady_state_qps") is not None else ""
+        ci = ""
+        if r.get("ci"):
+            q, c = r["ci"]["achieved_qps"], r["ci"]["cost_per_1m_entries"]
+            ci = f" [{r['ci']['trials']} trials, QPS CI {q['lo']:.2f}–{q['hi']:.2f}, $/1M CI {c['lo']:.2f}–{c['hi']:.2f}]"
+        print(f"{r['log_type'].capitalize()} @ {r['target_qps']} QPS: achieved {r['achieved_qps']:.2f} QPS{steady}, ${r['cost_per_hour']:.4f}/hr, ${r['cost_per_1m_entries']:.2f}/1M entries{ci}")
     print("="*40)
 
     summary = {
@@ -416,9 +1241,20 @@ def main():
         "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
         "results": results,
     }
+    if search:
+        summary["search"] = search
+    if warmups:
+        summary["warmup"] = warmups
+    if plan:
+        summary["plan"] = plan
     with open("benchmark_summary.json", "w") as f:
         json.dump(summary, f, indent=2)
 
+    if args.results_db:
+        with ResultsDB(args.results_db) as db:
+            run_id = db.ingest_summary(summary, git_sha=current_git_sha(), source="benchmark.py")
+        print(f"📥 Recorded run {run_id} in {args.results_db}")
+
 
 
 if __name__ == "__main__":
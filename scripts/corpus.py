@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Pre-signed add-chain corpus for the native load generator.
+
+The hammers sign a fresh leaf for every write, so at high QPS the client
+spends much of its CPU on signatures. This builder signs N unique leaves
+up front, in a process pool, against each system's test intermediate CA:
+
+    trillian   testdata/trillian/int-ca.cert + int-ca.privkey.pem (ECDSA)
+    tesseract  testdata/tesseract/test_intermediate_ca_cert.pem + _private_key.pem (RSA)
+
+It writes the ready-to-send JSON add-chain bodies into one indexed file.
+Corpus mmaps that file and hands out memoryview slices, so the driver sends
+bodies without parsing or copying them.
+
+File layout (little-endian):
+
+    header   magic "CTCORP01" | u64 count | u64 index offset
+    data     body 0 | body 1 | ... | body count-1
+    index    u64 offset[count + 1]   (body i is data[offset[i]:offset[i+1]])
+
+Each system's log deduplicates resubmitted certificates, so a corpus is
+consumed front to back. A "<file>.cursor" sidecar records the first unused
+body across runs.
+
+Usage:
+    python3 scripts/corpus.py --count 500000 --out corpus/
+    python3 scripts/benchmark.py ... --driver native --corpus_dir corpus/
+"""
+
+import argparse
+import array
+import base64
+import concurrent.futures
+import datetime
+import json
+import mmap
+import os
+import struct
+import subprocess
+import sys
+
+MAGIC = b"CTCORP01"
+HEADER = struct.Struct("<8sQQ")
+
+# Issuer material per system. The Trillian key is the certificate-
+# transparency-go test key, encrypted with the well-known test password.
+ISSUERS = {
+    "trillian": {
+        "cert": "testdata/trillian/int-ca.cert",
+        "key": "testdata/trillian/int-ca.privkey.pem",
+        "password": b"babelfish",
+    },
+    "tesseract": {
+        "cert": "testdata/tesseract/test_intermediate_ca_cert.pem",
+        "key": "testdata/tesseract/test_intermediate_ca_private_key.pem",
+        "password": None,
+    },
+}
+
+CHUNK_SIZE = 2000
+
+
+def corpus_path(corpus_dir, target_type):
+    return os.path.join(corpus_dir, f"{target_type}.corpus")
+
+
+class Corpus:
+    """Read-only, mmap-backed view of a corpus file.
+
+    Indexing returns a memoryview into the mapping, so bodies are never
+    copied until the socket write.
+    """
+
+    def __init__(self, path, start=0):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a corpus file")
+        self.count = count
+        self._view = memoryview(self._map)
+        self._offsets = self._view[index_offset:index_offset + 8 * (count + 1)].cast("Q")
+        self.start = start
+
+    def __len__(self):
+        return self.count - self.start
+
+    def __getitem__(self, i):
+        i += self.start
+        return self._view[self._offsets[i]:self._offsets[i + 1]]
+
+    @classmethod
+    def unused(cls, path):
+        """Open a corpus positioned at the cursor left by earlier runs."""
+        corpus = cls(path)
+        corpus.start = min(corpus.read_cursor(), corpus.count)
+        return corpus
+
+    def read_cursor(self):
+        try:
+            with open(self.path + ".cursor") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def advance(self, n):
+        """Mark n more bodies, from the current start, as consumed."""
+        cursor = min(self.count, self.start + n)
+        with open(self.path + ".cursor", "w") as f:
+            f.write(f"{cursor}\n")
+        return cursor
+
+    def close(self):
+        self._offsets.release()
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+
+def _load_issuer_key(key_path, password):
+    """Load an issuer key as unencrypted PEM bytes.
+
+    The Trillian test key is DES-CBC encrypted, which the cryptography
+    package no longer decrypts; fall back to the openssl CLI's legacy
+    provider for it.
+    """
+    from cryptography.hazmat.primitives import serialization
+
+    with open(key_path, "rb") as f:
+        pem = f.read()
+    # Tessera test keys use "TEST PRIVATE KEY" labels to dodge secret scanners.
+    pem = pem.replace(b" TEST PRIVATE KEY", b" PRIVATE KEY")
+    try:
+        key = serialization.load_pem_private_key(pem, password)
+    except (ValueError, TypeError):
+        cmd = ["openssl", "pkey", "-provider", "legacy", "-provider", "default",
+               "-in", key_path, "-passin", f"pass:{password.decode()}"]
+        pem = subprocess.run(cmd, capture_output=True, check=True).stdout
+        key = serialization.load_pem_private_key(pem, None)
+    return key.private_bytes(serialization.Encoding.PEM,
+                             serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption())
+
+
+def _sign_chunk(args):
+    """Worker: sign `count` leaves starting at `first` and return JSON bodies."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    target_type, first, count, issuer_cert_pem, issuer_key_pem = args
+    issuer_cert = x509.load_pem_x509_certificate(issuer_cert_pem)
+    issuer_key = serialization.load_pem_private_key(issuer_key_pem, None)
+    issuer_b64 = base64.b64encode(issuer_cert.public_bytes(serialization.Encoding.DER)).decode()
+    # One subject key per chunk: leaves differ by serial and name, and the
+    # log only cares about the issuer's signature.
+    leaf_key = ec.generate_private_key(ec.SECP256R1())
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    bodies = []
+    for i in range(first, first + count):
+        name = f"{target_type}-bench-{i}.example.com"
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)]))
+            .issuer_name(issuer_cert.subject)
+            .public_key(leaf_key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=90))
+            .add_extension(x509.SubjectAlternativeName([x509.DNSName(name)]), critical=False)
+            .add_extension(x509.BasicConstraints(ca=False, path_length=None), critical=True)
+            .sign(issuer_key, hashes.SHA256())
+        )
+        leaf_b64 = base64.b64encode(cert.public_bytes(serialization.Encoding.DER)).decode()
+        bodies.append(json.dumps({"chain": [leaf_b64, issuer_b64]}).encode())
+    return bodies
+
+
+def build_corpus(target_type, count, out_path, workers=None):
+    """Sign `count` unique leaves for one system and write an indexed corpus."""
+    issuer = ISSUERS[target_type]
+    with open(issuer["cert"], "rb") as f:
+        issuer_cert_pem = f.read()
+    issuer_key_pem = _load_issuer_key(issuer["key"], issuer["password"])
+
+    chunks = [(target_type, first, min(CHUNK_SIZE, count - first), issuer_cert_pem, issuer_key_pem)
+              for first in range(0, count, CHUNK_SIZE)]
+    offsets = array.array("Q", [0])
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, 0, 0))
+        data_start = out.tell()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            for bodies in pool.map(_sign_chunk, chunks):
+                for body in bodies:
+                    out.write(body)
+                    offsets.append(offsets[-1] + len(body))
+                print(f"\r🔏 {target_type}: {len(offsets) - 1}/{count} leaves signed", end="", flush=True)
+        print()
+        index_offset = out.tell()
+        # Offsets are absolute positions in the file.
+        for i in range(len(offsets)):
+            offsets[i] += data_start
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        out.write(offsets.tobytes())
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, count, index_offset))
+    os.replace(tmp_path, out_path)
+    try:
+        os.remove(out_path + ".cursor")
+    except OSError:
+        pass
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-sign an add-chain corpus for the native driver")
+    parser.add_argument("--system", choices=["trillian", "tesseract", "both"], default="both")
+    parser.add_argument("--count", type=int, default=100000, help="Unique leaves per system")
+    parser.add_argument("--out", default="corpus", help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Signing processes (default: CPU count)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    systems = ["trillian", "tesseract"] if args.system == "both" else [args.system]
+    for target_type in systems:
+        path = build_corpus(target_type, args.count, corpus_path(args.out, target_type), args.workers)
+        print(f"✅ Wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Cloud Billing Catalog API.
+
+Serves GET /v1/services/<service_id>/skus with pageToken pagination so
+validate_costs.py can be exercised without credentials or network:
+
+    python3 scripts/fake_billing.py --port 8081 --latency_ms 300 &
+    python3 scripts/validate_costs.py --api-base http://127.0.0.1:8081/v1 --api-key fake
+
+Pages come from one of two sources:
+
+    --pages DIR   recorded responses, DIR/<service_id>/<n>.json as written
+                  by validate_costs.py --record DIR; nextPageToken is
+                  rewritten to walk the files in order
+    (default)     a synthetic catalog built from costs.json: one SKU per
+                  price check, priced exactly as costs.json says, plus
+                  --filler unrelated SKUs per service to model catalog size
+
+--latency_ms delays every page, so the effect of fetching services
+concurrently shows up in wall time.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from validate_costs import MACHINE_SPECS, REGION_TO_GEO, SERVICES
+
+COSTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "costs.json")
+
+# Filler SKUs are spread across regions like the real per-region SKUs.
+FILLER_REGIONS = sorted(REGION_TO_GEO)
+
+_SKUS_PATH = re.compile(r"^/v1/services/([^/]+)/skus$")
+
+
+def _price(rate, unit="h"):
+    units = int(rate)
+    nanos = int(round((rate - units) * 1_000_000_000))
+    return [{
+        "pricingExpression": {
+            "usageUnit": unit,
+            "tieredRates": [{"startUsageAmount": 0,
+                             "unitPrice": {"currencyCode": "USD", "units": str(units), "nanos": nanos}}],
+        },
+    }]
+
+
+def _sku(description, resource_family, rate, regions, unit="h", usage_type="OnDemand"):
+    return {
+        "name": f"services/fake/skus/{uuid.uuid4()}",
+        "skuId": uuid.uuid4().hex[:14].upper(),
+        "description": description,
+        "category": {"resourceFamily": resource_family, "usageType": usage_type},
+        "serviceRegions": regions,
+        "pricingInfo": _price(rate, unit),
+    }
+
+
+def synthetic_catalog(costs, filler=0, region="us-central1"):
+    """Build {service_id: [sku, ...]} that prices every costs.json check exactly."""
+    catalog = {service_id: [] for service_id in SERVICES.values()}
+    compute, gke = catalog[SERVICES["compute"]], catalog[SERVICES["gke"]]
+    cloud_sql, spanner = catalog[SERVICES["cloud_sql"]], catalog[SERVICES["spanner"]]
+
+    # Every tier shares the compute, GKE and LB rates; take them from the first.
+    tier = next(iter(costs["tiers"].values()))
+    shared = tier["shared"]
+    specs = MACHINE_SPECS[tier["gke_machine_type"]]
+    pnh = shared["gke_nodes"]["per_node_hourly"]
+    gke.append(_sku("Regional Kubernetes Clusters cluster management fee", "Compute",
+                    shared["gke_cluster_mgmt"]["hourly_rate"], ["global"]))
+    compute.append(_sku("E2 Instance Core running in Americas", "Compute",
+                        pnh["cpu"] / specs["vcpus"], [region]))
+    compute.append(_sku("E2 Instance Ram running in Americas", "Compute",
+                        pnh["ram"] / specs["ram_gb"], [region], unit="GiBy.h"))
+    compute.append(_sku("Network Forwarding Rule running in Americas", "Network",
+                        shared["load_balancers"]["per_rule_hourly"], [region]))
+
+    seen_sql = set()
+    for tier in costs["tiers"].values():
+        sql = tier["trillian"]["cloud_sql"]
+        if sql["tier"] not in seen_sql:
+            seen_sql.add(sql["tier"])
+            if "micro" in sql["tier"]:
+                shape = "Micro instance"
+            else:
+                shape = f"{sql['tier'].rsplit('-', 1)[-1]} vCPU"
+            cloud_sql.append(_sku(f"Cloud SQL for MySQL: Zonal - {shape} in {region}", "ApplicationServices",
+                                  sql["hourly_rate"], [region]))
+    spanner_tier = next(iter(costs["tiers"].values()))["tesseract"]["spanner"]
+    spanner.append(_sku(f"Spanner Regional Processing Unit (us-central1)", "ApplicationServices",
+                        spanner_tier["hourly_rate"] / spanner_tier["processing_units"], [region]))
+
+    for service_id, skus in catalog.items():
+        for i in range(filler):
+            skus.append(_sku(f"Filler SKU {i} for {service_id}", "Other", 0.001 * (i % 97),
+                             [FILLER_REGIONS[i % len(FILLER_REGIONS)]], usage_type="Commit1Yr"))
+    return catalog
+
+
+def paginate(skus, page_size):
+    """Split a SKU list into response pages with nextPageToken links."""
+    pages = []
+    for start in range(0, max(1, len(skus)), page_size):
+        pages.append({"skus": skus[start:start + page_size]})
+    for i, page in enumerate(pages[:-1]):
+        page["nextPageToken"] = str(i + 1)
+    return pages
+
+
+def load_recorded_pages(pages_dir):
+    """Load DIR/<service_id>/<n>.json files as {service_id: [page, ...]}."""
+    catalog = {}
+    for service_id in sorted(os.listdir(pages_dir)):
+        service_dir = os.path.join(pages_dir, service_id)
+        if not os.path.isdir(service_dir):
+            continue
+        files = sorted((f for f in os.listdir(service_dir) if f.endswith(".json")),
+                       key=lambda f: int(f.split(".")[0]))
+        pages = []
+        for f in files:
+            with open(os.path.join(service_dir, f)) as fh:
+                pages.append(json.load(fh))
+        for i, page in enumerate(pages):
+            page.pop("nextPageToken", None)
+            if i + 1 < len(pages):
+                page["nextPageToken"] = str(i + 1)
+        catalog[service_id] = pages
+    return catalog
+
+
+def make_handler(pages_by_service, latency):
+    """Build a request handler serving pre-encoded pages."""
+    encoded = {sid: [json.dumps(p).encode() for p in pages] for sid, pages in pages_by_service.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            m = _SKUS_PATH.match(parts.path)
+            pages = encoded.get(m.group(1)) if m else None
+            token = parse_qs(parts.query).get("pageToken", ["0"])[0]
+            if pages is None or not token.isdigit() or int(token) >= len(pages):
+                self._send(404, b'{"error": {"code": 404, "message": "not found"}}')
+                return
+            if latency:
+                time.sleep(latency)
+            self._send(200, pages[int(token)])
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in Cloud Billing Catalog API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--pages", default=None, help="Serve recorded pages from this directory (validate_costs.py --record)")
+    parser.add_argument("--filler", type=int, default=20000, help="Unrelated SKUs per service in the synthetic catalog")
+    parser.add_argument("--page_size", type=int, default=5000, help="SKUs per synthetic page")
+    parser.add_argument("--latency_ms", type=float, default=0, help="Delay before serving each page")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages_by_service = load_recorded_pages(args.pages)
+        source = f"recorded pages in {args.pages}"
+    else:
+        with open(COSTS_FILE) as f:
+            costs = json.load(f)
+        catalog = synthetic_catalog(costs, args.filler)
+        pages_by_service = {sid: paginate(skus, args.page_size) for sid, skus in catalog.items()}
+        source = f"synthetic catalog ({args.filler} filler SKUs per service)"
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(pages_by_service, args.latency_ms / 1000.0))
+    server.daemon_threads = True
+    print(f"🧪 Fake billing catalog listening on {args.host}:{args.port} with {source}")
+    for sid, pages in pages_by_service.items():
+        print(f"   {sid}: {sum(len(p.get('skus', [])) for p in pages)} SKUs in {len(pages)} pages")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
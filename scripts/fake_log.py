@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""Offline stand-in CT log for exercising the benchmark pipeline locally.
+
+Serves both systems from one asyncio HTTP server so benchmark.py can run end
+to end without GKE, Cloud SQL, Spanner or GCS:
+
+    /benchmark/ct/v1/add-chain            Trillian-style: returns an SCT once
+                                          admitted, sequenced at the next
+                                          integration tick
+    /benchmark/ct/v1/get-sth              Trillian-style signed tree head
+    /tesseract-benchmark/ct/v1/add-chain  TesseraCT-style: blocks until the
+                                          entry is in a published checkpoint
+    /tesseract-benchmark/checkpoint       TesseraCT-style checkpoint (also
+                                          written to --storage_dir if set)
+
+and the read path monitors use:
+
+    /benchmark/ct/v1/get-entries           entries [start, end], at most
+                                          --get_entries_max per response
+    /benchmark/ct/v1/get-sth-consistency   a log2-sized consistency proof
+    /tesseract-benchmark/tile/<L>/<N>      Merkle tiles (32-byte hashes,
+                                          partial tiles as <N>.p/<W>)
+    /tesseract-benchmark/tile/data/<N>     entry bundles of up to 256 entries
+
+Both prefixes also serve /metrics: a Prometheus text exposition of request
+counts and latency per operation, integration batch sizes and process CPU,
+for exercising server_metrics.py; and the metrics API's pod list
+(/apis/metrics.k8s.io/v1beta1/namespaces/<ns>/pods) with one pod per log
+for pod_usage.py. Both logs share this process, so both pods report its
+CPU and memory.
+
+Each log has a per-request latency, an integration interval (TesseraCT
+publishes a checkpoint roughly once a second) and a throughput ceiling.
+Requests beyond the ceiling queue for admission, so an overloaded fake log
+shows rising latency and flat tree growth like the real backends. Reads
+have their own ceiling: Trillian serves them from the same MySQL as
+writes, TesseraCT's are static objects in GCS. --initial_size starts both
+trees non-empty so reads can be benchmarked without writing first.
+
+Usage:
+    python3 scripts/fake_log.py --port 8080
+    python3 scripts/benchmark.py --local_log 127.0.0.1:8080 --qps_levels 5,10,25
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import urllib.parse
+
+TRILLIAN_PREFIX = "/benchmark"
+TESSERACT_PREFIX = "/tesseract-benchmark"
+TESSERACT_ORIGIN = "tesseract-benchmark"
+
+TILE_WIDTH = 256
+HASH_SIZE = 32
+
+
+def parse_tile_path(rest):
+    """Parse "<L>/<N>[.p/<W>]" or "data/<N>[.p/<W>]" (tlog-tiles index encoding).
+
+    Returns (level, index, width) with level None for entry bundles and
+    width None for full tiles. Raises ValueError if malformed.
+    """
+    parts = rest.split("/")
+    level = None if parts[0] == "data" else int(parts[0])
+    parts = parts[1:]
+    width = None
+    if len(parts) >= 2 and parts[-2].endswith(".p"):
+        width = int(parts[-1])
+        parts = parts[:-2] + [parts[-2][:-2]]
+        if not 0 < width < TILE_WIDTH:
+            raise ValueError("bad partial width")
+    if not parts or any(len(p) != (4 if i < len(parts) - 1 else 3) for i, p in enumerate(parts)):
+        raise ValueError("bad tile index")
+    if any(not p.startswith("x") for p in parts[:-1]):
+        raise ValueError("bad tile index")
+    index = int("".join(p.lstrip("x") for p in parts))
+    return level, index, width
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 4, 16, 64, 256, 1024, 4096, 16384)
+
+
+class Exposition:
+    """Just enough of a Prometheus registry to serve the fake log's /metrics."""
+
+    def __init__(self):
+        self.types = {}
+        self.help = {}
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels=(), value=1, help=""):
+        self.types[name], self.help[name] = "counter", help
+        self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+
+    def observe(self, name, value, buckets, labels=(), help=""):
+        self.types[name], self.help[name] = "histogram", help
+        h = self.histograms.setdefault((name, labels), {"buckets": [0] * len(buckets), "le": buckets,
+                                                        "sum": 0.0, "count": 0})
+        for i, le in enumerate(buckets):
+            if value <= le:
+                h["buckets"][i] += 1
+        h["sum"] += value
+        h["count"] += 1
+
+    def render(self):
+        lines = []
+        for name in sorted(self.types):
+            lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {self.types[name]}")
+            for (n, labels), value in sorted(self.counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+            for (n, labels), h in sorted(self.histograms.items()):
+                if n != name:
+                    continue
+                for le, count in zip(h["le"], h["buckets"]):
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', f'{le:g}'),))} {count}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {h['count']}")
+                lines.append(f"{name}_sum{_labels(labels)} {h['sum']}")
+                lines.append(f"{name}_count{_labels(labels)} {h['count']}")
+        lines.append("# TYPE process_cpu_seconds_total counter")
+        lines.append(f"process_cpu_seconds_total {time.process_time()}")
+        return "\n".join(lines) + "\n"
+
+
+def _resident_bytes():
+    """This process's resident memory, like a container's working set."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs (macOS): peak RSS is the best available stand-in.
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+
+class FakeLog:
+    """In-memory log state: a pending queue and an integrated tree size."""
+
+    def __init__(self, name, latency_ms=5.0, jitter_ms=2.0, integration_interval=1.0,
+                 max_qps=1000.0, await_integration=False, storage_dir=None,
+                 read_max_qps=0.0, initial_size=0, entry_bytes=1200, get_entries_max=256):
+        self.name = name
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.integration_interval = integration_interval
+        self.max_qps = max_qps
+        self.await_integration = await_integration
+        self.storage_dir = storage_dir
+        self.read_max_qps = read_max_qps
+        self.metrics = Exposition()
+        # Trillian's signer and Tessera's integrator report batch sizes under different names.
+        self.batch_metric = "sequencer_batch_size" if name == "trillian" else "tessera_integration_batch_size"
+        self.get_entries_max = get_entries_max
+        self.tree_size = initial_size
+        self.pending = 0
+        self.timestamp_ms = int(time.time() * 1000)
+        self._next_admission = {"write": 0.0, "read": 0.0}
+        self._cpu_window = (time.monotonic(), time.process_time())
+        self._published = None
+        self._entry = hashlib.sha256(name.encode()).digest() * (entry_bytes // HASH_SIZE + 1)
+        self._entry = self._entry[:entry_bytes]
+
+    async def _admit(self, kind="write"):
+        """Wait for a slot under the write (or read) throughput ceiling."""
+        max_qps = self.max_qps if kind == "write" else self.read_max_qps
+        if max_qps <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_admission[kind])
+        self._next_admission[kind] = slot + 1.0 / max_qps
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _read_delay(self):
+        await self._admit("read")
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pod_metrics(self, namespace):
+        """A metrics API PodMetricsList for this log's one pod.
+
+        CPU is averaged since the previous call, like metrics-server's window.
+        """
+        now, cpu = time.monotonic(), time.process_time()
+        start, start_cpu = self._cpu_window
+        self._cpu_window = (now, cpu)
+        window = max(now - start, 1e-3)
+        return {
+            "kind": "PodMetricsList",
+            "apiVersion": "metrics.k8s.io/v1beta1",
+            "items": [{
+                "metadata": {"name": f"fake-{self.name}", "namespace": namespace},
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "window": f"{window:.3f}s",
+                "containers": [{"name": self.name, "usage": {
+                    "cpu": f"{int((cpu - start_cpu) / window * 1e9)}n",
+                    "memory": f"{_resident_bytes() // 1024}Ki",
+                }}],
+            }],
+        }
+
+    def entry(self, index):
+        """Stand-in leaf data for one entry (entry_bytes long)."""
+        return index.to_bytes(8, "big") + self._entry[8:]
+
+    async def get_entries(self, start, end):
+        if start < 0 or end < start or start >= self.tree_size:
+            return 400, {"error": "bad range"}
+        await self._read_delay()
+        end = min(end, start + self.get_entries_max - 1, self.tree_size - 1)
+        extra = base64.b64encode(b"\x00\x00\x00").decode()
+        return 200, {"entries": [{"leaf_input": base64.b64encode(self.entry(i)).decode(), "extra_data": extra}
+                                 for i in range(start, end + 1)]}
+
+    async def get_consistency(self, first, second):
+        if not 0 < first <= second <= self.tree_size:
+            return 400, {"error": "bad tree sizes"}
+        await self._read_delay()
+        proof_len = 0 if first == second else math.ceil(math.log2(second))
+        node = base64.b64encode(self.root_hash()).decode()
+        return 200, {"consistency": [node] * proof_len}
+
+    async def tile(self, level, index, width):
+        """Bytes of a Merkle tile (level >= 0) or entry bundle (level None), or None if absent."""
+        available = self.tree_size >> (8 * (level or 0))
+        have = min(TILE_WIDTH, available - index * TILE_WIDTH)
+        if have <= 0 or (width is None and have < TILE_WIDTH) or (width is not None and width > have):
+            return None
+        await self._read_delay()
+        count = width or TILE_WIDTH
+        if level is None:
+            first = index * TILE_WIDTH
+            return b"".join(len(self._entry).to_bytes(3, "big") + self.entry(first + i) for i in range(count))
+        return self.root_hash() * count
+
+    async def add_chain(self, body):
+        chain = json.loads(body).get("chain")
+        if not chain:
+            return 400, {"error": "missing chain"}
+        await self._admit()
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.pending += 1
+        if self.await_integration:
+            # Mirror TesseraCT's PublicationAwaiter: hold the response until
+            # a checkpoint covering this entry is published.
+            if self._published is None:
+                self._published = asyncio.get_running_loop().create_future()
+            await asyncio.shield(self._published)
+        leaf_hash = hashlib.sha256(chain[0].encode()).digest()
+        return 200, {
+            "sct_version": 0,
+            "id": base64.b64encode(hashlib.sha256(self.name.encode()).digest()).decode(),
+            "timestamp": int(time.time() * 1000),
+            "extensions": "",
+            "signature": base64.b64encode(leaf_hash).decode(),
+        }
+
+    def root_hash(self):
+        return hashlib.sha256(f"{self.name}:{self.tree_size}".encode()).digest()
+
+    def sth(self):
+        return {
+            "tree_size": self.tree_size,
+            "timestamp": self.timestamp_ms,
+            "sha256_root_hash": base64.b64encode(self.root_hash()).decode(),
+            "tree_head_signature": base64.b64encode(b"fake").decode(),
+        }
+
+    def checkpoint(self):
+        root = base64.b64encode(self.root_hash()).decode()
+        sig = base64.b64encode(b"fake").decode()
+        return f"{TESSERACT_ORIGIN}\n{self.tree_size}\n{root}\n\n— {TESSERACT_ORIGIN} {sig}\n"
+
+    def integrate(self):
+        """Sequence everything pending and publish a new tree head."""
+        if self.pending:
+            self.metrics.observe(self.batch_metric, self.pending, BATCH_BUCKETS, help="Entries integrated per batch")
+        self.tree_size += self.pending
+        self.pending = 0
+        self.timestamp_ms = int(time.time() * 1000)
+        if self.storage_dir:
+            self.write_checkpoint()
+        if self._published is not None:
+            self._published.set_result(self.tree_size)
+            self._published = None
+
+    def write_checkpoint(self):
+        """Publish the checkpoint to storage_dir, replacing it atomically."""
+        path = os.path.join(self.storage_dir, "checkpoint")
+        with open(path + ".tmp", "w") as f:
+            f.write(self.checkpoint())
+        os.replace(path + ".tmp", path)
+
+    async def integrate_forever(self):
+        while True:
+            await asyncio.sleep(self.integration_interval)
+            self.integrate()
+
+
+class FakeLogServer:
+    """Minimal HTTP/1.1 keep-alive server routing to a Trillian and a TesseraCT log."""
+
+    def __init__(self, trillian, tesseract):
+        self.trillian = trillian
+        self.tesseract = tesseract
+
+    async def route(self, method, path, body):
+        """Return (status, content_type, body_bytes) for one request."""
+        path, _, query = path.partition("?")
+        params = {k: v[0] for k, v in urllib.parse.parse_qs(query).items()}
+        if path.startswith(TRILLIAN_PREFIX + "/"):
+            log, rest = self.trillian, path[len(TRILLIAN_PREFIX):]
+        elif path.startswith(TESSERACT_PREFIX + "/"):
+            log, rest = self.tesseract, path[len(TESSERACT_PREFIX):]
+        else:
+            return 404, "text/plain", b"not found\n"
+
+        if rest == "/metrics" and method == "GET":
+            return 200, "text/plain; version=0.0.4", log.metrics.render().encode()
+        if rest.startswith("/apis/metrics.k8s.io/v1beta1/namespaces/") and rest.endswith("/pods") \
+                and method == "GET":
+            namespace = rest.split("/")[5]
+            return 200, "application/json", json.dumps(log.pod_metrics(namespace)).encode()
+        if rest.startswith("/ct/v1/"):
+            op = rest[len("/ct/v1/"):]
+        else:
+            op = "bundle" if rest.startswith("/tile/data/") else rest.split("/")[1]
+        start = time.monotonic()
+        status, content_type, data = await self._route_log(log, method, rest, params, body)
+        log.metrics.inc("http_reqs", (("op", op),), help="Requests received per operation")
+        log.metrics.inc("http_rsps", (("code", str(status)), ("op", op)), help="Responses per operation and status")
+        log.metrics.observe("http_latency", time.monotonic() - start, LATENCY_BUCKETS, (("op", op),),
+                            help="Request latency in seconds per operation")
+        return status, content_type, data
+
+    async def _route_log(self, log, method, rest, params, body):
+        if rest == "/ct/v1/add-chain" and method == "POST":
+            try:
+                status, payload = await log.add_chain(body)
+            except (ValueError, AttributeError):
+                status, payload = 400, {"error": "malformed request"}
+            return status, "application/json", json.dumps(payload).encode()
+        if rest == "/ct/v1/get-sth" and method == "GET":
+            return 200, "application/json", json.dumps(log.sth()).encode()
+        if rest == "/checkpoint" and method == "GET":
+            return 200, "text/plain", log.checkpoint().encode()
+        if method == "GET" and log is self.trillian and rest in ("/ct/v1/get-entries", "/ct/v1/get-sth-consistency"):
+            try:
+                if rest == "/ct/v1/get-entries":
+                    status, payload = await log.get_entries(int(params["start"]), int(params["end"]))
+                else:
+                    status, payload = await log.get_consistency(int(params["first"]), int(params["second"]))
+            except (KeyError, ValueError):
+                status, payload = 400, {"error": "malformed request"}
+            return status, "application/json", json.dumps(payload).encode()
+        if method == "GET" and log is self.tesseract and rest.startswith("/tile/"):
+            try:
+                data = await log.tile(*parse_tile_path(rest[len("/tile/"):]))
+            except ValueError:
+                data = None
+            if data is None:
+                return 404, "text/plain", b"not found\n"
+            return 200, "application/octet-stream", data
+        return 404, "text/plain", b"not found\n"
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                length = 0
+                keep_alive = True
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    name = name.strip().lower()
+                    if name == "content-length":
+                        length = int(value)
+                    elif name == "connection" and value.strip().lower() == "close":
+                        keep_alive = False
+                body = await reader.readexactly(length) if length else b""
+
+                status, content_type, payload = await self.route(method, path, body)
+                reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}.get(status, "")
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"\r\n".encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, trillian, tesseract):
+    server = FakeLogServer(trillian, tesseract)
+    tasks = [asyncio.create_task(log.integrate_forever()) for log in (trillian, tesseract)]
+    srv = await asyncio.start_server(server.handle, host, port, backlog=4096)
+    print(f"🧪 Fake CT log listening on {host}:{port}")
+    for log in (trillian, tesseract):
+        print(f"   {log.name}: {log.latency * 1000:.0f}ms latency, {log.integration_interval}s integration, "
+              f"{log.max_qps:g} QPS ceiling, {log.read_max_qps:g} read QPS ceiling"
+              f"{', awaits publication' if log.await_integration else ''}")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in CT log for benchmark.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency_ms", type=float, default=5.0, help="Base per-request latency in milliseconds")
+    parser.add_argument("--jitter_ms", type=float, default=2.0, help="Uniform +/- jitter on per-request latency")
+    parser.add_argument("--integration_interval", type=float, default=1.0, help="Seconds between integrations/checkpoints")
+    parser.add_argument("--trillian_max_qps", type=float, default=10.0, help="Trillian throughput ceiling (0 = unlimited)")
+    parser.add_argument("--tesseract_max_qps", type=float, default=1000.0, help="TesseraCT throughput ceiling (0 = unlimited)")
+    parser.add_argument("--storage_dir", default=None, help="Also publish the TesseraCT checkpoint to this directory (for benchmark.py --storage_dir)")
+    parser.add_argument("--trillian_read_max_qps", type=float, default=200.0, help="Trillian read ceiling (get-entries, proofs; 0 = unlimited)")
+    parser.add_argument("--tesseract_read_max_qps", type=float, default=0.0, help="TesseraCT read ceiling (tiles, bundles; 0 = unlimited)")
+    parser.add_argument("--initial_size", type=int, default=0, help="Start both trees with this many entries")
+    parser.add_argument("--entry_bytes", type=int, default=1200, help="Size of each entry's leaf data in read responses")
+    parser.add_argument("--get_entries_max", type=int, default=256, help="Most entries Trillian returns per get-entries")
+    args = parser.parse_args()
+
+    if args.storage_dir:
+        os.makedirs(args.storage_dir, exist_ok=True)
+
+    read_opts = {"initial_size": args.initial_size, "entry_bytes": args.entry_bytes,
+                 "get_entries_max": args.get_entries_max}
+    trillian = FakeLog("trillian", args.latency_ms, args.jitter_ms, args.integration_interval,
+                       args.trillian_max_qps, read_max_qps=args.trillian_read_max_qps, **read_opts)
+    tesseract = FakeLog("tesseract", args.latency_ms, args.jitter_ms, args.integration_interval,
+                        args.tesseract_max_qps, await_integration=True, storage_dir=args.storage_dir,
+                        read_max_qps=args.tesseract_read_max_qps, **read_opts)
+    try:
+        asyncio.run(serve(args.host, args.port, trillian, tesseract))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Streaming parsers for ct_hammer / hammer output.
+
+run_streaming feeds every output line to a parser before echoing it. The
+parsers keep only counters and a fixed-size ring buffer of progress
+samples, so memory stays flat however much `-v=1` output a long run
+produces. aggregate() turns that state into a dict for the result, with
+progress timestamps in seconds since the parser was created.
+
+Both tools log through glog/klog ("I0202 03:10:00.000000 1234 file.go:12] msg").
+Every line is classified by severity. Warning/error lines are bucketed into
+a fixed set of error classes. Tool-specific subclasses also pick out the
+progress lines each hammer emits:
+
+    ct_hammer:  "<prefix>: lastSTH.size=N ops: total=T invalid=I errs=E add-chain=ok/reqs ..."
+    hammer:     "Time-in-queue: ..." / "Observed-time-to-integrate: ..."
+"""
+
+import collections
+import re
+import time
+
+DEFAULT_RING_SIZE = 600
+
+_GLOG_PREFIX = re.compile(r"^([IWEF])\d{4} ")
+
+# Checked in order; the first matching class wins. Anything else on a
+# warning/error line counts as "other".
+_ERROR_CLASSES = re.compile(
+    r"(?P<timeout>deadline exceeded|[Tt]imeout|timed out)"
+    r"|(?P<connection_refused>connection refused)"
+    r"|(?P<connection_reset>connection reset|broken pipe|unexpected EOF)"
+    r"|(?P<rate_limited>\b429\b|Too Many Requests)"
+    r"|(?P<server_error>\b50[0-4]\b|Internal Server Error|Service Unavailable)"
+    r"|(?P<client_error>\b40[0-9]\b|Bad Request)"
+    r"|(?P<duplicate>[Dd]uplicate)"
+)
+
+_CT_HAMMER_STATS = re.compile(
+    r"lastSTH\.size=(\d+) ops: total=(\d+) invalid=(\d+) errs=(\d+)(.*)")
+_CT_HAMMER_OP = re.compile(r"([\w-]+)=(\d+)/(\d+)")
+
+_DURATION = r"([\d.]+)(ns|µs|us|ms|s|m)"
+_TESSERA_QUEUE = re.compile(r"Time-in-queue:\s*" + _DURATION)
+_TESSERA_INTEGRATE = re.compile(r"Observed-time-to-integrate:\s*" + _DURATION)
+
+_DURATION_SCALE = {"ns": 1e-6, "µs": 1e-3, "us": 1e-3, "ms": 1.0, "s": 1e3, "m": 6e4}
+
+
+def _to_ms(value, unit):
+    return float(value) * _DURATION_SCALE[unit]
+
+
+class LineParser:
+    """Base parser: severity counts and error classes for glog-style output."""
+
+    def __init__(self, ring_size=DEFAULT_RING_SIZE):
+        self.lines = 0
+        self.severity_counts = collections.Counter()
+        self.error_classes = collections.Counter()
+        self.samples = collections.deque(maxlen=ring_size)
+        self.t0 = time.time()
+
+    def feed(self, line, t=None):
+        self.lines += 1
+        m = _GLOG_PREFIX.match(line)
+        severity = m.group(1) if m else None
+        if severity:
+            self.severity_counts[severity] += 1
+        if severity in ("W", "E", "F"):
+            e = _ERROR_CLASSES.search(line)
+            self.error_classes[e.lastgroup if e else "other"] += 1
+        self.parse(line, time.time() if t is None else t)
+
+    def parse(self, line, t):
+        """Hook for tool-specific progress lines."""
+
+    def aggregate(self):
+        return {
+            "lines": self.lines,
+            "severity_counts": dict(sorted(self.severity_counts.items())),
+            "error_classes": dict(sorted(self.error_classes.items())),
+        }
+
+
+class CTHammerParser(LineParser):
+    """Parse ct_hammer's periodic hammerState summary lines."""
+
+    def __init__(self, ring_size=DEFAULT_RING_SIZE):
+        super().__init__(ring_size)
+        self.op_counts = {}
+
+    def parse(self, line, t):
+        if "lastSTH.size=" not in line:
+            return
+        m = _CT_HAMMER_STATS.search(line)
+        if not m:
+            return
+        sth_size, total, invalid, errs = (int(g) for g in m.groups()[:4])
+        for op, ok, reqs in _CT_HAMMER_OP.findall(m.group(5)):
+            self.op_counts[op] = {"ok": int(ok), "requests": int(reqs)}
+        self.samples.append((t, sth_size, total, invalid, errs))
+
+    def aggregate(self):
+        agg = super().aggregate()
+        agg["op_counts"] = self.op_counts
+        if self.samples:
+            _, sth_size, total, invalid, errs = self.samples[-1]
+            agg.update({"last_sth_size": sth_size, "total_ops": total,
+                        "invalid_ops": invalid, "errors": errs})
+        if len(self.samples) >= 2:
+            t0, _, total0, _, _ = self.samples[0]
+            t1, _, total1, _, _ = self.samples[-1]
+            if t1 > t0:
+                agg["reported_ops_per_sec"] = round((total1 - total0) / (t1 - t0), 2)
+        agg["progress"] = [
+            {"t": round(t - self.t0, 2), "sth_size": s, "total_ops": tot, "errors": e}
+            for t, s, tot, _, e in self.samples
+        ]
+        return agg
+
+
+class TesseraHammerParser(LineParser):
+    """Parse the TesseraCT hammer's queue and integration timing lines."""
+
+    def __init__(self, ring_size=DEFAULT_RING_SIZE):
+        super().__init__(ring_size)
+        self._queue_ms = None
+
+    def parse(self, line, t):
+        if "Time-in-queue" in line:
+            m = _TESSERA_QUEUE.search(line)
+            if m:
+                self._queue_ms = round(_to_ms(*m.groups()), 1)
+        if "Observed-time-to-integrate" in line:
+            m = _TESSERA_INTEGRATE.search(line)
+            if m:
+                self.samples.append((t, self._queue_ms, _to_ms(*m.groups())))
+
+    def aggregate(self):
+        agg = super().aggregate()
+        integrate = [s[2] for s in self.samples]
+        if integrate:
+            agg["time_to_integrate_ms"] = {
+                "last": round(integrate[-1], 1),
+                "mean": round(sum(integrate) / len(integrate), 1),
+                "max": round(max(integrate), 1),
+            }
+        agg["progress"] = [
+            {"t": round(t - self.t0, 2), "time_in_queue_ms": q, "time_to_integrate_ms": round(i, 1)}
+            for t, q, i in self.samples
+        ]
+        return agg
+
+
+PARSERS = {
+    "trillian": CTHammerParser,
+    "tesseract": TesseraHammerParser,
+}
+
+
+def parser_for(target_type, ring_size=DEFAULT_RING_SIZE):
+    """Return a fresh output parser for a system's hammer tool."""
+    return PARSERS.get(target_type, LineParser)(ring_size)
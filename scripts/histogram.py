@@ -0,0 +1,118 @@
+"""Fixed-memory, mergeable latency histogram with log-linear buckets.
+
+Values are recorded in microseconds. Below 2**SUB_BITS every value has its
+own bucket; above that each power of two is split into 2**(SUB_BITS-1)
+linear sub-buckets, the same layout HdrHistogram uses. With SUB_BITS=7 the
+relative error is under 1% and an hour-long range fits in under 2,000
+counters, no matter how many values are recorded.
+"""
+
+import math
+
+SUB_BITS = 7
+SUB_COUNT = 1 << SUB_BITS
+HALF_COUNT = SUB_COUNT >> 1
+
+# One hour in microseconds; larger values are clamped into the top bucket.
+DEFAULT_MAX_US = 3600 * 1_000_000
+
+
+def _index(value):
+    if value < SUB_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BITS
+    return shift * HALF_COUNT + (value >> shift)
+
+
+def _bucket_bounds(index):
+    """Return (lowest, highest) values that map to a bucket index."""
+    if index < SUB_COUNT:
+        return index, index
+    shift = index // HALF_COUNT - 1
+    low = (index - shift * HALF_COUNT) << shift
+    return low, low + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of latencies in microseconds."""
+
+    def __init__(self, max_us=DEFAULT_MAX_US):
+        self.max_us = max_us
+        self.counts = [0] * (_index(max_us) + 1)
+        self.count = 0
+        self.min_us = None
+        self.max_seen_us = 0
+
+    def record(self, seconds):
+        """Record one latency given in (fractional) seconds."""
+        self.record_us(int(seconds * 1_000_000))
+
+    def record_us(self, value, n=1):
+        value = min(max(0, value), self.max_us)
+        self.counts[_index(value)] += n
+        self.count += n
+        if self.min_us is None or value < self.min_us:
+            self.min_us = value
+        if value > self.max_seen_us:
+            self.max_seen_us = value
+
+    def merge(self, other):
+        """Add another histogram's counts into this one."""
+        if other.max_us != self.max_us:
+            raise ValueError("cannot merge histograms with different ranges")
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.max_seen_us = max(self.max_seen_us, other.max_seen_us)
+        return self
+
+    def percentile_us(self, p):
+        """Return the value at percentile p (0-100), or None if empty."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                low, high = _bucket_bounds(i)
+                return min((low + high) // 2, self.max_seen_us)
+        return self.max_seen_us
+
+    def summary_ms(self):
+        """Return count plus p50/p95/p99/max in milliseconds."""
+        def ms(v):
+            return round(v / 1000.0, 2) if v is not None else None
+        return {
+            "count": self.count,
+            "p50": ms(self.percentile_us(50)),
+            "p95": ms(self.percentile_us(95)),
+            "p99": ms(self.percentile_us(99)),
+            "max": ms(self.max_seen_us if self.count else None),
+        }
+
+    def to_dict(self):
+        """Serialize to a sparse JSON-friendly dict (bucket index -> count)."""
+        return {
+            "unit": "us",
+            "sub_bits": SUB_BITS,
+            "max_us": self.max_us,
+            "min": self.min_us,
+            "max": self.max_seen_us,
+            "counts": {str(i): c for i, c in enumerate(self.counts) if c},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("sub_bits", SUB_BITS) != SUB_BITS:
+            raise ValueError(f"histogram uses sub_bits={data['sub_bits']}, expected {SUB_BITS}")
+        h = cls(data.get("max_us", DEFAULT_MAX_US))
+        for i, c in data.get("counts", {}).items():
+            h.counts[int(i)] += c
+            h.count += c
+        h.min_us = data.get("min")
+        h.max_seen_us = data.get("max", 0)
+        return h
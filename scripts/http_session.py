@@ -0,0 +1,165 @@
+"""Thread-safe keep-alive HTTP client with timeouts and retry/backoff.
+
+Used for all control-plane HTTP traffic to the logs (get-sth, checkpoint
+reads, smoke-test add-chain, get-entries). It replaces per-call `curl`
+subprocesses: connections to each host are kept open and reused across
+calls and threads, so frequent tree-size polling costs a round trip rather
+than a fork plus TCP handshake. Transient failures (connection errors,
+timeouts, 429/502/503/504) are retried with exponential backoff instead of
+aborting the run.
+"""
+
+import contextlib
+import http.client
+import json
+import random
+import threading
+import time
+import urllib.parse
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class HTTPRequestError(Exception):
+    """Raised when a request fails after all retries."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class HTTPSession:
+    """A small pool of keep-alive connections per host."""
+
+    def __init__(self, timeout=10, retries=3, backoff=0.25, max_idle_per_host=8):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _checkout(self, scheme, netloc):
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop()
+        conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return conn_cls(netloc, timeout=self.timeout)
+
+    def _checkin(self, scheme, netloc, conn):
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _attempt(self, method, url, body, headers):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        conn = self._checkout(parts.scheme, parts.netloc)
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._checkin(parts.scheme, parts.netloc, conn)
+        return resp.status, data
+
+    def request(self, method, url, body=None, headers=None, retry_statuses=RETRY_STATUSES):
+        """Send a request and return (status, body bytes).
+
+        Non-retryable HTTP statuses are returned to the caller as-is. Raises
+        HTTPRequestError once retries are exhausted.
+        """
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = self.backoff * (2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.5))
+            try:
+                status, data = self._attempt(method, url, body, headers)
+            except (OSError, http.client.HTTPException) as e:
+                last_error = HTTPRequestError(f"{method} {url}: {e}")
+                continue
+            if status in retry_statuses:
+                last_error = HTTPRequestError(f"{method} {url}: HTTP {status}", status)
+                continue
+            return status, data
+        raise last_error
+
+    @contextlib.contextmanager
+    def open(self, method, url, headers=None, retry_statuses=RETRY_STATUSES):
+        """Send a request and yield the unread http.client response.
+
+        For reading large bodies incrementally. Failures before the body
+        is read are retried like request(); the connection goes back to the
+        pool only if the caller read the body to the end.
+        """
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = self.backoff * (2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.5))
+            conn = self._checkout(parts.scheme, parts.netloc)
+            try:
+                conn.request(method, path, headers=headers or {})
+                resp = conn.getresponse()
+                if resp.status in retry_statuses:
+                    resp.read()
+                    conn.close()
+                    last_error = HTTPRequestError(f"{method} {url}: HTTP {resp.status}", resp.status)
+                    continue
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                last_error = HTTPRequestError(f"{method} {url}: {e}")
+                continue
+            break
+        else:
+            raise last_error
+
+        try:
+            yield resp
+        except BaseException:
+            conn.close()
+            raise
+        if resp.isclosed() and not resp.will_close:
+            self._checkin(parts.scheme, parts.netloc, conn)
+        else:
+            conn.close()
+
+    def get(self, url):
+        """GET a URL, raising HTTPRequestError unless the status is 200."""
+        status, data = self.request("GET", url)
+        if status != 200:
+            raise HTTPRequestError(f"GET {url}: HTTP {status}", status)
+        return data
+
+    def get_json(self, url):
+        return json.loads(self.get(url))
+
+    def post_json(self, url, payload):
+        """POST a JSON body (bytes or object) and return (status, body bytes)."""
+        if not isinstance(payload, (bytes, bytearray)):
+            payload = json.dumps(payload).encode()
+        return self.request("POST", url, body=payload,
+                            headers={"Content-Type": "application/json"})
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
@@ -1,86 +1,270 @@
 import argparse
+import copy
+import functools
 import json
 import os
 import sys
 
 COSTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "costs.json")
 
+LOG_TYPES = ("trillian", "tesseract")
 
-def load_costs(tier="small"):
-    with open(COSTS_FILE, "r") as f:
-        data = json.load(f)
-
-    # Support tiered format (new) and flat format (legacy)
-    if "tiers" in data:
-        if tier not in data["tiers"]:
-            print(f"Unknown tier '{tier}'. Available: {', '.join(data['tiers'].keys())}", file=sys.stderr)
-            sys.exit(1)
-        return data["tiers"][tier]
-    else:
-        # Legacy flat format — return as-is
-        return data
-
-
-def analyze_benchmark(project_id, start_time, end_time, log_type, tier="small"):
-    costs = load_costs(tier)
-    duration_hours = (end_time - start_time) / 3600.0
-
-    system_costs = costs[log_type]
-    shared_costs = costs["shared"]
-
-    report = {
-        "log_type": log_type,
-        "duration_hours": duration_hours,
-        "cost_model": "deterministic",
-        "line_items": {},
-        "costs": {},
-    }
-
-    # Fixed costs: shared infrastructure (50/50 split)
-    shared_hourly = shared_costs["total_hourly"] / 2.0
-    report["line_items"]["shared_infra"] = {
-        "description": "GKE cluster + nodes + LB (50% allocation)",
-        "hourly_rate": shared_hourly,
-        "components": {
-            "gke_mgmt": shared_costs["gke_cluster_mgmt"]["hourly_rate"] / 2.0,
-            "gke_nodes": shared_costs["gke_nodes"]["hourly_rate"] / 2.0,
-            "load_balancer": shared_costs["load_balancers"]["hourly_rate"] / 2.0,
-        },
-    }
-    report["costs"]["shared_infra"] = shared_hourly * duration_hours
-
-    # Fixed costs: dedicated backend
-    dedicated_hourly = system_costs["dedicated_hourly"]
-    if log_type == "trillian":
-        report["line_items"]["dedicated_backend"] = {
-            "description": f"Cloud SQL {system_costs['cloud_sql']['tier']}",
-            "hourly_rate": dedicated_hourly,
-        }
-    else:
-        report["line_items"]["dedicated_backend"] = {
-            "description": f"Spanner {system_costs['spanner']['processing_units']} PU",
-            "hourly_rate": dedicated_hourly,
+BYTES_PER_GB = 2 ** 30
+
+# Measured usage analyze() accepts; anything missing is estimated from the
+# system's usage_estimates in costs.json, scaled by entries_written.
+USAGE_FIELDS = ("entries_written", "bytes_per_entry", "storage_bytes", "gcs_class_a_ops",
+                "gcs_class_b_ops", "egress_bytes")
+
+# Fields analyze_benchmark reads from each tier, checked once when the model loads.
+REQUIRED_FIELDS = (
+    ("shared", "total_hourly"),
+    ("shared", "gke_cluster_mgmt", "hourly_rate"),
+    ("shared", "gke_nodes", "hourly_rate"),
+    ("shared", "load_balancers", "hourly_rate"),
+    ("trillian", "dedicated_hourly"),
+    ("trillian", "cloud_sql", "tier"),
+    ("tesseract", "dedicated_hourly"),
+    ("tesseract", "spanner", "processing_units"),
+)
+
+
+class CostModel:
+    """Validated costs.json, with each (tier, system)'s hourly line items precomputed.
+
+    Build one with get_cost_model() so costs.json is read once per process;
+    analyze() and analyze_many() then only scale the precomputed rates by
+    each window's duration. Raises ValueError if costs.json is malformed.
+
+    Given usage, analyze() adds variable line items on top of the fixed
+    hourly ones: storage for the entries written (per-GB-month rate times
+    usage_estimates.storage_months of retention), GCS class A/B operations
+    (TesseraCT) and egress.
+    """
+
+    def __init__(self, data):
+        # Support tiered format (new) and flat format (legacy, one tier for every name)
+        if "tiers" in data:
+            self.tiers = data["tiers"]
+            self.legacy = None
+        else:
+            self.tiers = {}
+            self.legacy = data
+        for name, tier in (self.tiers.items() if self.legacy is None else [("(flat)", data)]):
+            for path in REQUIRED_FIELDS:
+                node = tier
+                for key in path:
+                    if not isinstance(node, dict) or key not in node:
+                        raise ValueError(f"costs.json tier '{name}' is missing {'.'.join(path)}")
+                    node = node[key]
+        self._templates = {}
+
+    def tier(self, tier="small"):
+        """Return a tier's costs dict. Raises ValueError for an unknown tier."""
+        if self.legacy is not None:
+            return self.legacy
+        if tier not in self.tiers:
+            raise ValueError(f"Unknown tier '{tier}'. Available: {', '.join(self.tiers.keys())}")
+        return self.tiers[tier]
+
+    def _template(self, log_type, tier):
+        key = (log_type, tier)
+        if key not in self._templates:
+            if log_type not in LOG_TYPES:
+                raise ValueError(f"Unknown log type '{log_type}'")
+            costs = self.tier(tier)
+            system_costs = costs[log_type]
+            shared_costs = costs["shared"]
+
+            line_items = {}
+            # Fixed costs: shared infrastructure (50/50 split)
+            line_items["shared_infra"] = {
+                "description": "GKE cluster + nodes + LB (50% allocation)",
+                "hourly_rate": shared_costs["total_hourly"] / 2.0,
+                "components": {
+                    "gke_mgmt": shared_costs["gke_cluster_mgmt"]["hourly_rate"] / 2.0,
+                    "gke_nodes": shared_costs["gke_nodes"]["hourly_rate"] / 2.0,
+                    "load_balancer": shared_costs["load_balancers"]["hourly_rate"] / 2.0,
+                },
+            }
+            # Fixed costs: dedicated backend
+            if log_type == "trillian":
+                description = f"Cloud SQL {system_costs['cloud_sql']['tier']}"
+            else:
+                description = f"Spanner {system_costs['spanner']['processing_units']} PU"
+            line_items["dedicated_backend"] = {
+                "description": description,
+                "hourly_rate": system_costs["dedicated_hourly"],
+            }
+            self._templates[key] = line_items
+        return self._templates[key]
+
+    def resolve_usage(self, log_type, tier, usage, duration_hours):
+        """Fill in unmeasured usage from costs.json estimates.
+
+        Returns the usage dict with an "estimated" list naming the fields
+        that were filled in.
+        """
+        estimates = self.tier(tier)[log_type].get("usage_estimates", {})
+        resolved = {k: usage[k] for k in USAGE_FIELDS if usage.get(k) is not None}
+        entries = resolved.get("entries_written", 0)
+        estimated = []
+        if "storage_bytes" not in resolved:
+            if "bytes_per_entry" not in resolved and "bytes_per_entry" in estimates:
+                resolved["bytes_per_entry"] = estimates["bytes_per_entry"]
+                estimated.append("bytes_per_entry")
+            if "bytes_per_entry" in resolved:
+                resolved["storage_bytes"] = entries * resolved["bytes_per_entry"]
+                estimated.append("storage_bytes")
+        if log_type == "tesseract":
+            if "gcs_class_a_ops" not in resolved:
+                resolved["gcs_class_a_ops"] = round(
+                    entries * estimates.get("gcs_class_a_ops_per_entry", 0)
+                    + duration_hours * estimates.get("gcs_class_a_ops_per_hour", 0))
+                estimated.append("gcs_class_a_ops")
+            if "gcs_class_b_ops" not in resolved:
+                resolved["gcs_class_b_ops"] = round(entries * estimates.get("gcs_class_b_ops_per_entry", 0))
+                estimated.append("gcs_class_b_ops")
+        resolved["estimated"] = estimated
+        return resolved
+
+    def _variable_items(self, log_type, tier, usage):
+        """Variable line items as (name, item, cost) for resolved usage."""
+        costs = self.tier(tier)
+        system_costs = costs[log_type]
+        estimates = system_costs.get("usage_estimates", {})
+        items = []
+
+        storage = system_costs.get("cloud_sql_storage" if log_type == "trillian" else "gcs")
+        if storage and usage.get("storage_bytes"):
+            months = estimates.get("storage_months", 1)
+            gb = usage["storage_bytes"] / BYTES_PER_GB
+            items.append(("storage", {
+                "description": f"{storage['description']}, {months:g} month(s) of entries written",
+                "unit_rate": storage["per_gb_monthly"] * months,
+                "unit": "GB",
+                "quantity": gb,
+            }, gb * storage["per_gb_monthly"] * months))
+
+        gcs = system_costs.get("gcs", {})
+        for cls in ("a", "b"):
+            ops = usage.get(f"gcs_class_{cls}_ops")
+            rate = gcs.get(f"class_{cls}_per_10k_ops")
+            if ops and rate is not None:
+                items.append((f"gcs_class_{cls}_ops", {
+                    "description": f"GCS Class {cls.upper()} operations",
+                    "unit_rate": rate,
+                    "unit": "10k ops",
+                    "quantity": ops / 10_000,
+                }, ops / 10_000 * rate))
+
+        egress = costs["shared"].get("egress")
+        if egress and usage.get("egress_bytes"):
+            gb = usage["egress_bytes"] / BYTES_PER_GB
+            items.append(("egress", {
+                "description": egress["description"],
+                "unit_rate": egress["per_gb"],
+                "unit": "GB",
+                "quantity": gb,
+            }, gb * egress["per_gb"]))
+        return items
+
+    def analyze(self, log_type, start_time, end_time, tier="small", usage=None):
+        """Cost report for one system over one [start_time, end_time] window.
+
+        usage (see USAGE_FIELDS) adds variable costs; without it only the
+        fixed hourly infrastructure is priced.
+        """
+        line_items = self._template(log_type, tier)
+        duration_hours = (end_time - start_time) / 3600.0
+
+        report = {
+            "log_type": log_type,
+            "duration_hours": duration_hours,
+            "cost_model": "deterministic",
+            "line_items": copy.deepcopy(line_items),
+            "costs": {name: item["hourly_rate"] * duration_hours for name, item in line_items.items()},
         }
-    report["costs"]["dedicated_backend"] = dedicated_hourly * duration_hours
 
-    # Total fixed cost
-    cost_per_hour = shared_hourly + dedicated_hourly
-    total_cost = sum(report["costs"].values())
+        # Total fixed cost
+        report["cost_per_hour"] = sum(item["hourly_rate"] for item in line_items.values())
+        if usage is not None:
+            report["cost_model"] = "deterministic+usage"
+            report["usage"] = self.resolve_usage(log_type, tier, usage, duration_hours)
+            variable = self._variable_items(log_type, tier, report["usage"])
+            for name, item, cost in variable:
+                report["line_items"][name] = item
+                report["costs"][name] = cost
+            report["variable_cost"] = sum(cost for _, _, cost in variable)
+        report["total_cost"] = sum(report["costs"].values())
+        entries = (usage or {}).get("entries_written")
+        if entries:
+            report["cost_per_1m_entries"] = report["total_cost"] / entries * 1_000_000
+        return report
+
+    def analyze_many(self, windows):
+        """Cost reports for many windows in one call.
+
+        Each window is a dict with log_type, start, end and optionally tier
+        (default "small") and usage, or a (log_type, tier, start, end) tuple.
+        """
+        reports = []
+        for w in windows:
+            if isinstance(w, dict):
+                reports.append(self.analyze(w["log_type"], w["start"], w["end"], w.get("tier", "small"),
+                                            w.get("usage")))
+            else:
+                log_type, tier, start, end = w
+                reports.append(self.analyze(log_type, start, end, tier))
+        return reports
+
+
+@functools.lru_cache(maxsize=None)
+def get_cost_model(path=COSTS_FILE):
+    """Load and validate costs.json once per process."""
+    with open(path, "r") as f:
+        return CostModel(json.load(f))
+
+
+def load_costs(tier="small"):
+    return get_cost_model().tier(tier)
 
-    report["cost_per_hour"] = cost_per_hour
-    report["total_cost"] = total_cost
 
-    return report
+def analyze_benchmark(project_id, start_time, end_time, log_type, tier="small", usage=None):
+    return get_cost_model().analyze(log_type, start_time, end_time, tier, usage)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--project_id", required=True)
-    parser.add_argument("--start", type=float, required=True, help="Unix timestamp")
-    parser.add_argument("--end", type=float, required=True, help="Unix timestamp")
-    parser.add_argument("--type", choices=["trillian", "tesseract"], required=True)
+    parser.add_argument("--project_id")
+    parser.add_argument("--start", type=float, help="Unix timestamp")
+    parser.add_argument("--end", type=float, help="Unix timestamp")
+    parser.add_argument("--type", choices=LOG_TYPES)
     parser.add_argument("--tier", default="small", help="Infrastructure tier (small/medium/large)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Price a JSON list of {log_type, tier, start, end[, usage]} windows ('-' for stdin)")
+    parser.add_argument("--entries", type=int, help="Entries written in the window (enables usage-based costs)")
+    parser.add_argument("--bytes_per_entry", type=float, help="Measured stored bytes per entry")
+    parser.add_argument("--class_a_ops", type=int, help="Measured GCS Class A operations")
+    parser.add_argument("--class_b_ops", type=int, help="Measured GCS Class B operations")
+    parser.add_argument("--egress_bytes", type=int, help="Measured egress bytes")
     args = parser.parse_args()
 
-    result = analyze_benchmark(args.project_id, args.start, args.end, args.type, args.tier)
-    print(json.dumps(result, indent=2))
+    try:
+        if args.batch:
+            with (sys.stdin if args.batch == "-" else open(args.batch)) as f:
+                windows = json.load(f)
+            print(json.dumps(get_cost_model().analyze_many(windows), indent=2))
+        else:
+            if args.project_id is None or args.start is None or args.end is None or args.type is None:
+                parser.error("--project_id, --start, --end and --type are required without --batch")
+            usage = None
+            if args.entries is not None:
+                usage = {"entries_written": args.entries, "bytes_per_entry": args.bytes_per_entry,
+                         "gcs_class_a_ops": args.class_a_ops, "gcs_class_b_ops": args.class_b_ops,
+                         "egress_bytes": args.egress_bytes}
+            result = analyze_benchmark(args.project_id, args.start, args.end, args.type, args.tier, usage)
+            print(json.dumps(result, indent=2))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,384 @@
+"""Native asyncio add-chain load generator.
+
+Posts pre-built add-chain bodies over a bounded pool of keep-alive HTTP/1.1
+connections. Requests are released by an open-loop token bucket: the send
+schedule is fixed by the target QPS, not by how fast the log responds, so a
+slow backend shows up as a growing in-flight count rather than a silently
+lower offered load.
+
+Bodies come either from the handful of testdata chains (repeats, which a
+deduplicating log won't integrate) or from a pre-signed corpus built by
+corpus.py, which supplies a unique certificate per request.
+"""
+
+import asyncio
+import collections
+import functools
+import glob
+import json
+import math
+import random
+import resource
+import time
+import urllib.parse
+
+from corpus import Corpus, corpus_path
+from histogram import LatencyHistogram
+
+ADD_CHAIN_PATHS = {
+    "trillian": "/benchmark/ct/v1/add-chain",
+    "tesseract": "/tesseract-benchmark/ct/v1/add-chain",
+}
+
+TESTDATA_CHAINS = {
+    "trillian": "testdata/trillian/leaf*.chain",
+    "tesseract": "testdata/tesseract/leaf*.chain",
+}
+
+
+def chain_payload(chain_file):
+    """Build a JSON add-chain body from a PEM chain file."""
+    with open(chain_file, "r") as f:
+        pem_data = f.read()
+    chain = []
+    for block in pem_data.split("-----BEGIN CERTIFICATE-----"):
+        if "-----END CERTIFICATE-----" in block:
+            content = block.split("-----END CERTIFICATE-----")[0].replace("\n", "").strip()
+            chain.append(content)
+    return json.dumps({"chain": chain}).encode()
+
+
+def load_testdata_payloads(target_type):
+    """Load add-chain bodies for every testdata leaf chain of a system.
+
+    These are fixed certificates, so a log that deduplicates submissions will
+    not grow its tree for repeats.
+    """
+    files = sorted(glob.glob(TESTDATA_CHAINS[target_type]))
+    if not files:
+        raise FileNotFoundError(f"No chain files matching {TESTDATA_CHAINS[target_type]}")
+    return [chain_payload(p) for p in files]
+
+
+class HTTPError(Exception):
+    """Raised when a response cannot be parsed as HTTP/1.1."""
+
+
+async def _read_response(reader):
+    """Read one HTTP/1.1 response. Returns (status, body, keep_alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise HTTPError("connection closed before response")
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+        raise HTTPError(f"malformed status line: {status_line[:80]!r}")
+    status = int(parts[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get(b"transfer-encoding", b"").lower() == b"chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # Trailers, terminated by an empty line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif b"content-length" in headers:
+        body = await reader.readexactly(int(headers[b"content-length"]))
+    else:
+        body = await reader.read()
+        return status, body, False
+
+    keep_alive = headers.get(b"connection", b"").lower() != b"close"
+    return status, body, keep_alive
+
+
+class ConnectionPool:
+    """A bounded pool of keep-alive HTTP/1.1 connections to one host.
+
+    At most `size` connections are open at once; callers beyond that queue
+    for the next free connection. Idle connections are reused LIFO so a
+    lightly loaded pool keeps a small, warm working set.
+    """
+
+    def __init__(self, host, port, size, timeout=30, ssl=None, headers=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.ssl = ssl
+        self.headers = "".join(f"{k}: {v}\r\n" for k, v in (headers or {}).items())
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+        self.opened = 0
+
+    async def _connect(self):
+        self.opened += 1
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+
+    async def request(self, method, path, body=b"", content_type="application/json"):
+        """Send one request and return (status, body)."""
+        head = (f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                f"{self.headers}"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"\r\n").encode()
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await self._connect()
+            reader, writer = conn
+            try:
+                # Written separately so corpus bodies (memoryviews into the
+                # mmap) go to the socket without being copied.
+                writer.write(head)
+                writer.write(body)
+                status, resp_body, keep_alive = await asyncio.wait_for(
+                    _read_response(reader), self.timeout)
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive:
+                self._idle.append(conn)
+            else:
+                writer.close()
+            return status, resp_body
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+def _error_class(exc):
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(exc, (ConnectionRefusedError, ConnectionResetError, BrokenPipeError)):
+        return "connection_error"
+    if isinstance(exc, (asyncio.IncompleteReadError, HTTPError)):
+        return "protocol_error"
+    return type(exc).__name__
+
+
+class LoadStats:
+    """Counters collected by the native driver during a run."""
+
+    def __init__(self):
+        self.sent = 0
+        self.completed = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.throttled = 0
+        self.duplicates = 0
+        self.status_counts = collections.Counter()
+        self.latency = LatencyHistogram()
+
+    def as_dict(self, elapsed):
+        ok = self.status_counts.get("200", 0)
+        return {
+            "requests_sent": self.sent,
+            "requests_completed": self.completed,
+            "requests_ok": ok,
+            "request_qps": round(self.sent / elapsed, 2) if elapsed > 0 else 0,
+            "ok_qps": round(ok / elapsed, 2) if elapsed > 0 else 0,
+            "peak_in_flight": self.peak_in_flight,
+            "throttled_sends": self.throttled,
+            "duplicate_sends": self.duplicates,
+            "status_counts": dict(sorted(self.status_counts.items())),
+            "submit_latency_ms": self.latency.summary_ms(),
+            "submit_latency_histogram": self.latency.to_dict(),
+        }
+
+
+async def _send_one(pool, path, body, stats, in_flight, scheduled, on_accept=None):
+    try:
+        status, _ = await pool.request("POST", path, body)
+        stats.status_counts[str(status)] += 1
+        if status == 200:
+            stats.latency.record(time.monotonic() - scheduled)
+            if on_accept:
+                on_accept()
+    except asyncio.CancelledError:
+        stats.status_counts["abandoned"] += 1
+        raise
+    except Exception as e:
+        stats.status_counts[_error_class(e)] += 1
+    finally:
+        stats.completed += 1
+        stats.in_flight -= 1
+        in_flight.release()
+
+
+async def open_loop(launch, qps, duration_seconds, max_in_flight, stats, stop=None, timeout=30):
+    """Release requests on an open-loop token-bucket schedule.
+
+    Tokens accrue at `qps` per second with a burst of 1/10th of a second's
+    worth, so a late event-loop wakeup catches up without a thundering herd.
+    `qps` may also be a function of the seconds elapsed, for shaped
+    schedules (see workload.py). When `max_in_flight` requests are
+    outstanding the scheduler waits for a slot and counts the send as
+    throttled. launch(in_flight, scheduled) returns the coroutine for one
+    request, which must release in_flight when done. Setting `stop` (a
+    threading.Event) ends the schedule before the deadline. Requests still
+    outstanding `timeout` seconds after the schedule ends are cancelled, so
+    launch's coroutine must count a CancelledError (as "abandoned") for the
+    status counts to add up to stats.sent. Returns the elapsed time.
+    """
+    rate = qps if callable(qps) else (lambda elapsed: qps)
+    in_flight = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+    tokens = 1.0
+    start = last = time.monotonic()
+    deadline = start + duration_seconds
+
+    while True:
+        now = time.monotonic()
+        if now >= deadline or (stop is not None and stop.is_set()):
+            break
+        current = rate(now - start)
+        burst = max(1.0, current / 10.0)
+        # Shaped schedules wake at least every 100ms to follow rate changes.
+        tick = max(0.001, 1.0 / current) if current > 0 else 0.1
+        if callable(qps):
+            tick = min(tick, 0.1)
+        tokens = min(burst, tokens + (now - last) * current)
+        last = now
+        while tokens >= 1.0:
+            if in_flight.locked():
+                stats.throttled += 1
+            await in_flight.acquire()
+            tokens -= 1.0
+            stats.sent += 1
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            task = asyncio.create_task(launch(in_flight, time.monotonic()))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.sleep(tick)
+
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return time.monotonic() - start
+
+
+async def drive(pool, path, payloads, qps, duration_seconds, max_in_flight, stats, on_submit=None, stop=None,
+                dup_chance=0.0):
+    """Release add-chain requests on an open-loop schedule (see open_loop).
+
+    Submission latency is measured from the moment a request is released,
+    including any wait for a pooled connection, so a saturated pool shows up
+    in the latency tail instead of being hidden (coordinated omission).
+    With `dup_chance`, that fraction of requests resubmit an earlier body,
+    as a CA retrying a submission would. on_submit(wall_time) is called,
+    with the time it was sent, for each request the log accepts (200),
+    except those resubmits: the log deduplicates them, so they add no
+    entry to time.
+    """
+    index = 0
+    rng = random.Random(0)
+
+    def launch(in_flight, scheduled):
+        nonlocal index
+        dup = bool(index and dup_chance and rng.random() < dup_chance)
+        if dup:
+            body = payloads[rng.randrange(index) % len(payloads)]
+            stats.duplicates += 1
+        else:
+            body = payloads[index % len(payloads)]
+            index += 1
+        on_accept = functools.partial(on_submit, time.time()) if on_submit and not dup else None
+        return _send_one(pool, path, body, stats, in_flight, scheduled, on_accept)
+
+    return await open_loop(launch, qps, duration_seconds, max_in_flight, stats, stop, pool.timeout)
+
+
+def _raise_fd_limit(wanted):
+    """Raise the soft open-file limit so large connection pools can open."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+    if soft != resource.RLIM_INFINITY and soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def run_native(target_type, ip, qps, duration_seconds, payloads=None,
+               connections=None, max_in_flight=8192, timeout=30, on_submit=None,
+               corpus_dir=None, stop=None, dup_chance=0.0, peak_qps=None):
+    """Drive add-chain load against one system and return driver stats.
+
+    `ip` may carry a port ("10.0.0.1:8080"). When `connections` is None the
+    pool is sized like the TesseraCT hammer's writers (qps * 5) so blocking
+    publication-awaiting writes don't starve the schedule. `qps` may be a
+    function of elapsed seconds (see open_loop); sizing then uses
+    `peak_qps`.
+
+    With `corpus_dir`, bodies are taken from the system's corpus file
+    starting at its cursor, and the cursor is advanced past every body sent.
+    """
+    if peak_qps is None:
+        peak_qps = qps
+    peak_qps = int(math.ceil(peak_qps))
+    corpus = None
+    if corpus_dir:
+        corpus = Corpus.unused(corpus_path(corpus_dir, target_type))
+        if not len(corpus):
+            corpus.close()
+            raise ValueError(f"Corpus {corpus.path} is used up; rebuild it with scripts/corpus.py")
+        needed = int(peak_qps * duration_seconds)
+        if len(corpus) < needed:
+            print(f"⚠️  Corpus has {len(corpus)} unused chains but this run may send {needed}; "
+                  f"later requests will resubmit duplicates")
+        payloads = corpus
+    elif payloads is None:
+        payloads = load_testdata_payloads(target_type)
+    if connections is None:
+        connections = min(max(8, peak_qps * 5), max_in_flight)
+    parsed = urllib.parse.urlsplit(f"http://{ip}")
+    host, port = parsed.hostname, parsed.port or 80
+    path = ADD_CHAIN_PATHS[target_type]
+
+    _raise_fd_limit(connections + 256)
+    source = f"corpus {corpus.path} from #{corpus.start}" if corpus else "testdata"
+    shape = f"up to {peak_qps}" if callable(qps) else f"{qps}"
+    print(f"⚙️  Native driver: {shape} QPS open-loop, {connections} connections, "
+          f"{max_in_flight} max in flight, {len(payloads)} payloads ({source})")
+
+    async def _run():
+        pool = ConnectionPool(host, port, connections, timeout)
+        stats = LoadStats()
+        try:
+            elapsed = await drive(pool, path, payloads, qps, duration_seconds,
+                                  max_in_flight, stats, on_submit, stop, dup_chance)
+        finally:
+            pool.close()
+        result = stats.as_dict(elapsed)
+        result["connections_opened"] = pool.opened
+        return result
+
+    try:
+        result = asyncio.run(_run())
+    finally:
+        if corpus:
+            corpus.close()
+    if corpus:
+        result["corpus_cursor"] = corpus.advance(result["requests_sent"])
+    else:
+        # Fixed chains: a deduplicating log only grows for the first of each.
+        result["deduplicated_payloads"] = True
+    lat = result["submit_latency_ms"]
+    print(f"⚙️  Native driver done: {result['requests_sent']} sent, "
+          f"{result['requests_ok']} OK, statuses {result['status_counts']}, "
+          f"latency p50={lat['p50']}ms p99={lat['p99']}ms")
+    return result
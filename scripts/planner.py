@@ -0,0 +1,131 @@
+"""Budget-constrained sweep planning from costs.json.
+
+The whole stack (GKE, both backends) bills for as long as a sweep runs, so
+a sweep's cost is its wall time times the tier's combined hourly rate.
+plan_sweep turns a dollar or minute budget into a concrete plan:
+
+  * one warmup per system, shared by every level of the sweep;
+  * as many candidate QPS levels as fit at the minimum run duration,
+    chosen so the saturation bracket between adjacent levels is as narrow
+    as the budget allows;
+  * leftover budget spent on longer runs, up to the maximum duration.
+
+Levels run in ascending order. While executing, a system that has saturated
+at two consecutive levels skips its remaining higher levels (they only
+re-confirm saturation), and no run starts unless it fits in what is left.
+"""
+
+import math
+
+# Per-run wall time beyond the load itself: tree-size reads, draining
+# in-flight requests and the cost calculation.
+RUN_OVERHEAD_SECONDS = 40
+# Settle time after each warmup (see run_warmup) plus smoke tests.
+WARMUP_OVERHEAD_SECONDS = 5
+SMOKE_TEST_SECONDS = 10
+# Run durations are planned in steps of this many minutes.
+DURATION_STEP_MINUTES = 0.5
+# Consecutive saturated levels after which a system's higher levels are skipped.
+SATURATED_LEVELS_TO_SKIP = 2
+
+
+def infra_hourly(tier_costs):
+    """Hourly cost of everything deployed for a tier while a sweep runs."""
+    return tier_costs["shared"]["total_hourly"] + sum(
+        tier_costs[system]["dedicated_hourly"] for system in ("trillian", "tesseract"))
+
+
+def select_levels(candidates, n):
+    """Pick n of the candidates, keeping both ends, with the narrowest brackets.
+
+    Greedily drops the interior level whose neighbours are closest (by
+    ratio), so the widest gap between adjacent kept levels grows as little
+    as possible.
+    """
+    levels = sorted(set(candidates))
+    if n == 1:
+        return levels[-1:]
+    while len(levels) > max(n, 2):
+        i = min(range(1, len(levels) - 1), key=lambda i: levels[i + 1] / levels[i - 1])
+        del levels[i]
+    return levels
+
+
+def max_bracket_ratio(levels):
+    """Largest ratio between adjacent levels: the worst-case saturation bracket."""
+    return max((b / a for a, b in zip(levels, levels[1:])), default=None)
+
+
+def plan_sweep(tier_costs, candidates, systems, budget_usd=None, budget_minutes=None,
+               min_run_minutes=1.0, max_run_minutes=3.0, warmup_seconds=60):
+    """Fit a sweep into a budget. Raises ValueError if not even one level fits.
+
+    Returns a dict describing the plan; see format_plan.
+    """
+    hourly = infra_hourly(tier_costs)
+    per_minute = hourly / 60.0
+    limits = []
+    if budget_usd is not None:
+        limits.append(budget_usd / per_minute)
+    if budget_minutes is not None:
+        limits.append(budget_minutes)
+    if not limits:
+        raise ValueError("a dollar or minute budget is required")
+    budget = min(limits)
+
+    fixed = SMOKE_TEST_SECONDS / 60.0
+    if warmup_seconds > 0:
+        fixed += len(systems) * (warmup_seconds + WARMUP_OVERHEAD_SECONDS) / 60.0
+    overhead = RUN_OVERHEAD_SECONDS / 60.0
+    available = budget - fixed
+
+    def run_cost(minutes):
+        return len(systems) * (minutes + overhead)
+
+    n = min(len(set(candidates)), int(available // run_cost(min_run_minutes)))
+    if n < 1:
+        needed = fixed + run_cost(min_run_minutes)
+        raise ValueError(f"budget covers {budget:.1f} min but one level needs {needed:.1f} min "
+                         f"(${needed * per_minute:.2f})")
+
+    # Spend what's left on longer runs, in whole steps.
+    run_minutes = available / n / len(systems) - overhead
+    run_minutes = math.floor(run_minutes / DURATION_STEP_MINUTES) * DURATION_STEP_MINUTES
+    run_minutes = max(min_run_minutes, min(max_run_minutes, run_minutes))
+
+    levels = select_levels(candidates, n)
+    minutes = fixed + len(levels) * run_cost(run_minutes)
+    return {
+        "systems": list(systems),
+        "levels": levels,
+        "skipped_levels": sorted(set(candidates) - set(levels)),
+        "run_minutes": run_minutes,
+        "warmup_seconds": warmup_seconds,
+        "runs": [(qps, system) for qps in levels for system in systems],
+        "hourly_rate": round(hourly, 4),
+        "budget_minutes": round(budget, 1),
+        "projected_minutes": round(minutes, 1),
+        "projected_cost": round(minutes * per_minute, 2),
+        "max_bracket_ratio": max_bracket_ratio(levels),
+    }
+
+
+def run_minutes_cost(plan, minutes):
+    """Dollar cost of `minutes` of sweep wall time under a plan's rate."""
+    return minutes * plan["hourly_rate"] / 60.0
+
+
+def format_plan(plan):
+    """Render a plan as printable lines."""
+    lines = []
+    lines.append(f"Budget: {plan['budget_minutes']} min at ${plan['hourly_rate']:.4f}/hr")
+    if plan["warmup_seconds"] > 0:
+        lines.append(f"Warmup: {plan['warmup_seconds']}s per system, once, shared by all levels")
+    lines.append(f"Levels: {', '.join(str(q) for q in plan['levels'])} QPS "
+                 f"({plan['run_minutes']:g} min per run, {len(plan['runs'])} runs)")
+    if plan["skipped_levels"]:
+        lines.append(f"Dropped for budget: {', '.join(str(q) for q in plan['skipped_levels'])} QPS")
+    if plan["max_bracket_ratio"]:
+        lines.append(f"Worst saturation bracket: {plan['max_bracket_ratio']:.2f}x between adjacent levels")
+    lines.append(f"Projected: {plan['projected_minutes']} min, ${plan['projected_cost']:.2f}")
+    return lines
@@ -0,0 +1,262 @@
+"""Sample per-pod CPU and memory during a run and derive efficiency figures.
+
+A tier's node count and machine type fix what we pay for; they say nothing
+about how much of it a stack uses. PodUsageSampler polls a usage source
+every `interval` seconds in a background thread and records each pod's CPU
+(cores) and memory (working-set bytes). totals() folds the series into
+vCPU-seconds, mean and peak vCPUs and memory, and efficiency() relates them
+to the work done and to the capacity the tier provisions for the system:
+
+    <unit>_per_vcpu_second       writes (or reads) per vCPU-second used
+    cpu_utilization              mean vCPUs / the system's share of node vCPUs
+    memory_utilization           mean memory / its share of node memory
+    cost_per_1m_at_utilization   $/1M with the node cost scaled down to the
+                                 larger of the two utilizations
+
+Sources return what the Kubernetes metrics API (`kubectl top pod`) reports:
+KubectlSource reads it with `kubectl get --raw`, HTTPSource from any server
+serving the same PodMetricsList JSON, which is how fake_log.py stands in
+for the cluster locally. The metrics API averages CPU over a window of
+10-60s, so intervals shorter than that only repeat values.
+"""
+
+import json
+import re
+import subprocess
+import threading
+import time
+
+from http_session import HTTPRequestError, HTTPSession
+
+METRICS_API_PATH = "/apis/metrics.k8s.io/v1beta1/namespaces/{namespace}/pods"
+
+# Namespace each system's pods run in.
+NAMESPACES = {
+    "trillian": "trillian",
+    "tesseract": "tesseract",
+}
+
+LOCAL_PREFIXES = {
+    "trillian": "/benchmark",
+    "tesseract": "/tesseract-benchmark",
+}
+
+# metrics-server's default resolution; sampling faster only repeats values.
+DEFAULT_INTERVAL = 15
+
+MIB = 2 ** 20
+GIB = 2 ** 30
+
+_SUFFIXES = {
+    "n": 1e-9, "u": 1e-6, "m": 1e-3, "": 1.0,
+    "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12,
+    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40,
+}
+_QUANTITY = re.compile(r"^([0-9.]+(?:[eE][-+]?[0-9]+)?)([a-zA-Z]*)$")
+
+
+def parse_quantity(value):
+    """Kubernetes resource quantity ("250m", "123456789n", "512Mi", "1.5Gi") as a float."""
+    match = _QUANTITY.match(str(value).strip())
+    if not match or match.group(2) not in _SUFFIXES:
+        raise ValueError(f"not a resource quantity: {value!r}")
+    return float(match.group(1)) * _SUFFIXES[match.group(2)]
+
+
+def parse_pod_metrics(data):
+    """{pod: {"cpu": cores, "memory": bytes}} from a metrics API PodMetricsList, summed over containers."""
+    pods = {}
+    for item in data.get("items", []):
+        cpu = memory = 0.0
+        for container in item.get("containers", []):
+            usage = container.get("usage", {})
+            cpu += parse_quantity(usage.get("cpu", "0"))
+            memory += parse_quantity(usage.get("memory", "0"))
+        pods[item["metadata"]["name"]] = {"cpu": cpu, "memory": memory}
+    return pods
+
+
+class KubectlSource:
+    """Pod usage in one namespace from the cluster's metrics API, via kubectl."""
+
+    def __init__(self, namespace, timeout=10):
+        self.namespace = namespace
+        self.timeout = timeout
+
+    def sample(self):
+        """Return {pod: {"cpu", "memory"}}. Raises OSError if kubectl or the metrics API fails."""
+        path = METRICS_API_PATH.format(namespace=self.namespace)
+        try:
+            proc = subprocess.run(["kubectl", "get", "--raw", path], capture_output=True, text=True,
+                                  timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            raise OSError(f"kubectl get --raw {path} timed out")
+        if proc.returncode != 0:
+            raise OSError(proc.stderr.strip() or f"kubectl exited with {proc.returncode}")
+        try:
+            return parse_pod_metrics(json.loads(proc.stdout))
+        except (ValueError, KeyError) as e:
+            raise OSError(f"unexpected metrics API response: {e}")
+
+
+class HTTPSource:
+    """Pod usage from an HTTP server speaking the metrics API (fake_log.py locally)."""
+
+    def __init__(self, base_url, namespace, session=None):
+        self.url = base_url.rstrip("/") + METRICS_API_PATH.format(namespace=namespace)
+        self.session = session or HTTPSession(timeout=5, retries=0)
+
+    def sample(self):
+        """Return {pod: {"cpu", "memory"}}. Raises OSError on a failed or malformed response."""
+        try:
+            return parse_pod_metrics(json.loads(self.session.get(self.url)))
+        except HTTPRequestError as e:
+            raise OSError(str(e))
+        except (ValueError, KeyError) as e:
+            raise OSError(f"unexpected metrics API response: {e}")
+
+
+class PodUsageSampler:
+    """Sample a source every `interval` seconds in a daemon thread.
+
+    stop() returns {"interval", "samples", "errors", "series": [{"t", "dt",
+    "cpu", "memory", "pods"}]}: t in seconds since start()'s t0, dt the
+    stretch of the run each sample stands for, cpu and memory totals over
+    the pods.
+    """
+
+    def __init__(self, source, interval=DEFAULT_INTERVAL):
+        self.source = source
+        self.interval = interval
+        self.t0 = None
+        self._last_t = None
+        self._series = []
+        self._samples = 0
+        self._errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self):
+        """Take one sample and add it to the series."""
+        try:
+            pods = self.source.sample()
+        except OSError:
+            self._errors += 1
+            return
+        now = time.time()
+        self._samples += 1
+        self._series.append({
+            "t": round(now - self.t0, 2),
+            "dt": round(now - self._last_t, 2),
+            "cpu": round(sum(p["cpu"] for p in pods.values()), 4),
+            "memory": int(sum(p["memory"] for p in pods.values())),
+            "pods": {name: {"cpu": round(p["cpu"], 4), "memory": int(p["memory"])}
+                     for name, p in sorted(pods.items())},
+        })
+        self._last_t = now
+
+    def _run(self):
+        next_tick = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, next_tick - time.monotonic())):
+            self.sample()
+            next_tick += self.interval
+
+    def start(self, t0=None):
+        """Start sampling; t0 is the run's start time."""
+        self.t0 = self._last_t = t0 if t0 is not None else time.time()
+        try:
+            # Discarded: it covers the time before the run, and resets the
+            # fake log's CPU window.
+            self.source.sample()
+        except OSError:
+            pass
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling, take a final sample, and return the series."""
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        return {"interval": self.interval, "samples": self._samples, "errors": self._errors,
+                "series": self._series}
+
+
+def totals(usage):
+    """Run totals of a sampler's series, or None without samples.
+
+    CPU is integrated over the run as vCPU-seconds; means are weighted by
+    each sample's dt.
+    """
+    series = [p for p in usage["series"] if p["dt"] > 0]
+    if not series:
+        return None
+    seconds = sum(p["dt"] for p in series)
+    vcpu_seconds = sum(p["cpu"] * p["dt"] for p in series)
+    pods = {}
+    for p in series:
+        for name, pod in p["pods"].items():
+            acc = pods.setdefault(name, {"cpu": 0.0, "memory": 0.0, "seconds": 0.0})
+            acc["cpu"] += pod["cpu"] * p["dt"]
+            acc["memory"] += pod["memory"] * p["dt"]
+            acc["seconds"] += p["dt"]
+    return {
+        "vcpu_seconds": round(vcpu_seconds, 2),
+        "mean_vcpus": round(vcpu_seconds / seconds, 4),
+        "peak_vcpus": round(max(p["cpu"] for p in series), 4),
+        "mean_memory_mib": round(sum(p["memory"] * p["dt"] for p in series) / seconds / MIB, 1),
+        "peak_memory_mib": round(max(p["memory"] for p in series) / MIB, 1),
+        "pods": {name: {"mean_vcpus": round(acc["cpu"] / acc["seconds"], 4),
+                        "mean_memory_mib": round(acc["memory"] / acc["seconds"] / MIB, 1)}
+                 for name, acc in sorted(pods.items())},
+    }
+
+
+def provisioned(tier_costs, machine_specs):
+    """The system's share of the tier's node capacity: {"vcpus", "memory_gib"}, or None.
+
+    Nodes are shared 50/50 between the systems, as in the cost model.
+    """
+    nodes = tier_costs.get("shared", {}).get("gke_nodes", {})
+    machine = nodes.get("machine_type", tier_costs.get("gke_machine_type"))
+    count = nodes.get("count", tier_costs.get("gke_node_count"))
+    specs = machine_specs.get(machine)
+    if not specs or not count:
+        return None
+    return {"machine_type": machine, "nodes": count, "vcpus": specs["vcpus"] * count / 2.0,
+            "memory_gib": specs["ram_gb"] * count / 2.0}
+
+
+def efficiency(usage_totals, capacity, requests, unit, cost_per_hour, node_cost_per_hour, achieved_qps):
+    """Efficiency of one run: work per vCPU-second, utilization and $/1M at that utilization.
+
+    cost_per_hour is the run's full rate (fixed plus usage); node_cost_per_hour
+    the part of it that is the system's share of GKE nodes. At actual
+    utilization that share shrinks to the larger of CPU and memory
+    utilization, as if the tier were sized to what the run used.
+    """
+    result = {f"{unit}_per_vcpu_second": round(requests / usage_totals["vcpu_seconds"], 2)
+              if usage_totals["vcpu_seconds"] > 0 else None}
+    if capacity is None:
+        return result
+    cpu = usage_totals["mean_vcpus"] / capacity["vcpus"]
+    memory = usage_totals["mean_memory_mib"] * MIB / (capacity["memory_gib"] * GIB)
+    used = min(1.0, max(cpu, memory))
+    result.update({
+        "provisioned": capacity,
+        "cpu_utilization": round(cpu, 4),
+        "memory_utilization": round(memory, 4),
+        "idle_node_cost_per_hour": round(node_cost_per_hour * (1 - used), 4),
+    })
+    if achieved_qps > 0:
+        right_sized = cost_per_hour - node_cost_per_hour * (1 - used)
+        result["cost_per_1m_provisioned"] = round(cost_per_hour / (achieved_qps * 3600) * 1_000_000, 4)
+        result["cost_per_1m_at_utilization"] = round(right_sized / (achieved_qps * 3600) * 1_000_000, 4)
+    return result
+
+
+def open_sources(systems, local_log=None):
+    """A usage source per system: fake_log.py's metrics API locally, kubectl in the cluster."""
+    if local_log:
+        return {s: HTTPSource(f"http://{local_log}{LOCAL_PREFIXES[s]}", NAMESPACES[s]) for s in systems}
+    return {s: KubectlSource(NAMESPACES[s]) for s in systems}
@@ -0,0 +1,224 @@
+"""Read-path load generator: what monitors and auditors do to a log.
+
+Reuses the native driver's keep-alive pool and open-loop scheduler to issue
+two kinds of reads against a log of a known tree size:
+
+    sequential  walk the log from the start, a batch at a time, the way a
+                monitor downloads every entry: get-entries on Trillian,
+                entry bundles (tile/data/...) on TesseraCT
+    random      the reads an auditor makes for arbitrary positions:
+                get-sth-consistency from a random earlier size on
+                Trillian; the tile on a random level of a random leaf's
+                Merkle path, or its entry bundle, on TesseraCT
+
+Servers cap get-entries responses (CTFE's --max_get_entries, fake_log's
+--get_entries_max), so entries are counted from each response and the
+entries a capped response left out are requested again before the walk
+moves on.
+
+--read_mix is the fraction of random reads. Trillian serves every read from
+MySQL through the CTFE; TesseraCT's tiles and bundles are static objects
+fetched from the bucket, so the two read paths cost very different things.
+"""
+
+import asyncio
+import collections
+import random
+import ssl
+import time
+import urllib.parse
+
+from native_driver import ConnectionPool, LoadStats, _error_class, _raise_fd_limit, open_loop
+
+READ_PREFIXES = {
+    "trillian": "/benchmark",
+    "tesseract": "/tesseract-benchmark",
+}
+
+# tlog-tiles geometry: 2^8 hashes or entries per tile.
+TILE_HEIGHT = 8
+TILE_WIDTH = 1 << TILE_HEIGHT
+# Bytes of one Merkle tile hash.
+HASH_SIZE = 32
+
+
+def tile_index(index):
+    """Encode a tile index as tlog-tiles path segments ("x001/x234/067")."""
+    digits = f"{index:d}"
+    digits = "0" * (-len(digits) % 3) + digits
+    groups = [digits[i:i + 3] for i in range(0, len(digits), 3)]
+    return "/".join([f"x{g}" for g in groups[:-1]] + [groups[-1]])
+
+
+def tile_path(level, index, tree_size):
+    """Path of the tile (or entry bundle, level None) holding `index`'s node.
+
+    Tiles on the right edge of the tree are partial and carry their width
+    (".p/<W>"). Returns None if the tile doesn't exist yet.
+    """
+    height = TILE_HEIGHT * (level or 0)
+    nodes = tree_size >> height
+    tile = (index >> height) // TILE_WIDTH
+    width = min(TILE_WIDTH, nodes - tile * TILE_WIDTH)
+    if width <= 0:
+        return None
+    path = f"tile/{'data' if level is None else level}/{tile_index(tile)}"
+    return path if width == TILE_WIDTH else f"{path}.p/{width}"
+
+
+class ReadPlan:
+    """Chooses each read for one system: a sequential walk mixed with random reads."""
+
+    def __init__(self, target_type, tree_size, read_mix=0.5, batch=TILE_WIDTH, seed=0):
+        if tree_size <= 0:
+            raise ValueError("read benchmarks need a non-empty tree")
+        self.target_type = target_type
+        self.tree_size = tree_size
+        self.read_mix = read_mix
+        self.batch = batch
+        self.cursor = 0
+        # Ranges a capped get-entries response didn't return, read next.
+        self.gaps = collections.deque()
+        self.rng = random.Random(seed)
+        # Highest tile level with at least one node.
+        self.levels = max(0, (tree_size.bit_length() - 1) // TILE_HEIGHT)
+
+    def next(self):
+        """Return (kind, path, entries, start) for the next read.
+
+        `entries` is how many entries the read should return; `start` is the
+        first entry's index for get-entries reads (whose responses may be
+        capped, see short_read) and None otherwise.
+        """
+        if self.rng.random() < self.read_mix:
+            return self._random() + (None,)
+        if self.gaps:
+            start, end = self.gaps.popleft()
+            return "sequential", f"/ct/v1/get-entries?start={start}&end={end}", end - start + 1, start
+        start = self.cursor
+        if self.target_type == "trillian":
+            end = min(start + self.batch, self.tree_size) - 1
+            path = f"/ct/v1/get-entries?start={start}&end={end}"
+        else:
+            path = "/" + tile_path(None, start, self.tree_size)
+            end = min(start - start % TILE_WIDTH + TILE_WIDTH, self.tree_size) - 1
+        self.cursor = end + 1 if end + 1 < self.tree_size else 0
+        return "sequential", path, end - start + 1, start if self.target_type == "trillian" else None
+
+    def short_read(self, start, requested, returned):
+        """Queue the entries a capped get-entries response left out."""
+        if 0 < returned < requested:
+            self.gaps.append((start + returned, start + requested - 1))
+
+    def _random(self):
+        leaf = self.rng.randrange(self.tree_size)
+        if self.target_type == "trillian":
+            first = max(1, leaf)
+            return "random", f"/ct/v1/get-sth-consistency?first={first}&second={self.tree_size}", 0
+        level = self.rng.randint(-1, self.levels)
+        if level < 0:
+            bundle = leaf - leaf % TILE_WIDTH
+            entries = min(TILE_WIDTH, self.tree_size - bundle)
+            return "random", "/" + tile_path(None, leaf, self.tree_size), entries
+        # Leaves past the last complete node on this level have no tile there
+        # yet (e.g. leaf 65599 at level 1 of a 65600-entry tree); pick among
+        # the leaves that do.
+        covered = (self.tree_size >> (TILE_HEIGHT * level)) << (TILE_HEIGHT * level)
+        if leaf >= covered:
+            leaf = self.rng.randrange(covered)
+        return "random", "/" + tile_path(level, leaf, self.tree_size), 0
+
+
+class ReadStats(LoadStats):
+    """LoadStats plus the bytes and entries the reads returned."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_received = 0
+        self.entries_read = 0
+        self.kinds = {"sequential": 0, "random": 0}
+
+    def as_dict(self, elapsed):
+        result = super().as_dict(elapsed)
+        result["read_latency_ms"] = result.pop("submit_latency_ms")
+        result["read_latency_histogram"] = result.pop("submit_latency_histogram")
+        result["bytes_received"] = self.bytes_received
+        result["bytes_per_second"] = round(self.bytes_received / elapsed, 1) if elapsed > 0 else 0
+        result["entries_read"] = self.entries_read
+        result["reads_by_kind"] = dict(self.kinds)
+        return result
+
+
+async def _read_one(pool, plan, path, entries, start, stats, in_flight, scheduled):
+    try:
+        status, body = await pool.request("GET", path)
+        stats.status_counts[str(status)] += 1
+        if status == 200:
+            stats.latency.record(time.monotonic() - scheduled)
+            stats.bytes_received += len(body)
+            if start is not None:
+                # One leaf_input per entry; cheaper than decoding the JSON.
+                returned = body.count(b'"leaf_input"')
+                plan.short_read(start, entries, returned)
+                entries = returned
+            stats.entries_read += entries
+    except asyncio.CancelledError:
+        stats.status_counts["abandoned"] += 1
+        raise
+    except Exception as e:
+        stats.status_counts[_error_class(e)] += 1
+    finally:
+        stats.completed += 1
+        stats.in_flight -= 1
+        in_flight.release()
+
+
+def run_reads(target_type, base_url, tree_size, qps, duration_seconds, read_mix=0.5, batch=TILE_WIDTH,
+              connections=None, max_in_flight=8192, timeout=30, headers=None, seed=0, peak_qps=None):
+    """Drive reads against one system and return driver stats.
+
+    `base_url` is the log's read prefix, e.g. "http://10.0.0.1/benchmark" or
+    "https://storage.googleapis.com/<bucket>"; read paths are appended to
+    its path. `headers` (e.g. Authorization) are sent with every request.
+    `qps` may be a function of elapsed seconds, with `peak_qps` for sizing.
+    """
+    if peak_qps is None:
+        peak_qps = qps
+    plan = ReadPlan(target_type, tree_size, read_mix, batch, seed)
+    parsed = urllib.parse.urlsplit(base_url)
+    secure = parsed.scheme == "https"
+    host, port = parsed.hostname, parsed.port or (443 if secure else 80)
+    prefix = parsed.path.rstrip("/")
+    if connections is None:
+        connections = min(max(8, int(peak_qps)), max_in_flight)
+
+    _raise_fd_limit(connections + 256)
+    shape = f"up to {peak_qps:g}" if callable(qps) else f"{qps}"
+    print(f"📖 Read driver: {shape} QPS open-loop against {base_url}, tree size {tree_size}, "
+          f"{read_mix:.0%} random, {connections} connections")
+
+    async def _run():
+        pool = ConnectionPool(host, port, connections, timeout,
+                              ssl=ssl.create_default_context() if secure else None, headers=headers)
+        stats = ReadStats()
+
+        def launch(in_flight, scheduled):
+            kind, path, entries, start = plan.next()
+            stats.kinds[kind] += 1
+            return _read_one(pool, plan, prefix + path, entries, start, stats, in_flight, scheduled)
+
+        try:
+            elapsed = await open_loop(launch, qps, duration_seconds, max_in_flight, stats, timeout=timeout)
+        finally:
+            pool.close()
+        result = stats.as_dict(elapsed)
+        result["connections_opened"] = pool.opened
+        result["elapsed_seconds"] = round(elapsed, 1)
+        return result
+
+    result = asyncio.run(_run())
+    lat = result["read_latency_ms"]
+    print(f"📖 Read driver done: {result['requests_sent']} sent, {result['requests_ok']} OK, "
+          f"{result['bytes_per_second'] / 1e6:.2f} MB/s, statuses {result['status_counts']}, "
+          f"latency p50={lat['p50']}ms p99={lat['p99']}ms")
+    return result
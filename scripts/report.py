@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
-"""Generate a markdown benchmark report from benchmark_summary.json."""
+"""Generate a markdown benchmark report from benchmark_summary.json.
+
+With --db, the report is built from the results history instead: the
+latest run of each tier, a cross-tier comparison and recent history per
+QPS level. A read_benchmark_summary.json (benchmark.py --mode read) gets
+a read-path report, and a profile_benchmark_summary.json (--profile) a
+per-phase report.
+"""
 
 import argparse
 import json
 import sys
 
+from results_db import DEFAULT_PATH, ResultsDB
+
 
 def load_summary(path):
     with open(path, "r") as f:
@@ -20,6 +29,17 @@ def load_summary(path):
         sys.exit(1)
 
 
+# A level is saturated once achieved QPS falls below this fraction of target.
+SATURATION_RATIO = 0.9
+# Below this peak utilization (CPU or memory) a system's node share is flagged as over-provisioned.
+OVERPROVISIONED_UTILIZATION = 0.5
+
+
+def is_saturated(r):
+    """Return True if a result achieved less than 90% of its target QPS."""
+    return r["target_qps"] > 0 and r["achieved_qps"] < r["target_qps"] * SATURATION_RATIO
+
+
 def find_saturation(results, log_type):
     """Find the QPS level where achieved drops below 90% of target."""
     system_results = sorted(
@@ -27,7 +47,7 @@ def find_saturation(results, log_type):
         key=lambda r: r["target_qps"],
     )
     for r in system_results:
-        if r["target_qps"] > 0 and r["achieved_qps"] < r["target_qps"] * 0.9:
+        if is_saturated(r):
             return r["achieved_qps"]
     # No saturation detected
     if system_results:
@@ -66,6 +86,142 @@ def get_infra_label(results, tier):
     return tier_info.get(tier, {"sql": "unknown", "spanner": "unknown"})
 
 
+def format_steady(r):
+    """Format steady-state QPS for a result, or a dash if none was detected."""
+    if not r or r.get("steady_state_qps") is None:
+        return "—"
+    return f"{r['steady_state_qps']:.1f}"
+
+
+def format_ms(summary, key):
+    """Format one latency statistic in milliseconds, or a dash if missing."""
+    if not summary or summary.get(key) is None:
+        return "—"
+    return f"{summary[key]:.0f}"
+
+
+def generate_latency_table(results):
+    """Render submission and time-to-integration percentiles per QPS level."""
+    lines = []
+    lines.append("### Latency (ms)")
+    lines.append("")
+    lines.append("| Target QPS | System | Submit p50 | Submit p95 | Submit p99 | Submit max | Integrate p50 | Integrate p95 | Integrate p99 | Integrate max |")
+    lines.append("|---:|:---|---:|---:|---:|---:|---:|---:|---:|---:|")
+    for r in sorted(results, key=lambda r: (r["target_qps"], r["log_type"] != "trillian")):
+        sub = r.get("submit_latency_ms")
+        integ = r.get("integration_latency_ms")
+        if not sub and not integ:
+            continue
+        system = "Trillian" if r["log_type"] == "trillian" else "TesseraCT"
+        cells = [format_ms(sub, k) for k in ("p50", "p95", "p99", "max")]
+        cells += [format_ms(integ, k) for k in ("p50", "p95", "p99", "max")]
+        lines.append(f"| {r['target_qps']} | {system} | " + " | ".join(cells) + " |")
+    lines.append("")
+    return lines
+
+
+def format_interval(ci, fmt):
+    """Format a CI metric as "lo – hi", or a dash if missing."""
+    if not ci or ci.get("lo") is None:
+        return "—"
+    return f"{fmt.format(ci['lo'])} – {fmt.format(ci['hi'])}"
+
+
+def generate_ci_table(results):
+    """Render bootstrap confidence intervals for levels run as repeated trials."""
+    confidence = next(r["ci"]["confidence"] for r in results if r.get("ci"))
+    lines = []
+    lines.append(f"### Confidence Intervals ({confidence:.0%}, bootstrap)")
+    lines.append("")
+    lines.append("| Target QPS | System | Trials | Achieved QPS | QPS CI | $/1M | $/1M CI | Converged |")
+    lines.append("|---:|:---|---:|---:|:---|---:|:---|:---|")
+    for r in sorted(results, key=lambda r: (r["target_qps"], r["log_type"] != "trillian")):
+        ci = r.get("ci")
+        if not ci:
+            continue
+        system = "Trillian" if r["log_type"] == "trillian" else "TesseraCT"
+        cost = f"${r['cost_per_1m_entries']:.2f}" if r["cost_per_1m_entries"] > 0 else "—"
+        converged = "yes" if ci.get("converged") else ("no" if ci.get("target") is not None else "—")
+        lines.append(f"| {r['target_qps']} | {system} | {ci['trials']} | {r['achieved_qps']:.1f} | "
+                     f"{format_interval(ci['achieved_qps'], '{:.1f}')} | {cost} | "
+                     f"{format_interval(ci['cost_per_1m_entries'], '${:.2f}')} | {converged} |")
+    lines.append("")
+    return lines
+
+
+def generate_cost_breakdown_table(results):
+    """Render fixed vs usage-based cost per hour for each run."""
+    lines = []
+    lines.append("### Cost Breakdown ($/hr)")
+    lines.append("")
+    lines.append("| Target QPS | System | Fixed | Storage | GCS Ops | Egress | Total | $/1M |")
+    lines.append("|---:|:---|---:|---:|---:|---:|---:|---:|")
+    for r in sorted(results, key=lambda r: (r["target_qps"], r["log_type"] != "trillian")):
+        variable = r.get("variable_costs")
+        if variable is None:
+            continue
+        system = "Trillian" if r["log_type"] == "trillian" else "TesseraCT"
+        hours = r["elapsed_seconds"] / 3600 if r.get("elapsed_seconds") else 0
+        storage = variable.get("storage", 0)
+        ops = variable.get("gcs_class_a_ops", 0) + variable.get("gcs_class_b_ops", 0)
+        egress = variable.get("egress", 0)
+        cells = [f"${v / hours:.4f}" if hours and v else "—" for v in (storage, ops, egress)]
+        total = r["cost_per_hour"] + r.get("variable_cost_per_hour", 0)
+        cost = f"${r['cost_per_1m_entries']:.2f}" if r["cost_per_1m_entries"] > 0 else "—"
+        lines.append(f"| {r['target_qps']} | {system} | ${r['cost_per_hour']:.4f} | " + " | ".join(cells) +
+                     f" | ${total:.4f} | {cost} |")
+    lines.append("")
+    return lines
+
+
+def generate_server_metrics_table(results):
+    """Render run averages of scraped server metrics: totals, unlabelled series and p99s."""
+    lines = []
+    lines.append("### Server Metrics (run averages)")
+    lines.append("")
+    lines.append("| Target QPS | System | Component | Metric | Value |")
+    lines.append("|---:|:---|:---|:---|---:|")
+    for r in sorted(results, key=lambda r: (r["target_qps"], r["log_type"] != "trillian")):
+        summary = (r.get("server_metrics") or {}).get("summary") or {}
+        system = "Trillian" if r["log_type"] == "trillian" else "TesseraCT"
+        for component, metrics in summary.items():
+            for key, value in metrics.items():
+                if "{" in key and not key.endswith(":p99"):
+                    continue
+                lines.append(f"| {r['target_qps']} | {system} | {component} | `{key}` | {value:g} |")
+    lines.append("")
+    return lines
+
+
+def format_pct(value):
+    return f"{value:.0%}" if value is not None else "—"
+
+
+def generate_efficiency_table(results, unit="writes"):
+    """Render pod CPU/memory use against the tier's capacity, and $/1M at that utilization."""
+    lines = []
+    lines.append("### Resource Efficiency")
+    lines.append("")
+    lines.append(f"| Target QPS | System | vCPUs (mean / peak) | CPU util | Memory MiB (peak) | Memory util | "
+                 f"{unit.capitalize()}/vCPU-s | $/1M provisioned | $/1M at utilization |")
+    lines.append("|---:|:---|---:|---:|---:|---:|---:|---:|---:|")
+    for r in sorted(results, key=lambda r: (r["target_qps"], r["log_type"] != "trillian")):
+        eff = r.get("efficiency")
+        if not eff:
+            continue
+        usage = r["pod_usage"]["totals"]
+        system = "Trillian" if r["log_type"] == "trillian" else "TesseraCT"
+        per_vcpu = eff.get(f"{unit}_per_vcpu_second")
+        provisioned = f"${eff['cost_per_1m_provisioned']:.2f}" if "cost_per_1m_provisioned" in eff else "—"
+        actual = f"${eff['cost_per_1m_at_utilization']:.2f}" if "cost_per_1m_at_utilization" in eff else "—"
+        lines.append(f"| {r['target_qps']} | {system} | {usage['mean_vcpus']:.2f} / {usage['peak_vcpus']:.2f} | "
+                     f"{format_pct(eff.get('cpu_utilization'))} | {usage['peak_memory_mib']:.0f} | "
+                     f"{format_pct(eff.get('memory_utilization'))} | "
+                     f"{f'{per_vcpu:.1f}' if per_vcpu is not None else '—'} | {provisioned} | {actual} |")
+    lines.append("")
+    return lines
+
+
 def generate_report(tier, results):
     """Generate markdown report for a single tier."""
     lines = []
@@ -79,9 +235,16 @@ def generate_report(tier, results):
     trillian_by_qps = {r["target_qps"]: r for r in results if r["log_type"] == "trillian"}
     tesseract_by_qps = {r["target_qps"]: r for r in results if r["log_type"] == "tesseract"}
 
+    # Steady-state columns only appear when runs were sampled
+    has_steady = any(r.get("steady_state_qps") is not None for r in results)
+
     # Table header
-    lines.append("| Target QPS | Trillian QPS | TesseraCT QPS | Trillian $/1M | TesseraCT $/1M |")
-    lines.append("|---:|---:|---:|---:|---:|")
+    if has_steady:
+        lines.append("| Target QPS | Trillian QPS | Trillian Steady | TesseraCT QPS | TesseraCT Steady | Trillian $/1M | TesseraCT $/1M |")
+        lines.append("|---:|---:|---:|---:|---:|---:|---:|")
+    else:
+        lines.append("| Target QPS | Trillian QPS | TesseraCT QPS | Trillian $/1M | TesseraCT $/1M |")
+        lines.append("|---:|---:|---:|---:|---:|")
 
     for qps in qps_levels:
         tr = trillian_by_qps.get(qps)
@@ -90,9 +253,25 @@ def generate_report(tier, results):
         te_qps = f"{te['achieved_qps']:.1f}" if te else "—"
         tr_cost = f"${tr['cost_per_1m_entries']:.2f}" if tr and tr["cost_per_1m_entries"] > 0 else "—"
         te_cost = f"${te['cost_per_1m_entries']:.2f}" if te and te["cost_per_1m_entries"] > 0 else "—"
-        lines.append(f"| {qps} | {tr_qps} | {te_qps} | {tr_cost} | {te_cost} |")
+        if has_steady:
+            tr_steady = format_steady(tr)
+            te_steady = format_steady(te)
+            lines.append(f"| {qps} | {tr_qps} | {tr_steady} | {te_qps} | {te_steady} | {tr_cost} | {te_cost} |")
+        else:
+            lines.append(f"| {qps} | {tr_qps} | {te_qps} | {tr_cost} | {te_cost} |")
 
     lines.append("")
+    if any(r.get("variable_costs") for r in results):
+        lines.extend(generate_cost_breakdown_table(results))
+    if any(r.get("ci") for r in results):
+        lines.extend(generate_ci_table(results))
+    if any(r.get("submit_latency_ms") or r.get("integration_latency_ms") for r in results):
+        lines.extend(generate_latency_table(results))
+    if any((r.get("server_metrics") or {}).get("summary") for r in results):
+        lines.extend(generate_server_metrics_table(results))
+    if any(r.get("efficiency") for r in results):
+        lines.extend(generate_efficiency_table(results))
+
     lines.append("### Findings")
 
     infra = get_infra_label(results, tier)
@@ -120,17 +299,176 @@ def generate_report(tier, results):
     else:
         lines.append("- No cost-per-entry crossover detected within tested QPS range")
 
+    for log_type, label in (("trillian", "Trillian"), ("tesseract", "TesseraCT")):
+        measured = [r["efficiency"] for r in results
+                    if r["log_type"] == log_type and (r.get("efficiency") or {}).get("cpu_utilization") is not None]
+        if not measured:
+            continue
+        peak = max(max(e["cpu_utilization"], e["memory_utilization"]) for e in measured)
+        nodes = measured[0]["provisioned"]
+        share = f"its share of the {nodes['nodes']}x {nodes['machine_type']} nodes"
+        if peak < OVERPROVISIONED_UTILIZATION:
+            lines.append(f"- {label} uses at most {peak:.0%} of {share}; the tier is over-provisioned for these loads")
+        else:
+            lines.append(f"- {label} peaks at {peak:.0%} of {share}")
+
     lines.append("")
     return "\n".join(lines)
 
 
+def generate_read_report(tier, results):
+    """Generate markdown for a read-path benchmark (benchmark.py --mode read)."""
+    lines = []
+    lines.append(f"## Read Benchmark Report — Tier: {tier}")
+    lines.append("")
+    lines.append("| Target QPS | System | Read QPS | MB/s | Entries/s | p50 ms | p99 ms | $/hr | $/1M reads |")
+    lines.append("|---:|:---|---:|---:|---:|---:|---:|---:|---:|")
+    for r in sorted(results, key=lambda r: (r["log_type"] != "trillian", r["target_qps"])):
+        system = "Trillian" if r["log_type"] == "trillian" else "TesseraCT"
+        lat = r.get("read_latency_ms")
+        entries = r["entries_read"] / r["elapsed_seconds"] if r.get("elapsed_seconds") else 0
+        total = r["cost_per_hour"] + r.get("variable_cost_per_hour", 0)
+        cost = f"${r['cost_per_1m_reads']:.4f}" if r["cost_per_1m_reads"] > 0 else "—"
+        lines.append(f"| {r['target_qps']} | {system} | {r['achieved_qps']:.1f} | {r['bytes_per_second'] / 1e6:.2f} | "
+                     f"{entries:.0f} | {format_ms(lat, 'p50')} | {format_ms(lat, 'p99')} | ${total:.4f} | {cost} |")
+    lines.append("")
+    if any(r.get("efficiency") for r in results):
+        lines.extend(generate_efficiency_table(results, "reads"))
+
+    lines.append("### Findings")
+    for log_type, label in (("trillian", "Trillian"), ("tesseract", "TesseraCT")):
+        system_results = [r for r in results if r["log_type"] == log_type]
+        if not system_results:
+            continue
+        best = max(system_results, key=lambda r: r["achieved_qps"])
+        sat = next((r for r in sorted(system_results, key=lambda r: r["target_qps"]) if is_saturated(r)), None)
+        reach = f"saturates at ~{int(sat['achieved_qps'])} read QPS" if sat else \
+            f"sustains target through {max(r['target_qps'] for r in system_results)} read QPS"
+        lines.append(f"- {label} {reach}; best ${best['cost_per_1m_reads']:.4f}/1M reads "
+                     f"at {best['achieved_qps']:.0f} QPS")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def generate_profile_report(tier, results):
+    """Generate markdown for a workload-profile run (benchmark.py --profile)."""
+    lines = []
+    lines.append(f"## Workload Profile Report — {results[0]['profile']} — Tier: {tier}")
+    lines.append("")
+    lines.append("| System | Entries | Reads | Duration | Cost | $/1M requests |")
+    lines.append("|:---|---:|---:|---:|---:|---:|")
+    for r in results:
+        system = "Trillian" if r["log_type"] == "trillian" else "TesseraCT"
+        cost = f"${r['cost_per_1m_requests']:.2f}" if r["cost_per_1m_requests"] > 0 else "—"
+        lines.append(f"| {system} | {r['entries_written']} | {r['reads_ok']} | {r['elapsed_seconds']:.0f}s | "
+                     f"${r['total_cost']:.4f} | {cost} |")
+    lines.append("")
+
+    lines.append("### Phases")
+    lines.append("")
+    lines.append("| Phase | System | Peak writes/s | Writes/s | Submit p99 | Peak reads/s | Reads/s | MB/s | Read p99 | Cost |")
+    lines.append("|:---|:---|---:|---:|---:|---:|---:|---:|---:|---:|")
+    for i in range(max(len(r["phases"]) for r in results)):
+        for r in results:
+            if i >= len(r["phases"]):
+                continue
+            p = r["phases"][i]
+            system = "Trillian" if r["log_type"] == "trillian" else "TesseraCT"
+            lines.append(f"| {p['name']} | {system} | {p['peak_write_qps']:.0f} | {p['achieved_qps']:.1f} | "
+                         f"{format_ms(p.get('submit_latency_ms'), 'p99')} | {p['peak_read_qps']:.0f} | "
+                         f"{p['read_qps']:.1f} | {p['bytes_per_second'] / 1e6:.2f} | "
+                         f"{format_ms(p.get('read_latency_ms'), 'p99')} | ${p['total_cost']:.4f} |")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def format_cost(r):
+    """Format cost per 1M entries, or a dash if missing."""
+    if not r or not r.get("cost_per_1m_entries"):
+        return "—"
+    return f"${r['cost_per_1m_entries']:.2f}"
+
+
+def generate_tier_comparison(latest_by_tier):
+    """Compare each tier's most recent run at every QPS level it tested."""
+    lines = []
+    lines.append("## Tier Comparison (latest run per tier)")
+    lines.append("")
+    lines.append("| Tier | Run | Target QPS | Trillian QPS | TesseraCT QPS | Trillian $/1M | TesseraCT $/1M |")
+    lines.append("|:---|:---|---:|---:|---:|---:|---:|")
+    for tier, results in latest_by_tier.items():
+        by_key = {(r["log_type"], r["target_qps"]): r for r in results}
+        for qps in sorted(set(r["target_qps"] for r in results)):
+            tr = by_key.get(("trillian", qps))
+            te = by_key.get(("tesseract", qps))
+            run = (tr or te)["timestamp"][:10]
+            tr_qps = f"{tr['achieved_qps']:.1f}" if tr else "—"
+            te_qps = f"{te['achieved_qps']:.1f}" if te else "—"
+            lines.append(f"| {tier} | {run} | {qps} | {tr_qps} | {te_qps} | {format_cost(tr)} | {format_cost(te)} |")
+    lines.append("")
+    return lines
+
+
+def generate_history_table(rows):
+    """Render achieved QPS and cost per run for each tested QPS level."""
+    lines = []
+    lines.append("### History")
+    lines.append("")
+    lines.append("| Run | Commit | Target QPS | Trillian QPS | TesseraCT QPS | Trillian $/1M | TesseraCT $/1M |")
+    lines.append("|:---|:---|---:|---:|---:|---:|---:|")
+    by_key = {}
+    for r in rows:
+        by_key.setdefault((r["timestamp"], r["git_sha"], r["target_qps"]), {})[r["log_type"]] = r
+    for (timestamp, sha, qps), pair in sorted(by_key.items(), key=lambda kv: (kv[0][2], kv[0][0])):
+        tr, te = pair.get("trillian"), pair.get("tesseract")
+        tr_qps = f"{tr['achieved_qps']:.1f}" if tr else "—"
+        te_qps = f"{te['achieved_qps']:.1f}" if te else "—"
+        commit = sha[:7] if sha else "—"
+        lines.append(f"| {timestamp[:16].replace('T', ' ')} | {commit} | {qps} | {tr_qps} | {te_qps} | {format_cost(tr)} | {format_cost(te)} |")
+    lines.append("")
+    return lines
+
+
+def generate_history_report(db, tiers=None, runs=10):
+    """Report on the latest run of each tier plus its recent history."""
+    latest = db.latest_by_tier(full=True)
+    if tiers:
+        latest = {t: latest[t] for t in tiers if t in latest}
+    sections = []
+    if len(latest) > 1:
+        sections.append("\n".join(generate_tier_comparison(latest)))
+    for tier, results in latest.items():
+        if not results:
+            continue
+        section = generate_report(tier, results)
+        recent = db.runs(tier, limit=runs)
+        if len(recent) > 1:
+            history = db.results(tier=tier, since=recent[-1]["timestamp"])
+            section += "\n" + "\n".join(generate_history_table(history))
+        sections.append(section)
+    return "\n".join(sections)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate markdown benchmark report")
     parser.add_argument("input", nargs="?", default="benchmark_summary.json", help="Path to benchmark_summary.json")
+    parser.add_argument("--db", nargs="?", const=DEFAULT_PATH, default=None, help="Report from the results history instead of a single summary")
+    parser.add_argument("--tier", action="append", default=None, help="Limit a --db report to these tiers (repeatable)")
+    parser.add_argument("--runs", type=int, default=10, help="Runs of history per tier in a --db report")
     args = parser.parse_args()
 
+    if args.db:
+        with ResultsDB(args.db) as db:
+            print(generate_history_report(db, args.tier, args.runs))
+        return
+
     tier, results = load_summary(args.input)
-    report = generate_report(tier, results)
+    if any(r.get("workload") == "read" for r in results):
+        report = generate_read_report(tier, results)
+    elif any(r.get("workload") == "profile" for r in results):
+        report = generate_profile_report(tier, results)
+    else:
+        report = generate_report(tier, results)
     print(report)
 
 
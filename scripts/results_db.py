@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Append-only SQLite history of benchmark results.
+
+benchmark_summary.json only ever holds the latest run. Every summary is
+also ingested here, one row per run and one per (system, QPS level)
+result, indexed by tier, system, target QPS, timestamp and git SHA. The
+headline numbers are real columns, so report.py and update_readme.py can
+render multi-run, multi-tier tables without re-parsing any JSON; the
+full result dict is kept alongside for anything else.
+
+Usage:
+    python3 scripts/results_db.py ingest benchmark_summary.json [more.json ...]
+    python3 scripts/results_db.py runs --tier large
+    python3 scripts/results_db.py query --tier large --log_type tesseract --target_qps 500
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+
+DEFAULT_PATH = "results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    tier TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    git_sha TEXT,
+    source TEXT,
+    search TEXT,
+    UNIQUE (tier, timestamp)
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    tier TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    git_sha TEXT,
+    log_type TEXT NOT NULL,
+    target_qps REAL NOT NULL,
+    achieved_qps REAL,
+    steady_state_qps REAL,
+    entries_written INTEGER,
+    elapsed_seconds REAL,
+    cost_per_hour REAL,
+    cost_per_1m_entries REAL,
+    submit_p50_ms REAL,
+    submit_p99_ms REAL,
+    integration_p50_ms REAL,
+    integration_p99_ms REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_level ON results (tier, log_type, target_qps, timestamp);
+CREATE INDEX IF NOT EXISTS results_by_time ON results (timestamp);
+CREATE INDEX IF NOT EXISTS results_by_sha ON results (git_sha);
+CREATE INDEX IF NOT EXISTS results_by_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS runs_by_tier ON runs (tier, timestamp);
+"""
+
+# Scalar columns copied out of each result dict: column -> (key, subkey).
+SCALAR_COLUMNS = {
+    "achieved_qps": ("achieved_qps", None),
+    "steady_state_qps": ("steady_state_qps", None),
+    "entries_written": ("entries_written", None),
+    "elapsed_seconds": ("elapsed_seconds", None),
+    "cost_per_hour": ("cost_per_hour", None),
+    "cost_per_1m_entries": ("cost_per_1m_entries", None),
+    "submit_p50_ms": ("submit_latency_ms", "p50"),
+    "submit_p99_ms": ("submit_latency_ms", "p99"),
+    "integration_p50_ms": ("integration_latency_ms", "p50"),
+    "integration_p99_ms": ("integration_latency_ms", "p99"),
+}
+
+RESULT_COLUMNS = ["run_id", "tier", "timestamp", "git_sha", "log_type", "target_qps"] + list(SCALAR_COLUMNS)
+
+
+def current_git_sha():
+    """Return the commit being benchmarked, or None outside a git checkout."""
+    if os.environ.get("GITHUB_SHA"):
+        return os.environ["GITHUB_SHA"]
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _scalar(result, key, subkey):
+    value = result.get(key)
+    if subkey is not None:
+        value = value.get(subkey) if isinstance(value, dict) else None
+    return value
+
+
+def _target_qps(value):
+    """Store whole-number QPS levels as ints so they format like the summary."""
+    return int(value) if float(value).is_integer() else value
+
+
+class ResultsDB:
+    """Connection to the results history with ingest and query helpers."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest_summary(self, summary, git_sha=None, source=None, tier=None):
+        """Append one benchmark summary and return its run id.
+
+        Accepts the {tier, timestamp, results} format and the legacy bare
+        list. A summary already ingested (same tier and timestamp) is not
+        added twice; its existing run id is returned.
+        """
+        if isinstance(summary, list):
+            summary = {"results": summary}
+        tier = tier or summary.get("tier", "unknown")
+        timestamp = summary.get("timestamp") or ""
+        search = json.dumps(summary["search"]) if summary.get("search") else None
+
+        with self.conn:
+            row = self.conn.execute("SELECT id FROM runs WHERE tier = ? AND timestamp = ?",
+                                    (tier, timestamp)).fetchone()
+            if row:
+                return row["id"]
+            run_id = self.conn.execute(
+                "INSERT INTO runs (tier, timestamp, git_sha, source, search) VALUES (?, ?, ?, ?, ?)",
+                (tier, timestamp, git_sha, source, search)).lastrowid
+            rows = []
+            for r in summary.get("results", []):
+                scalars = [_scalar(r, key, subkey) for key, subkey in SCALAR_COLUMNS.values()]
+                rows.append([run_id, tier, timestamp, git_sha, r["log_type"], r["target_qps"]]
+                            + scalars + [json.dumps(r)])
+            placeholders = ", ".join("?" * (len(RESULT_COLUMNS) + 1))
+            self.conn.executemany(
+                f"INSERT INTO results ({', '.join(RESULT_COLUMNS)}, data) VALUES ({placeholders})", rows)
+        return run_id
+
+    def ingest_file(self, path, git_sha=None):
+        with open(path, "r") as f:
+            return self.ingest_summary(json.load(f), git_sha=git_sha, source=path)
+
+    def tiers(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT tier FROM runs ORDER BY tier")]
+
+    def runs(self, tier=None, limit=None):
+        """Return runs newest first as dicts, with their result counts."""
+        sql = ("SELECT runs.id, runs.tier, runs.timestamp, runs.git_sha, runs.source, "
+               "(SELECT COUNT(*) FROM results WHERE results.run_id = runs.id) AS result_count "
+               "FROM runs")
+        params = []
+        if tier:
+            sql += " WHERE tier = ?"
+            params.append(tier)
+        sql += " ORDER BY timestamp DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def latest_run_id(self, tier=None):
+        runs = self.runs(tier, limit=1)
+        return runs[0]["id"] if runs else None
+
+    def results(self, tier=None, log_type=None, target_qps=None, run_id=None, git_sha=None,
+                since=None, until=None, limit=None, full=False):
+        """Return result rows matching every given filter, oldest first.
+
+        Rows carry the indexed and scalar columns. With full=True the
+        complete result dict from the summary is merged in as well.
+        since/until are inclusive ISO timestamp bounds.
+        """
+        filters = {"tier = ?": tier, "log_type = ?": log_type, "target_qps = ?": target_qps,
+                   "run_id = ?": run_id, "git_sha = ?": git_sha,
+                   "timestamp >= ?": since, "timestamp <= ?": until}
+        where = [clause for clause, value in filters.items() if value is not None]
+        params = [value for value in filters.values() if value is not None]
+        columns = RESULT_COLUMNS + (["data"] if full else [])
+        sql = f"SELECT {', '.join(columns)} FROM results"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if limit:
+            # Most recent `limit` rows, still returned oldest first.
+            sql = f"SELECT * FROM ({sql} ORDER BY timestamp DESC, id DESC LIMIT ?) ORDER BY timestamp, log_type, target_qps"
+            params.append(limit)
+        else:
+            sql += " ORDER BY timestamp, log_type, target_qps"
+
+        rows = []
+        for row in self.conn.execute(sql, params):
+            r = dict(row)
+            data = r.pop("data", None)
+            if data:
+                r = dict(json.loads(data), **r)
+            r["target_qps"] = _target_qps(r["target_qps"])
+            rows.append(r)
+        return rows
+
+    def latest_results(self, tier, full=False):
+        """Results of the most recent run for a tier."""
+        run_id = self.latest_run_id(tier)
+        return self.results(run_id=run_id, full=full) if run_id is not None else []
+
+    def latest_by_tier(self, full=False):
+        """{tier: results of its most recent run} for every tier on record."""
+        return {tier: self.latest_results(tier, full) for tier in self.tiers()}
+
+
+def _print_rows(rows, columns):
+    print("\t".join(columns))
+    for r in rows:
+        print("\t".join("" if r.get(c) is None else str(r[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark results history")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Path to the SQLite results history")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="Append benchmark summaries to the history")
+    p.add_argument("summaries", nargs="+", help="benchmark_summary.json files")
+    p.add_argument("--git_sha", default=None, help="Commit the runs were made from (default: current HEAD)")
+
+    p = sub.add_parser("runs", help="List recorded runs, newest first")
+    p.add_argument("--tier", default=None)
+    p.add_argument("--limit", type=int, default=20)
+
+    p = sub.add_parser("query", help="Print matching results as TSV")
+    p.add_argument("--tier", default=None)
+    p.add_argument("--log_type", choices=["trillian", "tesseract"], default=None)
+    p.add_argument("--target_qps", type=float, default=None)
+    p.add_argument("--git_sha", default=None)
+    p.add_argument("--since", default=None, help="ISO timestamp lower bound")
+    p.add_argument("--until", default=None, help="ISO timestamp upper bound")
+    p.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    with ResultsDB(args.db) as db:
+        if args.command == "ingest":
+            git_sha = args.git_sha or current_git_sha()
+            for path in args.summaries:
+                run_id = db.ingest_file(path, git_sha=git_sha)
+                print(f"📥 {path} -> run {run_id}")
+        elif args.command == "runs":
+            _print_rows(db.runs(args.tier, args.limit),
+                        ["id", "tier", "timestamp", "git_sha", "result_count", "source"])
+        else:
+            rows = db.results(tier=args.tier, log_type=args.log_type, target_qps=args.target_qps,
+                              git_sha=args.git_sha, since=args.since, until=args.until, limit=args.limit)
+            _print_rows(rows, RESULT_COLUMNS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Scrape server-side Prometheus metrics from the log pods during a run.
+
+Client-side tree growth says how fast a log is, not why it stops getting
+faster. MetricsScraper polls each component's /metrics endpoint (CTFE, log
+server and signer for Trillian; the TesseraCT server) in a background
+thread, keeps only the selected metric families, and turns consecutive
+scrapes into per-interval points:
+
+    counter    rate per second, summed over label sets and per label set
+    histogram  observations per second, mean, and p50/p95/p99 estimated
+               from the bucket deltas
+    gauge      last value
+
+Points carry "t" in seconds since the run started, the same clock as
+throughput.rate_series, and align() attaches them to the client's
+throughput series. In the cluster the endpoints are reached through
+`kubectl port-forward` (PortForward); locally fake_log.py serves a fake
+exposition at /benchmark/metrics and /tesseract-benchmark/metrics.
+"""
+
+import re
+import socket
+import subprocess
+import threading
+import time
+
+from http_session import HTTPRequestError, HTTPSession
+
+# Pods scraped per system: component -> (namespace, kubectl resource, metrics port).
+CLUSTER_TARGETS = {
+    "trillian": {
+        "ctfe": ("trillian", "deploy/ctfe", 6962),
+        "logserver": ("trillian", "deploy/trillian-logserver", 8091),
+        "logsigner": ("trillian", "deploy/trillian-logsigner", 8091),
+    },
+    "tesseract": {
+        "tesseract": ("tesseract", "deploy/tesseract-server", 80),
+    },
+}
+
+LOCAL_PATHS = {
+    "trillian": {"ctfe": "/benchmark/metrics"},
+    "tesseract": {"tesseract": "/tesseract-benchmark/metrics"},
+}
+
+# Metric families kept from each scrape, by name prefix: request counts and
+# latency, sequencer batches and DB operation latency, plus process CPU.
+# Everything else (Go runtime internals, build info) is skipped before its
+# labels are parsed.
+DEFAULT_SELECT = (
+    "http_",              # CTFE and TesseraCT HTTP handlers
+    "rpc_",               # Trillian gRPC server interceptor
+    "sequencer_",         # Trillian signer batches
+    "mysql_",             # Trillian storage operations
+    "tessera",            # TesseraCT / Tessera sequencing and storage
+    "process_cpu_seconds_total",
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_exposition(text, select=DEFAULT_SELECT):
+    """Parse Prometheus text exposition, keeping families whose name starts with `select`.
+
+    Returns (types, samples): types maps family name to its # TYPE, and
+    samples maps (sample name, sorted label tuple) to the value. Lines of
+    unselected families are skipped on a string prefix check alone.
+    """
+    types = {}
+    samples = {}
+    select = tuple(select)
+    for line in text.splitlines():
+        if not line:
+            continue
+        if line[0] == "#":
+            if line.startswith("# TYPE "):
+                parts = line.split()
+                if len(parts) >= 4 and parts[2].startswith(select):
+                    types[parts[2]] = parts[3]
+            continue
+        if not line.startswith(select):
+            continue
+        brace = line.find("{")
+        if brace >= 0:
+            close = line.rfind("}")
+            name = line[:brace]
+            labels = tuple(sorted((k, v.replace('\\"', '"').replace("\\\\", "\\"))
+                                  for k, v in _LABEL.findall(line, brace, close)))
+            rest = line[close + 1:].split()
+        else:
+            parts = line.split()
+            name, labels, rest = parts[0], (), parts[1:]
+        if not rest:
+            continue
+        try:
+            samples[(name, labels)] = float(rest[0])
+        except ValueError:
+            continue
+    return types, samples
+
+
+def _family(name, types):
+    """Family and suffix of a sample name (histogram/summary samples carry _bucket/_sum/_count)."""
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and types.get(name[:-len(suffix)]) in ("histogram", "summary"):
+            return name[:-len(suffix)], suffix
+    return name, ""
+
+
+def format_labels(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+
+def _delta(now, before):
+    # A counter that went down was reset (pod restart); count from zero.
+    return now - before if now >= before else now
+
+
+def histogram_quantile(q, buckets):
+    """Estimate a quantile from cumulative (le, count) buckets, like PromQL's."""
+    buckets = sorted(buckets)
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    rank = q * buckets[-1][1]
+    prev_le, prev_count = 0.0, 0.0
+    for le, count in buckets:
+        if count >= rank:
+            if le == float("inf"):
+                return prev_le
+            if count == prev_count:
+                return le
+            return prev_le + (le - prev_le) * (rank - prev_count) / (count - prev_count)
+        prev_le, prev_count = le, count
+    return prev_le
+
+
+def interval_point(types, before, after, dt):
+    """Derive one interval's metrics from two scrapes taken dt seconds apart."""
+    counters = {}
+    hists = {}
+    gauges = {}
+    for (name, labels), value in after.items():
+        family, suffix = _family(name, types)
+        kind = types.get(family, "untyped")
+        if kind in ("histogram", "summary"):
+            if not suffix:
+                # Summary quantiles are over the process lifetime; use _sum/_count.
+                continue
+            base = tuple(kv for kv in labels if kv[0] != "le")
+            h = hists.setdefault((family, base), {"buckets": [], "sum": 0.0, "count": 0.0})
+            prev = before.get((name, labels), 0.0)
+            d = _delta(value, prev)
+            if suffix == "_bucket":
+                le = dict(labels).get("le")
+                if le is not None:
+                    h["buckets"].append((float(le), d))
+            elif suffix == "_sum":
+                h["sum"] = d
+            else:
+                h["count"] = d
+        elif kind == "counter" or family.endswith("_total"):
+            if dt > 0:
+                counters[(family, labels)] = _delta(value, before.get((name, labels), 0.0)) / dt
+        else:
+            gauges[(family, labels)] = value
+
+    point = {}
+    totals = {}
+    for (family, labels), rate in counters.items():
+        totals[family] = totals.get(family, 0.0) + rate
+        if labels:
+            point[family + format_labels(labels)] = round(rate, 3)
+    for family, rate in totals.items():
+        point[family] = round(rate, 3)
+    for (family, labels), h in hists.items():
+        key = family + format_labels(labels)
+        if h["count"] <= 0:
+            continue
+        point[f"{key}:rate"] = round(h["count"] / dt, 3) if dt > 0 else None
+        point[f"{key}:mean"] = round(h["sum"] / h["count"], 6)
+        for q in QUANTILES:
+            value = histogram_quantile(q, h["buckets"])
+            if value is not None:
+                point[f"{key}:p{int(q * 100)}"] = round(value, 6)
+    for (family, labels), value in gauges.items():
+        point[family + format_labels(labels)] = value
+    return point
+
+
+class MetricsScraper:
+    """Scrape {component: url} every `interval` seconds in a daemon thread.
+
+    stop() returns {"interval", "components": {component: {"scrapes",
+    "errors", "series": [{"t", "dt", ...metrics}]}}}, with t the end of
+    each interval in seconds since start()'s t0 and dt its length.
+    """
+
+    def __init__(self, targets, interval, select=DEFAULT_SELECT, session=None):
+        self.targets = dict(targets)
+        self.interval = interval
+        self.select = tuple(select)
+        self.session = session or HTTPSession(timeout=min(5, max(1, interval)), retries=0)
+        self.t0 = None
+        self._last = {}
+        self._series = {c: [] for c in self.targets}
+        self._types = {c: {} for c in self.targets}
+        self._scrapes = {c: 0 for c in self.targets}
+        self._errors = {c: 0 for c in self.targets}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def scrape(self, t=None):
+        """Scrape every target once and record an interval point for each."""
+        for component, url in self.targets.items():
+            t_now = time.time() if t is None else t
+            try:
+                text = self.session.get(url).decode("utf-8", "replace")
+            except (HTTPRequestError, OSError):
+                self._errors[component] += 1
+                continue
+            types, samples = parse_exposition(text, self.select)
+            self._types[component].update(types)
+            self._scrapes[component] += 1
+            last = self._last.get(component)
+            if last is not None and t_now > last[0]:
+                point = interval_point(self._types[component], last[1], samples, t_now - last[0])
+                point["t"] = round(t_now - self.t0, 2)
+                point["dt"] = round(t_now - last[0], 2)
+                self._series[component].append(point)
+            self._last[component] = (t_now, samples)
+
+    def _run(self):
+        next_tick = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, next_tick - time.monotonic())):
+            self.scrape()
+            next_tick += self.interval
+
+    def start(self, t0=None):
+        """Take a baseline scrape and start polling; t0 is the run's start time."""
+        self.t0 = t0 if t0 is not None else time.time()
+        self.scrape()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop polling, take a final scrape, and return the collected series."""
+        self._stop.set()
+        self._thread.join()
+        self.scrape()
+        return {
+            "interval": self.interval,
+            "components": {c: {"scrapes": self._scrapes[c], "errors": self._errors[c], "series": self._series[c]}
+                           for c in self.targets},
+        }
+
+
+def summarize(metrics):
+    """Run-level view: the time-weighted mean of each metric over its intervals, per component.
+
+    Weighting by interval length keeps the short interval up to the final
+    scrape from skewing the averages.
+    """
+    summary = {}
+    for component, data in metrics["components"].items():
+        sums, weights = {}, {}
+        for point in data["series"]:
+            dt = point.get("dt") or 0
+            for key, value in point.items():
+                if key in ("t", "dt") or value is None or dt <= 0:
+                    continue
+                sums[key] = sums.get(key, 0.0) + value * dt
+                weights[key] = weights.get(key, 0.0) + dt
+        summary[component] = {k: round(sums[k] / weights[k], 6) for k in sorted(sums)}
+    return summary
+
+
+def align(throughput_series, metrics):
+    """Attach each component's nearest-in-time server point to every client throughput point.
+
+    Returns a new list of {"t", "tree_size", "qps", "server": {component: point}}.
+    """
+    timeline = []
+    for p in throughput_series:
+        server = {}
+        for component, data in metrics["components"].items():
+            series = data["series"]
+            if series:
+                nearest = min(series, key=lambda s: abs(s["t"] - p["t"]))
+                if abs(nearest["t"] - p["t"]) <= metrics["interval"]:
+                    server[component] = {k: v for k, v in nearest.items() if k not in ("t", "dt")}
+        timeline.append(dict(p, server=server))
+    return timeline
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class PortForward:
+    """`kubectl port-forward` to one pod port, on a free local port.
+
+    The forward is started on construction and waits (up to `timeout`
+    seconds) for kubectl to report it is listening; close() ends it.
+    Raises OSError if kubectl fails or doesn't come up in time.
+    """
+
+    def __init__(self, namespace, resource, port, timeout=15):
+        self.local_port = _free_port()
+        self.proc = subprocess.Popen(
+            ["kubectl", "port-forward", "-n", namespace, resource, f"{self.local_port}:{port}"],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        ready = threading.Event()
+
+        def _watch():
+            for line in self.proc.stdout:
+                if "Forwarding from" in line:
+                    ready.set()
+
+        threading.Thread(target=_watch, daemon=True).start()
+        if not ready.wait(timeout):
+            self.close()
+            raise OSError(f"kubectl port-forward {namespace}/{resource} did not come up")
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+def open_targets(systems, local_log=None):
+    """Metrics URLs for each system's components: ({system: {component: url}}, [PortForward]).
+
+    Locally these are fake_log.py's endpoints; in the cluster one port-forward
+    per pod. Components whose forward fails are left out with a warning.
+    """
+    targets, forwards = {}, []
+    for system in systems:
+        targets[system] = {}
+        if local_log:
+            for component, path in LOCAL_PATHS[system].items():
+                targets[system][component] = f"http://{local_log}{path}"
+            continue
+        for component, (namespace, resource, port) in CLUSTER_TARGETS[system].items():
+            try:
+                forward = PortForward(namespace, resource, port)
+            except OSError as e:
+                print(f"⚠️  Not scraping {component} metrics: {e}")
+                continue
+            forwards.append(forward)
+            targets[system][component] = f"http://127.0.0.1:{forward.local_port}/metrics"
+    return targets, forwards
@@ -0,0 +1,105 @@
+"""Readers for TesseraCT's published log storage (checkpoint, tiles).
+
+get_log_size used to fork `gcloud storage cat` for every checkpoint read,
+which costs seconds of interpreter startup and makes frequent polling
+impossible. These readers are created once and reused:
+
+    GCSReader        in-process google-cloud-storage client; the
+                     authenticated session and its connections are kept
+    DirectoryReader  a local directory laid out like the bucket, e.g. the
+                     --storage_dir written by fake_log.py
+    HTTPReader       objects served over HTTP, e.g. fake_log.py's
+                     /tesseract-benchmark/checkpoint
+"""
+
+import os
+
+from http_session import HTTPRequestError, HTTPSession
+
+
+class StorageError(Exception):
+    """Raised when an object cannot be read from log storage."""
+
+
+def parse_checkpoint_size(data):
+    """Return the tree size from a checkpoint body (origin, size, root hash, ...)."""
+    lines = data.decode("utf-8", "replace").split("\n")
+    if len(lines) < 2:
+        raise StorageError("checkpoint has fewer than two lines")
+    try:
+        return int(lines[1])
+    except ValueError:
+        raise StorageError(f"checkpoint size is not an integer: {lines[1]!r}")
+
+
+class StorageReader:
+    """Base class: read(path) returns the object's bytes."""
+
+    def read(self, path):
+        raise NotImplementedError
+
+    def checkpoint_size(self):
+        return parse_checkpoint_size(self.read("checkpoint"))
+
+
+class GCSReader(StorageReader):
+    """Read objects from a GCS bucket with a long-lived client.
+
+    Every failure, including missing credentials and transport errors that
+    aren't GoogleAPIErrors, surfaces as StorageError with the original
+    exception as its __cause__.
+    """
+
+    def __init__(self, bucket, timeout=10):
+        try:
+            # Imported lazily so local runs don't need google-cloud-storage.
+            from google.cloud import storage
+
+            self.client = storage.Client()
+            self.bucket = self.client.bucket(bucket)
+        except Exception as e:
+            raise StorageError(f"can't open gs://{bucket}: {e}") from e
+        self.timeout = timeout
+
+    def read(self, path):
+        try:
+            return self.bucket.blob(path).download_as_bytes(timeout=self.timeout)
+        except Exception as e:
+            raise StorageError(f"gs://{self.bucket.name}/{path}: {e}") from e
+
+    def __repr__(self):
+        return f"GCSReader(gs://{self.bucket.name})"
+
+
+class DirectoryReader(StorageReader):
+    """Read objects from a local directory mirroring the bucket layout."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def read(self, path):
+        try:
+            with open(os.path.join(self.root, path), "rb") as f:
+                return f.read()
+        except OSError as e:
+            raise StorageError(str(e))
+
+    def __repr__(self):
+        return f"DirectoryReader({self.root})"
+
+
+class HTTPReader(StorageReader):
+    """Read objects relative to an HTTP base URL over a keep-alive session."""
+
+    def __init__(self, base_url, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.session = session or HTTPSession()
+
+    def read(self, path):
+        try:
+            return self.session.get(f"{self.base_url}/{path}")
+        except HTTPRequestError as e:
+            raise StorageError(str(e))
+
+    def __repr__(self):
+        return f"HTTPReader({self.base_url})"
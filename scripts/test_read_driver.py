@@ -0,0 +1,59 @@
+"""Checks ReadPlan only issues reads for tiles that exist, at edge tree sizes.
+
+Run with: python3 -m unittest discover -s scripts -p 'test_*.py'
+"""
+
+import random
+import unittest
+
+from read_driver import TILE_WIDTH, ReadPlan, tile_path
+
+# Powers of 256 and sizes just past them, where the right edge of a level
+# has an incomplete node and so no tile.
+EDGE_SIZES = sorted({max(1, TILE_WIDTH ** n + k) for n in range(4) for k in (-1, 0, 1, 64, 255)})
+
+
+class LastLeafRandom(random.Random):
+    """Always draws the tree's last leaf, on a chosen level, as a random read."""
+
+    def __init__(self, level):
+        super().__init__(0)
+        self.level = level
+
+    def random(self):
+        return 0.0
+
+    def randint(self, a, b):
+        return min(max(self.level, a), b)
+
+    def randrange(self, *args):
+        return args[-1] - 1
+
+
+class ReadPlanEdgeTest(unittest.TestCase):
+
+    def test_random_reads_exist_at_edge_sizes(self):
+        for size in EDGE_SIZES:
+            plan = ReadPlan("tesseract", size, read_mix=1.0)
+            for level in range(-1, plan.levels + 1):
+                plan.rng = LastLeafRandom(level)
+                kind, path, _, _ = plan.next()
+                self.assertEqual(kind, "random")
+                self.assertTrue(path.startswith("/tile/"), (size, level, path))
+
+    def test_tile_path_edges(self):
+        # Level 1 of a 65600-entry tree has 256 complete nodes: one full
+        # tile, and no tile yet for leaves past 65535.
+        self.assertEqual(tile_path(1, 65535, 65600), "tile/1/000")
+        self.assertIsNone(tile_path(1, 65599, 65600))
+        self.assertEqual(tile_path(None, 65599, 65600), "tile/data/256.p/64")
+
+    def test_many_random_reads(self):
+        for size in EDGE_SIZES:
+            plan = ReadPlan("tesseract", size, read_mix=1.0, seed=size)
+            for _ in range(2000):
+                self.assertIsNotNone(plan.next()[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
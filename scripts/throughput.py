@@ -0,0 +1,325 @@
+"""Time-series tree-size sampling and steady-state throughput detection.
+
+run_hammer used to derive achieved QPS from two tree-size reads, which
+averages away warmup tails, stalls and late collapses. TreeSizeSampler polls
+the tree size in a background thread while load runs; rate_series turns the
+samples into per-interval rates and find_steady_window picks the longest run
+of intervals whose rates agree, which is reported alongside the whole-run
+average.
+
+ConvergenceMonitor watches the same samples live and signals once the rate
+has settled, so a run can end early instead of billing the full duration.
+WarmupMonitor does the same for warmup, signalling once the rate stops
+rising. IntegrationTracker matches the growth seen by a separate
+sub-second sampler to the send times of accepted submissions, for the distribution of time from
+submission until a published tree head covers the entry.
+"""
+
+import array
+import bisect
+import collections
+import math
+import threading
+import time
+
+from histogram import LatencyHistogram
+
+# Coefficient of variation below which a window of per-interval rates is
+# considered stable.
+DEFAULT_MAX_CV = 0.15
+DEFAULT_MIN_POINTS = 3
+
+# Convergence: the last CONVERGE_WINDOW interval rates must have a CV at
+# most CONVERGE_MAX_CV, and the means of the window's two halves must agree
+# within CONVERGE_MAX_DRIFT (a slow ramp can have a low CV).
+CONVERGE_WINDOW = 6
+CONVERGE_MAX_CV = 0.05
+CONVERGE_MAX_DRIFT = 0.03
+
+# Warmup: warm once the mean rate of the last WARMUP_WINDOW intervals is no
+# more than WARMUP_MIN_GAIN above the mean of the WARMUP_WINDOW before it.
+WARMUP_WINDOW = 3
+WARMUP_MIN_GAIN = 0.05
+
+
+class TreeSizeSampler:
+    """Poll size_fn() every `interval` seconds in a daemon thread.
+
+    Reads that fail (size_fn returns None) or go backwards are dropped
+    rather than recorded; a real size of 0 (a fresh log) is kept. Accepted
+    samples are also passed to on_sample(t, size) when given.
+    """
+
+    def __init__(self, size_fn, interval, on_sample=None):
+        self.size_fn = size_fn
+        self.interval = interval
+        self.on_sample = on_sample
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def add(self, t, size):
+        if size is None:
+            return
+        if self.samples and size < self.samples[-1][1]:
+            return
+        self.samples.append((t, size))
+        if self.on_sample:
+            self.on_sample(t, size)
+
+    def _run(self):
+        next_tick = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, next_tick - time.monotonic())):
+            self.add(time.time(), self.size_fn())
+            next_tick += self.interval
+
+    def start(self, t=None, size=None):
+        """Start sampling, optionally seeding with an already-read size."""
+        if size is not None:
+            self.add(t if t is not None else time.time(), size)
+        self._thread.start()
+        return self
+
+    def stop(self, t=None, size=None):
+        """Stop sampling, optionally appending a final read, and return samples."""
+        self._stop.set()
+        self._thread.join()
+        if size is not None:
+            self.add(t if t is not None else time.time(), size)
+        return self.samples
+
+
+class IntegrationTracker:
+    """Estimate time-to-integration by matching tree growth to submissions.
+
+    submitted() records the send time of each submission the log accepted;
+    observe() records each increase in tree size. On TesseraCT a submission
+    is only acknowledged once its entry is published, so growth is usually
+    seen before its submission is recorded, and matching waits for
+    finish(): the oldest accepted submissions are paired with the oldest
+    units of growth, assuming the log integrates in roughly submission
+    order. Growth seen before the oldest unmatched submission was sent
+    belongs to something untracked (another writer, or a request that timed
+    out but was still logged) and is skipped. Resolution is bounded by how
+    often the tree size is observed, so feed it from a sampler polling well
+    below the integration interval; delays are measured to the first
+    observation that covers the entry, an upper bound by at most one poll.
+    """
+
+    def __init__(self):
+        self.sent = array.array("d")
+        self.growth = []
+        self.histogram = LatencyHistogram()
+        self.unmatched = 0
+        self.untracked = 0
+        self._last_size = None
+
+    def submitted(self, t):
+        self.sent.append(t)
+
+    def observe(self, t, size):
+        if self._last_size is None:
+            self._last_size = size
+            return
+        grown = size - self._last_size
+        if grown <= 0:
+            return
+        self._last_size = size
+        self.growth.append((t, grown))
+
+    def finish(self):
+        """Match growth to submissions; returns the histogram.
+
+        Sets `unmatched` to the accepted submissions no observed tree size
+        covers and `untracked` to the growth matched to no submission.
+        """
+        sent = sorted(self.sent)
+        matched = 0
+        for t, grown in self.growth:
+            covered = min(grown, bisect.bisect_right(sent, t, lo=matched) - matched)
+            for s in sent[matched:matched + covered]:
+                self.histogram.record(t - s)
+            matched += covered
+            self.untracked += grown - covered
+        self.unmatched = len(sent) - matched
+        return self.histogram
+
+
+def wait_for_growth(size_fn, size, timeout, interval=0.1):
+    """Poll size_fn() until it exceeds `size`; return (seconds waited, new size).
+
+    Returns (None, last size seen) if the tree hasn't grown within `timeout`
+    seconds. Failed reads (None) are retried.
+    """
+    start = time.monotonic()
+    current = size
+    while True:
+        read = size_fn()
+        if read is not None:
+            current = read
+        elapsed = time.monotonic() - start
+        if current > size:
+            return elapsed, current
+        if elapsed >= timeout:
+            return None, current
+        time.sleep(interval)
+
+
+class ConvergenceMonitor:
+    """Decide from live tree-size samples when throughput has converged.
+
+    Feed it samples via observe(t, size) (e.g. as a TreeSizeSampler
+    on_sample hook). Once at least min_seconds have passed since the first
+    sample and the trailing window of per-interval rates is flat, `stop` is
+    set and `converged` describes the point of convergence.
+    """
+
+    def __init__(self, min_seconds, window=CONVERGE_WINDOW, max_cv=CONVERGE_MAX_CV,
+                 max_drift=CONVERGE_MAX_DRIFT):
+        self.min_seconds = min_seconds
+        self.window = window
+        self.max_cv = max_cv
+        self.max_drift = max_drift
+        self.stop = threading.Event()
+        self.converged = None
+        self._t0 = None
+        self._last = None
+        self._rates = collections.deque(maxlen=window)
+
+    def observe(self, t, size):
+        if self._t0 is None:
+            self._t0 = t
+        if self._last is not None and t > self._last[0]:
+            self._rates.append((size - self._last[1]) / (t - self._last[0]))
+        self._last = (t, size)
+        if self.stop.is_set() or len(self._rates) < self.window or t - self._t0 < self.min_seconds:
+            return
+
+        rates = list(self._rates)
+        mean = sum(rates) / len(rates)
+        if mean <= 0:
+            return
+        cv = math.sqrt(sum((r - mean) ** 2 for r in rates) / len(rates)) / mean
+        half = len(rates) // 2
+        drift = abs(sum(rates[half:]) / (len(rates) - half) - sum(rates[:half]) / half) / mean
+        if cv <= self.max_cv and drift <= self.max_drift:
+            self.converged = {
+                "converged_at_s": round(t - self._t0, 2),
+                "rate_qps": round(mean, 2),
+                "cv": round(cv, 4),
+                "drift": round(drift, 4),
+            }
+            self.stop.set()
+
+
+class WarmupMonitor:
+    """Decide from live tree-size samples when a backend has warmed up.
+
+    observe(t, size) records the per-interval write rate. Once min_seconds
+    have passed and the latest window's mean rate is within min_gain of the
+    window before it, `stop` is set and `warm_at_s` records when. `curve`
+    keeps every rate point for the summary (warmup is short, so it stays
+    small).
+    """
+
+    def __init__(self, min_seconds=0, window=WARMUP_WINDOW, min_gain=WARMUP_MIN_GAIN):
+        self.min_seconds = min_seconds
+        self.window = window
+        self.min_gain = min_gain
+        self.stop = threading.Event()
+        self.warm_at_s = None
+        self.curve = []
+        self._t0 = None
+        self._last = None
+
+    def observe(self, t, size):
+        if self._t0 is None:
+            self._t0 = t
+        if self._last is not None and t > self._last[0]:
+            rate = (size - self._last[1]) / (t - self._last[0])
+            self.curve.append({"t": round(t - self._t0, 2), "qps": round(rate, 2)})
+        self._last = (t, size)
+        if self.stop.is_set() or len(self.curve) < 2 * self.window or t - self._t0 < self.min_seconds:
+            return
+
+        rates = [p["qps"] for p in self.curve[-2 * self.window:]]
+        before = sum(rates[:self.window]) / self.window
+        latest = sum(rates[self.window:]) / self.window
+        if latest > 0 and latest <= before * (1 + self.min_gain):
+            self.warm_at_s = round(t - self._t0, 2)
+            self.stop.set()
+
+
+def rate_series(samples):
+    """Convert (time, tree_size) samples into per-interval rate points.
+
+    Each point is {"t": seconds since the first sample, "tree_size": size at
+    the end of the interval, "qps": entries/second over the interval}.
+    """
+    if not samples:
+        return []
+    t0 = samples[0][0]
+    series = []
+    for (ta, sa), (tb, sb) in zip(samples, samples[1:]):
+        dt = tb - ta
+        if dt <= 0:
+            continue
+        series.append({
+            "t": round(tb - t0, 2),
+            "tree_size": sb,
+            "qps": round((sb - sa) / dt, 2),
+        })
+    return series
+
+
+def find_steady_window(rates, max_cv=DEFAULT_MAX_CV, min_points=DEFAULT_MIN_POINTS):
+    """Return (i, j) bounding the longest stable run of rates, inclusive.
+
+    A run is stable when its coefficient of variation is at most max_cv. Ties
+    go to the later window, which is past any warmup tail. Returns None if no
+    run of at least min_points qualifies.
+    """
+    n = len(rates)
+    prefix = [0.0]
+    prefix_sq = [0.0]
+    for r in rates:
+        prefix.append(prefix[-1] + r)
+        prefix_sq.append(prefix_sq[-1] + r * r)
+
+    best = None
+    for length in range(n, min_points - 1, -1):
+        for i in range(n - length, -1, -1):
+            j = i + length
+            mean = (prefix[j] - prefix[i]) / length
+            if mean <= 0:
+                continue
+            var = max(0.0, (prefix_sq[j] - prefix_sq[i]) / length - mean * mean)
+            if math.sqrt(var) / mean <= max_cv:
+                best = (i, j - 1)
+                break
+        if best:
+            break
+    return best
+
+
+def steady_state(samples, max_cv=DEFAULT_MAX_CV, min_points=DEFAULT_MIN_POINTS):
+    """Summarize samples into a rate series plus steady-state throughput.
+
+    Returns a dict with "throughput_series" and, when a stable window exists,
+    "steady_state_qps" and "steady_window" (start/end seconds into the run).
+    """
+    series = rate_series(samples)
+    summary = {"throughput_series": series}
+    window = find_steady_window([p["qps"] for p in series], max_cv, min_points)
+    if window is None:
+        summary["steady_state_qps"] = None
+        return summary
+
+    i, j = window
+    start_t = series[i - 1]["t"] if i > 0 else 0.0
+    start_size = series[i - 1]["tree_size"] if i > 0 else samples[0][1]
+    end_t = series[j]["t"]
+    entries = series[j]["tree_size"] - start_size
+    summary["steady_state_qps"] = round(entries / (end_t - start_t), 2)
+    summary["steady_window"] = {"start_s": start_t, "end_s": end_t}
+    return summary
@@ -0,0 +1,144 @@
+"""Repeated short trials per QPS level with bootstrap confidence intervals.
+
+A single long run gives one number per (system, QPS level) and no way to
+tell noise from a real difference. run_trials repeats a short trial,
+computes percentile-bootstrap confidence intervals on the mean achieved QPS
+and cost per 1M entries after each one, and stops as soon as both
+intervals are narrower than the requested relative width, so a stable
+level costs a few billed minutes instead of a full --duration.
+"""
+
+import random
+
+from histogram import LatencyHistogram
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 2000
+# Fewer trials than this can't support a meaningful interval.
+MIN_TRIALS = 3
+
+CI_METRICS = ("achieved_qps", "cost_per_1m_entries")
+
+
+def bootstrap_ci(values, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES, seed=0):
+    """Percentile bootstrap interval for the mean of `values` as (lo, hi)."""
+    n = len(values)
+    if n == 0:
+        return None
+    if n == 1:
+        return values[0], values[0]
+    rng = random.Random(seed)
+    means = sorted(sum(rng.choices(values, k=n)) / n for _ in range(resamples))
+    tail = (1 - confidence) / 2
+    lo = means[int(tail * (resamples - 1))]
+    hi = means[int(round((1 - tail) * (resamples - 1)))]
+    return lo, hi
+
+
+def relative_width(interval, mean):
+    """Width of an interval as a fraction of the mean (inf when undefined)."""
+    if interval is None:
+        return float("inf")
+    if interval[0] == interval[1]:
+        return 0.0
+    if mean <= 0:
+        return float("inf")
+    return (interval[1] - interval[0]) / mean
+
+
+def confidence_intervals(trials, confidence=DEFAULT_CONFIDENCE):
+    """Mean, interval and relative width of each CI metric across trials."""
+    cis = {}
+    for metric in CI_METRICS:
+        values = [t[metric] for t in trials]
+        mean = sum(values) / len(values)
+        lo, hi = bootstrap_ci(values, confidence)
+        width = relative_width((lo, hi), mean)
+        cis[metric] = {
+            "mean": round(mean, 2),
+            "lo": round(lo, 2),
+            "hi": round(hi, 2),
+            "relative_width": round(width, 4) if width != float("inf") else None,
+        }
+    return cis
+
+
+def converged(cis, n_trials, target_ci):
+    """True once there are enough trials and every interval is within target_ci."""
+    return (target_ci is not None and n_trials >= MIN_TRIALS
+            and all(c["relative_width"] is not None and c["relative_width"] <= target_ci
+                    for c in cis.values()))
+
+
+def _merge_latency(trials, result):
+    """Combine every trial's latency histograms into the aggregate result."""
+    merged = {}
+    for t in trials:
+        for name, data in (t.get("latency_histograms") or {}).items():
+            hist = LatencyHistogram.from_dict(data)
+            if name in merged:
+                merged[name].merge(hist)
+            else:
+                merged[name] = hist
+    if merged:
+        result["latency_histograms"] = {name: h.to_dict() for name, h in merged.items()}
+        for name, hist in merged.items():
+            result[f"{name}_latency_ms"] = hist.summary_ms()
+
+
+def aggregate_trials(trials, confidence=DEFAULT_CONFIDENCE, target_ci=None):
+    """Fold per-trial results into one result dict for the level.
+
+    Headline numbers are trial means; entries, elapsed time and variable
+    costs are totals.
+    Latency histograms are merged across trials, the warmup (if any) comes
+    from the first trial and anything else (driver stats, throughput series,
+    hammer output) from the last.
+    """
+    result = dict(trials[-1])
+    if trials[0].get("warmup"):
+        result["warmup"] = trials[0]["warmup"]
+    cis = confidence_intervals(trials, confidence)
+    result["achieved_qps"] = cis["achieved_qps"]["mean"]
+    result["cost_per_1m_entries"] = cis["cost_per_1m_entries"]["mean"]
+    result["cost_per_hour"] = round(sum(t["cost_per_hour"] for t in trials) / len(trials), 4)
+    if all("variable_costs" in t for t in trials):
+        result["variable_cost_per_hour"] = round(sum(t["variable_cost_per_hour"] for t in trials) / len(trials), 4)
+        result["variable_costs"] = {name: round(sum(t["variable_costs"].get(name, 0) for t in trials), 6)
+                                    for name in {n for t in trials for n in t["variable_costs"]}}
+    result["entries_written"] = sum(t["entries_written"] for t in trials)
+    result["elapsed_seconds"] = round(sum(t["elapsed_seconds"] for t in trials), 1)
+    steady = [t["steady_state_qps"] for t in trials if t.get("steady_state_qps") is not None]
+    if steady:
+        result["steady_state_qps"] = round(sum(steady) / len(steady), 2)
+    _merge_latency(trials, result)
+
+    result["ci"] = dict(cis, confidence=confidence, trials=len(trials), target=target_ci,
+                        converged=converged(cis, len(trials), target_ci))
+    result["trials"] = [
+        {k: t.get(k) for k in ("achieved_qps", "cost_per_1m_entries", "entries_written",
+                               "elapsed_seconds", "steady_state_qps")}
+        for t in trials
+    ]
+    return result
+
+
+def run_trials(run_trial, max_trials, target_ci=None, confidence=DEFAULT_CONFIDENCE):
+    """Run run_trial(i) up to max_trials times and return the aggregate result.
+
+    After MIN_TRIALS, stops as soon as every CI metric's interval is within
+    target_ci (relative width, e.g. 0.1 for +/-5%). Without target_ci all
+    max_trials trials run.
+    """
+    trials = []
+    for i in range(max_trials):
+        trials.append(run_trial(i))
+        if len(trials) < 2:
+            continue
+        cis = confidence_intervals(trials, confidence)
+        widths = ", ".join(f"{m} [{c['lo']}, {c['hi']}]" for m, c in cis.items())
+        print(f"📐 After {len(trials)} trials ({confidence:.0%} CI): {widths}")
+        if converged(cis, len(trials), target_ci):
+            print(f"📐 Intervals within {target_ci:.0%}; stopping after {len(trials)} of {max_trials} trials")
+            break
+    return aggregate_trials(trials, confidence, target_ci)
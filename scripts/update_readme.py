@@ -1,6 +1,8 @@
 import json
 import os
 
+from results_db import DEFAULT_PATH, ResultsDB
+
 
 MARKER_START = "<!-- BENCHMARK-RESULTS-START -->"
 MARKER_END = "<!-- BENCHMARK-RESULTS-END -->"
@@ -59,6 +61,8 @@ def generate_single_qps_block(results, tier_name, timestamp, tiers):
     lines.append("| :--- | :--- | :--- |")
     lines.append(f"| **Achieved QPS** | {tr.get('achieved_qps', 0):.2f} | {te.get('achieved_qps', 0):.2f} |")
     lines.append(f"| **Infra Cost/hr** | ${tr.get('cost_per_hour', 0):.4f} | ${te.get('cost_per_hour', 0):.4f} |")
+    if "variable_cost_per_hour" in tr or "variable_cost_per_hour" in te:
+        lines.append(f"| **Usage Cost/hr** | ${tr.get('variable_cost_per_hour', 0):.4f} | ${te.get('variable_cost_per_hour', 0):.4f} |")
     lines.append(f"| **Cost per 1M Entries** | {cost_per_1m(tr)} | {cost_per_1m(te)} |")
 
     return "\n".join(lines)
@@ -89,6 +93,28 @@ def generate_sweep_block(results, tier_name, timestamp, tiers):
     return "\n".join(lines)
 
 
+def generate_tier_history_block(latest_by_tier, tiers):
+    """Summarize the latest recorded run of every tier from the results history."""
+    lines = []
+    lines.append("**All tiers** (latest run of each, from the results history)")
+    lines.append("")
+    lines.append("| Tier | Infrastructure | Run | Trillian Peak QPS | TesseraCT Peak QPS | Trillian $/1M | TesseraCT $/1M |")
+    lines.append("| :--- | :--- | :--- | ---: | ---: | ---: | ---: |")
+    for tier_name, results in latest_by_tier.items():
+        trillian = [r for r in results if r["log_type"] == "trillian"]
+        tesseract = [r for r in results if r["log_type"] == "tesseract"]
+        tr = max(trillian, key=lambda r: r.get("achieved_qps") or 0) if trillian else None
+        te = max(tesseract, key=lambda r: r.get("achieved_qps") or 0) if tesseract else None
+        run = results[0]["timestamp"][:10] if results else "—"
+        tr_qps = f"{tr['achieved_qps']:.2f}" if tr else "—"
+        te_qps = f"{te['achieved_qps']:.2f}" if te else "—"
+        tr_cost = cost_per_1m(tr) if tr else "—"
+        te_cost = cost_per_1m(te) if te else "—"
+        lines.append(f"| {tier_name} | {tier_specs(tier_name, tiers)} | {run} | {tr_qps} | {te_qps} | {tr_cost} | {te_cost} |")
+
+    return "\n".join(lines)
+
+
 def update_readme():
     if not os.path.exists("benchmark_summary.json"):
         print("benchmark_summary.json not found")
@@ -123,6 +149,12 @@ def update_readme():
     else:
         block = generate_single_qps_block(all_results, tier_name, timestamp, tiers)
 
+    if os.path.exists(DEFAULT_PATH):
+        with ResultsDB(DEFAULT_PATH) as db:
+            latest_by_tier = db.latest_by_tier(full=True)
+        if len(latest_by_tier) > 1:
+            block += "\n\n" + generate_tier_history_block(latest_by_tier, tiers)
+
     with open("README.md", "r") as f:
         content = f.read()
 
@@ -5,6 +5,11 @@ Fetches current list prices from the GCP Cloud Billing Catalog API and
 compares them against the hardcoded rates in costs.json, flagging any drift
 that exceeds a configurable threshold.
 
+Fetched SKUs for the chosen region are cached as gzipped snapshots in
+.sku-cache/ for --cache-ttl hours (default 24), so repeated runs skip the
+download. --refresh forces a fetch; --offline validates from the cache
+alone and needs no authentication.
+
 Authentication (tried in order):
     1. --api-key flag or GOOGLE_API_KEY env var
     2. gcloud auth print-access-token
@@ -17,15 +22,22 @@ Exit codes:
 """
 
 import argparse
+import codecs
+import gzip
 import json
 import os
+import re
 import subprocess
 import sys
-import urllib.request
-import urllib.error
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-API_BASE = "https://cloudbilling.googleapis.com/v1"
+from http_session import HTTPRequestError, HTTPSession
+
+API_BASE = os.environ.get(
+    "BILLING_API_BASE", "https://cloudbilling.googleapis.com/v1")
+PAGE_SIZE = 5000
 
 # Stable GCP Cloud Billing Catalog service IDs
 SERVICES = {
@@ -57,6 +69,9 @@ REGION_TO_GEO = {
 
 HOURS_PER_MONTH = 730
 
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".sku-cache"
+DEFAULT_CACHE_TTL_HOURS = 24
+
 
 def get_auth(api_key=None):
     """Resolve API authentication.
@@ -92,41 +107,318 @@ def get_auth(api_key=None):
     return {}
 
 
-def fetch_skus(service_id, auth=None):
-    """Fetch all SKUs for a GCP Billing Catalog service, handling pagination."""
+def in_region(sku, region):
+    """True for SKUs that can price resources in a region.
+
+    That is SKUs listing the region itself, global SKUs and SKUs with no
+    region at all; per-region SKUs for every other region are not.
+    """
+    regions = sku.get("serviceRegions")
+    return not regions or region in regions or "global" in regions
+
+
+def project_sku(sku):
+    """Reduce a catalog SKU to the fields price checks look at.
+
+    Keeps description, category, serviceRegions and the first tier of the
+    first pricing expression; the full SKU is several times larger.
+    """
+    category = sku.get("category", {})
+    projected = {
+        "description": sku.get("description", ""),
+        "category": {"resourceFamily": category.get("resourceFamily"),
+                     "usageType": category.get("usageType")},
+        "serviceRegions": sku.get("serviceRegions", []),
+    }
+    pricing = sku.get("pricingInfo", [])
+    if pricing:
+        expr = pricing[0].get("pricingExpression", {})
+        projected["pricingInfo"] = [{"pricingExpression": {
+            "usageUnit": expr.get("usageUnit", ""),
+            "tieredRates": expr.get("tieredRates", [])[:1],
+        }}]
+    return projected
+
+
+class SkuCache:
+    """Gzipped JSON catalog snapshots, one file per service ID and region.
+
+    List prices change rarely, so a snapshot younger than the TTL is used
+    instead of re-downloading the catalog. Expired snapshots are still
+    returned by load(max_age=None), which is how --offline and fallback
+    after a failed fetch read them.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR,
+                 ttl_hours=DEFAULT_CACHE_TTL_HOURS):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_hours * 3600
+
+    def path(self, service_id, region):
+        return self.cache_dir / f"{service_id}-{region}.json.gz"
+
+    def load(self, service_id, region, max_age="ttl"):
+        """Return (skus, age_seconds), or (None, None) if missing or stale.
+
+        max_age defaults to the TTL; None accepts a snapshot of any age.
+        """
+        if max_age == "ttl":
+            max_age = self.ttl_seconds
+        try:
+            with gzip.open(self.path(service_id, region), "rt") as f:
+                snapshot = json.load(f)
+        except (OSError, EOFError, json.JSONDecodeError):
+            return None, None
+        age = time.time() - snapshot.get("fetched_at", 0)
+        if max_age is not None and age > max_age:
+            return None, age
+        return snapshot.get("skus", []), age
+
+    def store(self, service_id, region, skus):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path(service_id, region)
+        tmp = path.with_name(path.name + ".tmp")
+        snapshot = {"service_id": service_id, "region": region,
+                    "fetched_at": time.time(), "skus": skus}
+        with gzip.open(tmp, "wt") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+
+def _page_url(service_id, auth, page_token=None, api_base=None):
+    url = (f"{api_base or API_BASE}/services/{service_id}/skus"
+           f"?pageSize={PAGE_SIZE}")
+    if "key" in auth:
+        url += f"&key={auth['key']}"
+    if page_token:
+        url += f"&pageToken={page_token}"
+    return url
+
+
+_WHITESPACE = " \t\n\r"
+
+
+def parse_sku_page(read, keep=None, chunk_size=1 << 16):
+    """Parse one catalog page incrementally from a read(n) callable.
+
+    SKUs are decoded one at a time out of the "skus" array as the bytes
+    arrive, and each is passed through keep (if given) and project_sku
+    before the next is decoded, so neither the raw page nor the full SKU
+    objects are ever held at once. Returns (skus, next_page_token).
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+
+    def peek():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if eof:
+                raise json.JSONDecodeError("Unexpected end of page", buf, pos)
+            fill()
+
+    def expect(chars):
+        nonlocal pos
+        c = peek()
+        if c not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", buf, pos)
+        pos += 1
+        return c
+
+    def value():
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                # A value running to the end of the buffer may be truncated
+                # (e.g. a number), so only trust it once more input follows.
+                if end < len(buf) or eof:
+                    pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+
+    skus, token = [], None
+    expect("{")
+    if peek() == "}":
+        return skus, token
+    while True:
+        key = value()
+        expect(":")
+        if key == "skus":
+            expect("[")
+            if peek() == "]":
+                pos += 1
+            else:
+                while True:
+                    sku = value()
+                    if isinstance(sku, dict) and (keep is None or keep(sku)):
+                        skus.append(project_sku(sku))
+                    if expect(",]") == "]":
+                        break
+        elif key == "nextPageToken":
+            token = value()
+        else:
+            value()
+        if expect(",}") == "}":
+            return skus, token
+
+
+def iter_sku_pages(service_id, auth=None, session=None, api_base=None,
+                   record_dir=None, keep=None, stream=True):
+    """Yield the SKUs of each catalog page for a service.
+
+    Only SKUs passing keep are yielded, projected by project_sku. With
+    stream (the default) each page is parsed as it downloads, so memory
+    stays flat however large the catalog; otherwise each page is read
+    whole and decoded with json.loads. Pages are fetched one after
+    another: the next page's token sits at the end of the current body.
+    With record_dir, each raw
+    response is also saved as <record_dir>/<service_id>/<n>.json for
+    replay by fake_billing.py.
+    """
     auth = auth or {}
+    session = session or HTTPSession(timeout=60)
+    headers = {"User-Agent": "ctlog-benchmarks/validate-costs"}
+    if "token" in auth:
+        headers["Authorization"] = f"Bearer {auth['token']}"
+
+    def fetch(index, page_token):
+        url = _page_url(service_id, auth, page_token, api_base)
+        record = None
+        if record_dir:
+            service_dir = Path(record_dir) / service_id
+            service_dir.mkdir(parents=True, exist_ok=True)
+            record = service_dir / f"{index}.json"
+        if not stream:
+            status, body = session.request("GET", url, headers=headers)
+            if status != 200:
+                raise HTTPRequestError(f"HTTP {status}", status)
+            if record:
+                record.write_bytes(body)
+            data = json.loads(body)
+            return ([project_sku(s) for s in data.get("skus", [])
+                     if keep is None or keep(s)],
+                    data.get("nextPageToken"))
+
+        with session.open("GET", url, headers=headers) as resp:
+            if resp.status != 200:
+                resp.read()
+                raise HTTPRequestError(f"HTTP {resp.status}", resp.status)
+            if not record:
+                return parse_sku_page(resp.read, keep)
+            with open(record, "wb") as out:
+                def read(n):
+                    chunk = resp.read(n)
+                    out.write(chunk)
+                    return chunk
+                return parse_sku_page(read, keep)
+
+    index, token = 0, None
+    while True:
+        skus, token = fetch(index, token)
+        yield skus
+        if not token:
+            break
+        index += 1
+
+
+def fetch_skus(service_id, auth=None, session=None, api_base=None,
+               record_dir=None, keep=None, stream=True):
+    """Fetch all SKUs for a GCP Billing Catalog service, handling pagination.
+
+    See iter_sku_pages for keep and stream.
+    """
     skus = []
-    base_params = "pageSize=5000"
-    if "key" in auth:
-        base_params += f"&key={auth['key']}"
-    url = f"{API_BASE}/services/{service_id}/skus?{base_params}"
+    try:
+        for page in iter_sku_pages(service_id, auth, session, api_base,
+                                   record_dir, keep, stream):
+            skus.extend(page)
+    except HTTPRequestError as e:
+        print(f"Error fetching SKUs for service {service_id}: {e}",
+              file=sys.stderr)
+        return None
+    except json.JSONDecodeError as e:
+        print(f"Error parsing response for service {service_id}: {e}",
+              file=sys.stderr)
+        return None
+    return skus
 
-    while url:
-        try:
-            req = urllib.request.Request(url)
-            req.add_header("User-Agent", "ctlog-benchmarks/validate-costs")
-            if "token" in auth:
-                req.add_header("Authorization", f"Bearer {auth['token']}")
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-        except (urllib.error.URLError, urllib.error.HTTPError, OSError) as e:
-            print(f"Error fetching SKUs for service {service_id}: {e}",
-                  file=sys.stderr)
-            return None
-        except json.JSONDecodeError as e:
-            print(f"Error parsing response for service {service_id}: {e}",
-                  file=sys.stderr)
-            return None
-
-        skus.extend(data.get("skus", []))
-        token = data.get("nextPageToken")
-        if token:
-            url = (f"{API_BASE}/services/{service_id}/skus"
-                   f"?{base_params}&pageToken={token}")
+
+def fetch_all_skus(services, region, auth=None, api_base=None,
+                   record_dir=None, cache=None, offline=False,
+                   refresh=False, stream=True, verbose=False):
+    """Fetch a region's SKUs for several services at once.
+
+    Services with a fresh snapshot in cache (unless refresh) are read from
+    it; the rest are paged through on their own threads, all sharing one
+    keep-alive connection pool, and written back to cache. A failed fetch
+    falls back to an expired snapshot if there is one. With offline, only
+    the cache is consulted. Returns {service: skus}, with an empty list
+    for services that could not be loaded (see validate_tier).
+    """
+    services = [s for s in dict.fromkeys(services) if s in SERVICES]
+    result = {}
+    to_fetch = []
+    for service in services:
+        skus = age = None
+        if cache and not refresh:
+            skus, age = cache.load(SERVICES[service], region,
+                                   max_age=None if offline else "ttl")
+        if skus is not None:
+            result[service] = skus
+            if verbose:
+                print(f"  Loaded {len(skus)} cached SKUs for {service} "
+                      f"({age / 3600:.1f}h old)", file=sys.stderr)
+        elif offline:
+            print(f"Error: no cached SKUs for service {SERVICES[service]} "
+                  f"in {region}", file=sys.stderr)
+            result[service] = []
         else:
-            url = None
+            to_fetch.append(service)
+    if not to_fetch:
+        return result
+
+    session = HTTPSession(timeout=60, max_idle_per_host=2 * len(to_fetch))
+
+    def fetch(service):
+        start = time.monotonic()
+        skus = fetch_skus(SERVICES[service], auth, session, api_base,
+                          record_dir, lambda s: in_region(s, region), stream)
+        if skus is None:
+            stale, age = cache.load(SERVICES[service], region,
+                                    max_age=None) if cache else (None, None)
+            if stale is not None:
+                print(f"Warning: using {age / 3600:.1f}h old cached SKUs "
+                      f"for {service}", file=sys.stderr)
+            return stale or []
+        if cache:
+            cache.store(SERVICES[service], region, skus)
+        if verbose:
+            print(f"  Fetched {len(skus)} {region} SKUs for {service} in "
+                  f"{time.monotonic() - start:.1f}s", file=sys.stderr)
+        return skus
 
-    return skus
+    try:
+        with ThreadPoolExecutor(max_workers=len(to_fetch)) as pool:
+            result.update(zip(to_fetch, pool.map(fetch, to_fetch)))
+    finally:
+        session.close()
+    return result
 
 
 def extract_rate(sku):
@@ -161,9 +453,110 @@ def to_hourly(rate, unit):
     return rate
 
 
-def find_sku(skus, match_fn, verbose=False):
-    """Find the first matching SKU."""
-    matches = [s for s in skus if match_fn(s)]
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SkuIndex:
+    """One-time normalized index over a service's SKUs.
+
+    Posting lists (SKU positions, in catalog order) are kept per resource
+    family, usage type, service region and description token, so a check
+    only touches the SKUs that share all of its terms instead of running a
+    predicate over the whole catalog. A phrase token also matches the
+    description tokens containing it ("unit" finds "units"), keeping the
+    substring semantics of the predicates.
+
+    A query is a dict with any of:
+        phrases          substrings that must all appear in the lowercased
+                         description (their tokens drive the lookup)
+        exclude          substrings that must not appear
+        resource_family  category.resourceFamily
+        usage_type       category.usageType
+        region           a region the SKU serves (see in_region)
+    or a list of such dicts, matching SKUs that satisfy any of them.
+    """
+
+    def __init__(self, skus):
+        self.skus = skus
+        self._descriptions = []
+        self._postings = {}
+        self._token_postings = {}
+        for i, sku in enumerate(skus):
+            description = sku.get("description", "").lower()
+            category = sku.get("category", {})
+            self._descriptions.append(description)
+            keys = {("family", category.get("resourceFamily")),
+                    ("usage", category.get("usageType"))}
+            # SKUs without regions price every region, like global ones.
+            keys.update(("region", r)
+                        for r in sku.get("serviceRegions") or [None])
+            keys.update(("token", t) for t in _TOKEN_RE.findall(description))
+            for key in keys:
+                self._postings.setdefault(key, []).append(i)
+
+    def _token_posting(self, token):
+        posting = self._token_postings.get(token)
+        if posting is None:
+            posting = set()
+            for (kind, value), positions in self._postings.items():
+                if kind == "token" and token in value:
+                    posting.update(positions)
+            self._token_postings[token] = posting
+        return posting
+
+    def _positions(self, query):
+        postings = [self._token_posting(t)
+                    for phrase in query.get("phrases", ())
+                    for t in _tokens(phrase)]
+        keys = []
+        if "resource_family" in query:
+            keys.append(("family", query["resource_family"]))
+        if "usage_type" in query:
+            keys.append(("usage", query["usage_type"]))
+        postings.extend(self._postings.get(k, []) for k in keys)
+        if "region" in query:
+            # The region's own SKUs plus global and region-less ones, as
+            # in_region accepts.
+            postings.append([i for r in (query["region"], "global", None)
+                             for i in self._postings.get(("region", r), [])])
+        if not postings:
+            return set(range(len(self.skus)))
+
+        postings.sort(key=len)
+        positions = set(postings[0])
+        for posting in postings[1:]:
+            if not positions:
+                break
+            positions.intersection_update(posting)
+
+        phrases = [p.lower() for p in query.get("phrases", ())]
+        exclude = [p.lower() for p in query.get("exclude", ())]
+        return {i for i in positions
+                if all(p in self._descriptions[i] for p in phrases)
+                and not any(p in self._descriptions[i] for p in exclude)}
+
+    def query(self, query):
+        """Return the matching SKUs in catalog order."""
+        alternatives = query if isinstance(query, list) else [query]
+        positions = set()
+        for alternative in alternatives:
+            positions |= self._positions(alternative)
+        return [self.skus[i] for i in sorted(positions)]
+
+
+def find_sku(skus, match_fn, verbose=False, index=None, query=None):
+    """Find the first matching SKU.
+
+    With an index and a structured query, looks the SKU up in the index;
+    otherwise, or if the index finds nothing, scans skus with match_fn.
+    """
+    matches = index.query(query) if index and query else []
+    if not matches:
+        matches = [s for s in skus if match_fn(s)]
     if verbose and matches:
         print(f"  Found {len(matches)} matching SKU(s):", file=sys.stderr)
         for m in matches[:5]:
@@ -176,8 +569,10 @@ def find_sku(skus, match_fn, verbose=False):
 def build_checks(tier_data, region):
     """Build a list of price checks for a single tier.
 
-    Each check is a dict with: component, expected, service, match, scale.
-    The API rate is multiplied by 'scale' before comparison to 'expected'.
+    Each check is a dict with: component, expected, service, query, match,
+    scale. 'query' is the SkuIndex lookup; 'match' is the equivalent
+    predicate, used when the index finds nothing. The API rate is
+    multiplied by 'scale' before comparison to 'expected'.
     """
     checks = []
     geo = REGION_TO_GEO.get(region, "Americas")
@@ -198,6 +593,8 @@ def build_checks(tier_data, region):
             "component": "GKE Cluster Management",
             "expected": mgmt["hourly_rate"],
             "service": "gke",
+            "query": {"phrases": ["cluster management fee"],
+                      "usage_type": "OnDemand"},
             "match": lambda s: (
                 "cluster management fee" in s.get("description", "").lower()
                 and s.get("category", {}).get("usageType") == "OnDemand"
@@ -213,6 +610,8 @@ def build_checks(tier_data, region):
             "component": f"{machine_type} CPU/node",
             "expected": pnh["cpu"],
             "service": "compute",
+            "query": {"phrases": ["e2 instance core", geo],
+                      "usage_type": "OnDemand", "resource_family": "Compute"},
             "match": lambda s, g=geo: (
                 "e2 instance core" in s.get("description", "").lower()
                 and g.lower() in s.get("description", "").lower()
@@ -228,6 +627,8 @@ def build_checks(tier_data, region):
             "component": f"{machine_type} RAM/node",
             "expected": pnh["ram"],
             "service": "compute",
+            "query": {"phrases": ["e2 instance ram", geo],
+                      "usage_type": "OnDemand", "resource_family": "Compute"},
             "match": lambda s, g=geo: (
                 "e2 instance ram" in s.get("description", "").lower()
                 and g.lower() in s.get("description", "").lower()
@@ -244,12 +645,20 @@ def build_checks(tier_data, region):
             "component": "Forwarding Rule",
             "expected": lb["per_rule_hourly"],
             "service": "compute",
+            "query": [
+                {"phrases": ["forwarding rule"], "exclude": ["additional"],
+                 "usage_type": "OnDemand", "resource_family": "Network",
+                 "region": region},
+                {"phrases": ["forwarding rule", geo],
+                 "exclude": ["additional"],
+                 "usage_type": "OnDemand", "resource_family": "Network"},
+            ],
             "match": lambda s, r=region, g=geo: (
                 "forwarding rule" in s.get("description", "").lower()
                 and s.get("category", {}).get("usageType") == "OnDemand"
                 and s.get("category", {}).get("resourceFamily") == "Network"
                 and "additional" not in s.get("description", "").lower()
-                and (any(r in sr for sr in s.get("serviceRegions", []))
+                and (in_region(s, r)
                      or g.lower() in s.get("description", "").lower())
             ),
             "scale": 1,
@@ -272,12 +681,14 @@ def build_checks(tier_data, region):
             "component": f"Cloud SQL {sql_tier}",
             "expected": sql["hourly_rate"],
             "service": "cloud_sql",
+            "query": {"phrases": kw + ["mysql"], "usage_type": "OnDemand",
+                      "region": region},
             "match": lambda s, keywords=kw, r=region: (
                 all(k.lower() in s.get("description", "").lower()
                     for k in keywords)
                 and "mysql" in s.get("description", "").lower()
                 and s.get("category", {}).get("usageType") == "OnDemand"
-                and any(r in sr for sr in s.get("serviceRegions", []))
+                and in_region(s, r)
             ),
             "scale": 1,
         })
@@ -290,6 +701,8 @@ def build_checks(tier_data, region):
             "component": f"Spanner {pus} PU",
             "expected": spanner["hourly_rate"],
             "service": "spanner",
+            "query": {"phrases": ["processing", "unit", "regional"],
+                      "usage_type": "OnDemand"},
             "match": lambda s: (
                 "processing" in s.get("description", "").lower()
                 and "unit" in s.get("description", "").lower()
@@ -303,10 +716,16 @@ def build_checks(tier_data, region):
 
 
 def validate_tier(tier_name, tier_data, skus_cache, threshold, region,
-                  auth=None, verbose=False):
-    """Run all price checks for a tier and return results."""
+                  auth=None, verbose=False, api_base=None, indexes=None):
+    """Run all price checks for a tier and return results.
+
+    indexes caches a SkuIndex per service; pass the same dict for every
+    tier so each service is indexed once.
+    """
     checks = build_checks(tier_data, region)
     results = []
+    if indexes is None:
+        indexes = {}
 
     for check in checks:
         service = check["service"]
@@ -328,7 +747,8 @@ def validate_tier(tier_name, tier_data, skus_cache, threshold, region,
             if verbose:
                 print(f"  Fetching SKUs for {service} ({service_id})...",
                       file=sys.stderr)
-            skus = fetch_skus(service_id, auth=auth)
+            skus = fetch_skus(service_id, auth=auth, api_base=api_base,
+                              keep=lambda s: in_region(s, region))
             if skus is None:
                 skus_cache[service] = []
             else:
@@ -351,7 +771,10 @@ def validate_tier(tier_name, tier_data, skus_cache, threshold, region,
 
         if verbose:
             print(f"  Matching: {check['component']}", file=sys.stderr)
-        sku = find_sku(skus, check["match"], verbose=verbose)
+        if service not in indexes:
+            indexes[service] = SkuIndex(skus)
+        sku = find_sku(skus, check["match"], verbose=verbose,
+                       index=indexes[service], query=check.get("query"))
 
         if not sku:
             results.append({
@@ -451,15 +874,44 @@ def main():
     parser.add_argument(
         "--verbose", "-v", action="store_true",
         help="Print debug info about SKU matching")
+    parser.add_argument(
+        "--api-base", default=API_BASE,
+        help="Billing Catalog API base URL, e.g. a local fake_billing.py "
+             "(default: $BILLING_API_BASE or the public API)")
+    parser.add_argument(
+        "--record", metavar="DIR",
+        help="Save raw catalog pages under DIR for replay by fake_billing.py")
+    parser.add_argument(
+        "--cache-dir", default=str(DEFAULT_CACHE_DIR),
+        help="Directory for cached catalog snapshots (default: .sku-cache)")
+    parser.add_argument(
+        "--cache-ttl", type=float, default=DEFAULT_CACHE_TTL_HOURS,
+        help="Hours before a cached snapshot is re-fetched (default: 24)")
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Neither read nor write the snapshot cache")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--offline", action="store_true",
+        help="Validate from cached snapshots only, whatever their age")
+    group.add_argument(
+        "--refresh", action="store_true",
+        help="Re-fetch every service even if its snapshot is fresh")
+    parser.add_argument(
+        "--no-stream", action="store_true",
+        help="Read each catalog page whole instead of parsing it as it "
+             "downloads")
     args = parser.parse_args()
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the cache")
 
     # Resolve authentication
-    auth = get_auth(api_key=args.api_key)
-    if not auth:
+    auth = {} if args.offline else get_auth(api_key=args.api_key)
+    if not auth and not args.offline:
         print("Error: No authentication found. Provide --api-key, set "
               "GOOGLE_API_KEY, or authenticate with gcloud.", file=sys.stderr)
         sys.exit(2)
-    if args.verbose:
+    if args.verbose and auth:
         method = "API key" if "key" in auth else "OAuth token"
         print(f"  Auth: using {method}", file=sys.stderr)
 
@@ -480,7 +932,20 @@ def main():
             sys.exit(2)
         tiers = {args.tier: tiers[args.tier]}
 
-    skus_cache = {}
+    # Every tier checks every service, so fetch them all up front,
+    # concurrently, rather than serially as validate_tier reaches each one.
+    cache = None if args.no_cache else SkuCache(args.cache_dir, args.cache_ttl)
+    start = time.monotonic()
+    skus_cache = fetch_all_skus(
+        SERVICES, args.region, auth=auth, api_base=args.api_base,
+        record_dir=args.record, cache=cache, offline=args.offline,
+        refresh=args.refresh, stream=not args.no_stream,
+        verbose=args.verbose)
+    if args.verbose:
+        print(f"  Loaded {len(skus_cache)} services in "
+              f"{time.monotonic() - start:.1f}s", file=sys.stderr)
+
+    indexes = {}
     all_results = {}
     has_drift = False
     has_error = False
@@ -488,7 +953,8 @@ def main():
     for tier_name, tier_data in tiers.items():
         results = validate_tier(
             tier_name, tier_data, skus_cache, args.threshold,
-            args.region, auth=auth, verbose=args.verbose)
+            args.region, auth=auth, verbose=args.verbose,
+            api_base=args.api_base, indexes=indexes)
         all_results[tier_name] = results
 
         for r in results:
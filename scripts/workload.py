@@ -0,0 +1,267 @@
+"""Declarative workload profiles: phases of mixed reads and writes.
+
+A profile is a YAML or JSON file describing a sequence of phases:
+
+    name: ca-burst-monitor-tail
+    defaults: {read_mix: 0.5}
+    phases:
+      - name: steady
+        duration: 2m
+        rate: {shape: constant, qps: 40}
+        read_fraction: 0.8       # share of the rate spent on reads
+      - name: ca-burst
+        duration: 60s
+        rate: {shape: spike, qps: 40, peak_qps: 400, start: 10s, length: 20s}
+        read_fraction: 0.1
+        dup_chance: 0.05         # resubmit an already-sent chain
+      - name: drain
+        duration: 60
+        rate: {shape: ramp, from_qps: 400, to_qps: 40}
+
+Rate shapes give the total request rate over the phase, in seconds from
+its start:
+
+    constant  qps
+    step      steps: [{at, qps}, ...]; each rate holds until the next step
+    ramp      from_qps to to_qps linearly over the phase
+    spike     qps, rising to peak_qps for `length` seconds from `start`
+
+read_fraction of the rate goes to the read driver (read_mix of those to
+random positions); the rest are add-chain writes, dup_chance of which
+repeat an earlier submission. Keys in `defaults` apply to every phase that
+doesn't set them. Durations are seconds or strings like "90s" and "2m".
+
+compile_profile() turns a profile into per-phase write and read schedules:
+rate functions for the native drivers, and piecewise-constant segments for
+the hammers, which only run at a fixed rate per invocation.
+"""
+
+import json
+import os
+
+SHAPES = ("constant", "step", "ramp", "spike")
+
+PHASE_DEFAULTS = {"read_fraction": 0.0, "read_mix": 0.5, "dup_chance": 0.0}
+
+# Hammer segments for non-constant shapes are this many seconds long; each
+# is one hammer invocation at the segment's mean rate.
+DEFAULT_SEGMENT_SECONDS = 15
+
+
+class WorkloadError(ValueError):
+    """Raised when a profile is missing, malformed or describes an impossible workload."""
+
+
+def parse_duration(value, what="duration"):
+    """Seconds from a number or a "90s"/"2m"/"1h" string."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = float(value)
+    elif isinstance(value, str) and value[-1:] in ("s", "m", "h"):
+        try:
+            seconds = float(value[:-1]) * {"s": 1, "m": 60, "h": 3600}[value[-1]]
+        except ValueError:
+            raise WorkloadError(f"{what} {value!r} is not a number of s/m/h")
+    else:
+        raise WorkloadError(f"{what} {value!r} must be seconds or a string like '90s' or '2m'")
+    if seconds < 0:
+        raise WorkloadError(f"{what} must not be negative")
+    return seconds
+
+
+def _number(rate, key, where):
+    value = rate.get(key)
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+        raise WorkloadError(f"{where}: rate.{key} must be a non-negative number")
+    return float(value)
+
+
+def _fraction(phase, key, where):
+    value = phase[key]
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 <= value <= 1:
+        raise WorkloadError(f"{where}: {key} must be between 0 and 1")
+    return float(value)
+
+
+def _normalize_rate(rate, duration, where):
+    if not isinstance(rate, dict) or rate.get("shape", "constant") not in SHAPES:
+        raise WorkloadError(f"{where}: rate.shape must be one of {', '.join(SHAPES)}")
+    shape = rate.get("shape", "constant")
+    if shape == "constant":
+        return {"shape": shape, "qps": _number(rate, "qps", where)}
+    if shape == "ramp":
+        return {"shape": shape, "from_qps": _number(rate, "from_qps", where),
+                "to_qps": _number(rate, "to_qps", where)}
+    if shape == "spike":
+        start = parse_duration(rate.get("start", 0), f"{where}: rate.start")
+        length = parse_duration(rate.get("length"), f"{where}: rate.length")
+        if start + length > duration:
+            raise WorkloadError(f"{where}: spike ends after the phase does")
+        return {"shape": shape, "qps": _number(rate, "qps", where), "peak_qps": _number(rate, "peak_qps", where),
+                "start": start, "length": length}
+    steps = rate.get("steps")
+    if not isinstance(steps, list) or not steps:
+        raise WorkloadError(f"{where}: a step rate needs a non-empty steps list")
+    normalized = []
+    for step in steps:
+        if not isinstance(step, dict):
+            raise WorkloadError(f"{where}: each step needs 'at' and 'qps'")
+        normalized.append({"at": parse_duration(step.get("at", 0), f"{where}: step at"),
+                           "qps": _number(step, "qps", where)})
+    normalized.sort(key=lambda s: s["at"])
+    if normalized[0]["at"] != 0:
+        raise WorkloadError(f"{where}: the first step must be at 0")
+    return {"shape": shape, "steps": normalized}
+
+
+def validate_profile(data, name=None):
+    """Check a parsed profile and return it normalized (durations in seconds, defaults applied)."""
+    if not isinstance(data, dict) or not isinstance(data.get("phases"), list) or not data["phases"]:
+        raise WorkloadError("a profile needs a non-empty 'phases' list")
+    defaults = dict(PHASE_DEFAULTS, **(data.get("defaults") or {}))
+    phases = []
+    for i, raw in enumerate(data["phases"]):
+        if not isinstance(raw, dict):
+            raise WorkloadError(f"phase {i + 1} must be a mapping")
+        where = f"phase {raw.get('name') or i + 1}"
+        phase = dict(defaults, **raw)
+        duration = parse_duration(phase.get("duration"), f"{where}: duration")
+        if duration <= 0:
+            raise WorkloadError(f"{where}: duration must be positive")
+        phases.append({
+            "name": str(phase.get("name") or f"phase-{i + 1}"),
+            "duration": duration,
+            "rate": _normalize_rate(phase.get("rate"), duration, where),
+            "read_fraction": _fraction(phase, "read_fraction", where),
+            "read_mix": _fraction(phase, "read_mix", where),
+            "dup_chance": _fraction(phase, "dup_chance", where),
+        })
+    return {"name": str(data.get("name") or name or "profile"),
+            "description": data.get("description", ""), "phases": phases}
+
+
+def load_profile(path):
+    """Read and validate a .json, .yaml or .yml profile. Raises WorkloadError."""
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError as e:
+        raise WorkloadError(f"can't read profile: {e}")
+    if path.endswith((".yaml", ".yml")):
+        try:
+            # Imported lazily so JSON profiles don't need PyYAML.
+            import yaml
+        except ImportError:
+            raise WorkloadError("YAML profiles need PyYAML (pip install pyyaml); or write the profile as JSON")
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise WorkloadError(f"{path}: {e}")
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise WorkloadError(f"{path}: {e}")
+    return validate_profile(data, os.path.splitext(os.path.basename(path))[0])
+
+
+def rate_at(rate, t, duration):
+    """Total requests per second `t` seconds into a phase of `duration` seconds."""
+    shape = rate["shape"]
+    if shape == "constant":
+        return rate["qps"]
+    if shape == "ramp":
+        frac = min(max(t / duration, 0.0), 1.0) if duration > 0 else 1.0
+        return rate["from_qps"] + (rate["to_qps"] - rate["from_qps"]) * frac
+    if shape == "spike":
+        return rate["peak_qps"] if rate["start"] <= t < rate["start"] + rate["length"] else rate["qps"]
+    current = rate["steps"][0]["qps"]
+    for step in rate["steps"]:
+        if step["at"] > t:
+            break
+        current = step["qps"]
+    return current
+
+
+def mean_rate(rate, start, end, duration, resolution=0.1):
+    """Mean of rate_at over [start, end), sampled every `resolution` seconds."""
+    n = max(1, int(round((end - start) / resolution)))
+    width = (end - start) / n
+    return sum(rate_at(rate, start + (i + 0.5) * width, duration) for i in range(n)) / n
+
+
+def peak_rate(rate):
+    """Highest rate the shape reaches."""
+    shape = rate["shape"]
+    if shape == "constant":
+        return rate["qps"]
+    if shape == "ramp":
+        return max(rate["from_qps"], rate["to_qps"])
+    if shape == "spike":
+        return max(rate["qps"], rate["peak_qps"])
+    return max(s["qps"] for s in rate["steps"])
+
+
+def segments(phase, segment_seconds=DEFAULT_SEGMENT_SECONDS):
+    """Piecewise-constant (seconds, qps) write segments for a phase.
+
+    Constant phases and each flat stretch of a step or spike are one
+    segment; ramps are cut into segment_seconds pieces at their mean rate.
+    Rates are rounded to whole requests per second, the hammers' unit.
+    """
+    rate, duration = phase["rate"], phase["duration"]
+    write = 1.0 - phase["read_fraction"]
+    if rate["shape"] == "constant":
+        edges = [0.0, duration]
+    elif rate["shape"] == "step":
+        edges = sorted({0.0, duration} | {s["at"] for s in rate["steps"] if s["at"] < duration})
+    elif rate["shape"] == "spike":
+        edges = sorted({0.0, duration, rate["start"], rate["start"] + rate["length"]})
+    else:
+        n = max(1, int(round(duration / segment_seconds)))
+        edges = [duration * i / n for i in range(n + 1)]
+    result = []
+    for start, end in zip(edges, edges[1:]):
+        if end <= start:
+            continue
+        qps = int(round(mean_rate(rate, start, end, duration) * write))
+        if result and result[-1][1] == qps:
+            result[-1] = (result[-1][0] + end - start, qps)
+        else:
+            result.append((end - start, qps))
+    return result
+
+
+def compile_profile(profile, segment_seconds=DEFAULT_SEGMENT_SECONDS):
+    """Per-phase schedules: write/read rate functions and hammer write segments.
+
+    Each phase dict gains write_rate(t) and read_rate(t) (requests per
+    second, t in seconds from the phase start) and `segments`.
+    """
+    compiled = []
+    for phase in profile["phases"]:
+        rate, duration, reads = phase["rate"], phase["duration"], phase["read_fraction"]
+        compiled.append(dict(
+            phase,
+            write_rate=lambda t, rate=rate, duration=duration, reads=reads: rate_at(rate, t, duration) * (1 - reads),
+            read_rate=lambda t, rate=rate, duration=duration, reads=reads: rate_at(rate, t, duration) * reads,
+            peak_write_qps=peak_rate(rate) * (1 - reads),
+            peak_read_qps=peak_rate(rate) * reads,
+            segments=segments(phase, segment_seconds),
+        ))
+    return compiled
+
+
+def describe_phase(phase):
+    """One-line summary of a normalized phase."""
+    rate = phase["rate"]
+    if rate["shape"] == "constant":
+        shape = f"{rate['qps']:g} QPS"
+    elif rate["shape"] == "ramp":
+        shape = f"ramp {rate['from_qps']:g}→{rate['to_qps']:g} QPS"
+    elif rate["shape"] == "spike":
+        shape = (f"{rate['qps']:g} QPS spiking to {rate['peak_qps']:g} at {rate['start']:g}s "
+                 f"for {rate['length']:g}s")
+    else:
+        shape = "steps " + ", ".join(f"{s['qps']:g}@{s['at']:g}s" for s in rate["steps"])
+    return (f"{phase['name']}: {phase['duration']:g}s, {shape}, {phase['read_fraction']:.0%} reads, "
+            f"{phase['dup_chance']:.0%} duplicate writes")